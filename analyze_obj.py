@@ -0,0 +1,142 @@
+# Reports what exported OBJs cost X-Plane to draw, without Blender, and fails if
+# any LOD bucket is over the given thresholds, for CI
+#
+# python3 analyze_obj.py path/to/exported/*.obj --max-batches 200 --max-anim-depth 4
+#
+# Per LOD bucket: TRIS/LINES batches (draw calls), triangles, ATTR_ state changes,
+# ANIM blocks and depth, vertex reuse, and lights, and where no LOD covers. See
+# io_xplane2blender/xplane_utils/xplane_obj_analyzer.py. Batches are named by
+# their line in the OBJ; the Scene's "Analyze Render Cost" button in Blender
+# names them by Blender object.
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import types
+from typing import Any, Dict
+
+ADDON_FOLDER = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), "io_xplane2blender"
+)
+
+# The addon's __init__ needs Blender, the reader and analyzer don't
+_addon = types.ModuleType("io_xplane2blender")
+_addon.__path__ = [ADDON_FOLDER]
+sys.modules.setdefault("io_xplane2blender", _addon)
+
+from io_xplane2blender.xplane_utils import xplane_obj_analyzer
+
+
+def _make_argparse():
+    parser = argparse.ArgumentParser(
+        description="Reports the render cost of OBJs, per LOD bucket"
+    )
+    parser.add_argument(
+        "objs", nargs="+", help="OBJ files, or glob patterns of them", type=str
+    )
+    parser.add_argument(
+        "--top",
+        default=10,
+        type=int,
+        help="How many of the worst batches to list per OBJ",
+    )
+    parser.add_argument("--json", type=str, help="Write the reports as JSON here")
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="Only print what is over a threshold"
+    )
+
+    thresholds_group = parser.add_argument_group(
+        "Thresholds", "Any LOD bucket over one fails, with exit code 1"
+    )
+    thresholds_group.add_argument(
+        "--max-batches", type=int, help="TRIS and LINES, each a draw call"
+    )
+    thresholds_group.add_argument(
+        "--max-state-changes", type=int, help="ATTR_s, other than ATTR_LOD"
+    )
+    thresholds_group.add_argument(
+        "--max-anim-depth", type=int, help="How deeply ANIM_begin blocks nest"
+    )
+    thresholds_group.add_argument(
+        "--max-lights", type=int, help="LIGHTS vertices and LIGHT_* lines"
+    )
+    thresholds_group.add_argument(
+        "--min-vertex-reuse",
+        type=float,
+        help="Indices drawn / different vertices they use",
+    )
+    thresholds_group.add_argument(
+        "--fail-on-lod-gaps",
+        action="store_true",
+        help="Fail if there's a distance between LODs no LOD covers",
+    )
+    return parser
+
+
+def main(argv=None) -> int:
+    """
+    Return is exit code, 0 for good, 1 if a threshold was exceeded,
+    2 if an OBJ couldn't be read
+    """
+    if argv is None:
+        argv = _make_argparse().parse_args(sys.argv[1:])
+
+    timer_start = time.perf_counter()
+    thresholds = xplane_obj_analyzer.Thresholds(
+        max_batches=argv.max_batches,
+        max_state_changes=argv.max_state_changes,
+        max_anim_depth=argv.max_anim_depth,
+        max_lights=argv.max_lights,
+        min_vertex_reuse=argv.min_vertex_reuse,
+    )
+
+    filepaths = []
+    for pattern in argv.objs:
+        # Shells on Windows don't expand globs
+        filepaths.extend(sorted(glob.glob(pattern, recursive=True)) or [pattern])
+
+    reports = {}  # type: Dict[str, Any]
+    num_failed = 0
+    num_unreadable = 0
+    for filepath in filepaths:
+        try:
+            cost = xplane_obj_analyzer.analyze_file(filepath)
+        except (OSError, ValueError) as e:
+            print(f"ERROR: {filepath}: {e}")
+            num_unreadable += 1
+            continue
+
+        failures = cost.check(thresholds)
+        if argv.fail_on_lod_gaps:
+            failures += [
+                f"No LOD covers {near:g}-{far:g}" for near, far in cost.lod_gaps
+            ]
+        reports[filepath] = dict(cost.to_dict(), failures=failures)
+
+        if not argv.quiet:
+            print(f"{filepath}:")
+            for line in cost.report(argv.top):
+                print(f"  {line}")
+        for failure in failures:
+            print(f"FAILED: {filepath}: {failure}")
+        num_failed += bool(failures)
+
+    if argv.json:
+        with open(argv.json, "w") as json_file:
+            json.dump(reports, json_file, indent=1)
+
+    print(
+        f"FINAL RESULTS: {len(filepaths)} OBJs, {num_failed} over a threshold,"
+        f" {num_unreadable} unreadable,"
+        f" in {time.perf_counter() - timer_start:.4f} seconds"
+    )
+    if num_unreadable:
+        return 2
+    return 1 if num_failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+# Times exporting synthetic scenes (many meshes, big meshes, deep animated armatures,
+# thousands of lights, LOD buckets) and compares them to the baselines recorded in
+# tests/benchmarks/baselines, for catching changes that make exporting slower.
+# Like the test script, --blender lets you specify an executable, and it injects the
+# code via the --addons flag, e.g.
+#
+# python3 benchmarks.py --blender /Applications/Blender.app/Contents/MacOS/Blender
+#
+# The scenes are defined in tests/benchmarks/export_benchmarks.py. The baselines are
+# committed, each with the machine and Blender version it was recorded on, and a run on
+# a different one is warned about since its times may not be comparable. After a
+# deliberate change in speed, or on a new reference machine, record new baselines with
+# --save-baselines and commit them. A benchmark without a baseline is only reported,
+# unless --require-baselines makes it fail.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import blender_env
+
+BENCHMARKS_FOLDER = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), "tests", "benchmarks"
+)
+BASELINES_FOLDER = os.path.join(BENCHMARKS_FOLDER, "baselines")
+
+
+def _make_argparse():
+    parser = argparse.ArgumentParser(
+        description="Runs the XPlane2Blender export benchmarks"
+    )
+    benchmark_selection = parser.add_argument_group("Benchmark Selection And Control")
+    benchmark_selection.add_argument(
+        "-f", "--filter", help="Filter benchmarks with a regular expression", type=str
+    )  # [regex]
+    benchmark_selection.add_argument(
+        "-r",
+        "--repeat",
+        default=5,
+        type=int,
+        help="How many times to export each benchmark, the median is compared",
+    )
+    benchmark_selection.add_argument(
+        "-t",
+        "--threshold",
+        default=0.15,
+        type=float,
+        help="How much slower than its baseline (0.15 is 15%%) a phase can be"
+        " before it is a regression",
+    )
+    benchmark_selection.add_argument(
+        "--min-ms",
+        default=2.0,
+        type=float,
+        help="Phases slower by fewer milliseconds than this are never regressions,"
+        " they're noise",
+    )
+    benchmark_selection.add_argument(
+        "--require-baselines",
+        default=False,
+        help="Fail if a benchmark run has no baseline,"
+        " or one for different parameters",
+        action="store_true",
+    )
+
+    output_control = parser.add_argument_group("Output Control")
+    output_control.add_argument(
+        "--save-baselines",
+        default=False,
+        help="Replace the baselines of the benchmarks run with these results",
+        action="store_true",
+    )
+    output_control.add_argument(
+        "--results",
+        type=str,
+        help="Also write the raw results as JSON here",
+    )
+    output_control.add_argument(
+        "-q",
+        "--quiet",
+        default=False,
+        help="Only print regressions and a line per benchmark",
+        action="store_true",
+    )
+
+    blender_options = parser.add_argument_group("Blender Options")
+    blender_options.add_argument(
+        "--blender",
+        default="blender",  # Use the blender in the system path
+        type=str,
+        help="Provide alternative path to Blender executable",
+    )
+    blender_options.add_argument(
+        "-n",
+        "--no-factory-startup",
+        help="Run Blender with current prefs rather than factory prefs",
+        action="store_true",
+    )
+    return parser
+
+
+def summarize(times: List[float]) -> Dict[str, float]:
+    """The median, min, and max of a phase's times in each repetition"""
+    return {
+        "median": round(statistics.median(times), 3),
+        "min": round(min(times), 3),
+        "max": round(max(times), 3),
+    }
+
+
+def baseline_filepath(name: str) -> str:
+    return os.path.join(BASELINES_FOLDER, f"{name}.json")
+
+
+def load_baseline(name: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(baseline_filepath(name)) as baseline_file:
+            return json.load(baseline_file)
+    except (OSError, ValueError):
+        return None
+
+
+def save_baseline(
+    name: str, benchmark: Dict[str, Any], machine: Dict[str, str], repeat: int
+) -> None:
+    os.makedirs(BASELINES_FOLDER, exist_ok=True)
+    with open(baseline_filepath(name), "w") as baseline_file:
+        json.dump(
+            {
+                "machine": machine,
+                "repeat": repeat,
+                "params": benchmark["params"],
+                "phases": {
+                    phase: summarize(times)
+                    for phase, times in sorted(benchmark["phases"].items())
+                },
+            },
+            baseline_file,
+            indent=1,
+        )
+        baseline_file.write("\n")
+
+
+def find_regressions(
+    benchmark: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float,
+    min_ms: float,
+) -> List[str]:
+    """
+    Returns a line for every phase whose median time is more than threshold
+    (a fraction) and min_ms slower than its baseline's
+    """
+    regressions = []
+    for phase, times in sorted(benchmark["phases"].items()):
+        try:
+            baseline_median = baseline["phases"][phase]["median"]
+        except KeyError:
+            continue
+        median = statistics.median(times)
+        slower = median - baseline_median
+        if slower > min_ms and slower > baseline_median * threshold:
+            regressions.append(
+                f"{phase}: {median:.2f} ms, was {baseline_median:.2f} ms"
+                f" ({100 * slower / max(baseline_median, 1e-9):+.0f}%)"
+            )
+    return regressions
+
+
+def run_benchmarks(argv: argparse.Namespace, results_filepath: str) -> int:
+    """Runs the benchmarks in a background Blender, returns its exit code"""
+    blender_args = [
+        argv.blender,
+        "--addons",
+        "io_xplane2blender",
+        "--factory-startup",
+        "-noaudio",
+        "-b",
+        "--python-exit-code",
+        "1",
+        "--python",
+        os.path.join(BENCHMARKS_FOLDER, "export_benchmarks.py"),
+        "--",
+        "--repeat",
+        str(argv.repeat),
+        "--results",
+        results_filepath,
+    ]
+    if argv.filter:
+        blender_args.extend(["--filter", argv.filter])
+    if argv.no_factory_startup:
+        blender_args.remove("--factory-startup")
+
+    completed = subprocess.run(
+        blender_args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        universal_newlines=True,
+        env=blender_env.make_blender_env(),
+    )
+    if not argv.quiet or completed.returncode:
+        print(completed.stdout)
+    return completed.returncode
+
+
+def main(argv=None) -> int:
+    """
+    Return is exit code, 0 for good, anything else is an error
+    """
+    if argv is None:
+        argv = _make_argparse().parse_args(sys.argv[1:])
+
+    timer_start = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="xplane2blender_benchmarks_") as tmp_dir:
+        results_filepath = os.path.join(tmp_dir, "results.json")
+        if run_benchmarks(argv, results_filepath):
+            print("Blender did not finish running the benchmarks")
+            return 1
+        with open(results_filepath) as results_file:
+            results = json.load(results_file)
+
+    if argv.results:
+        with open(argv.results, "w") as results_file:
+            json.dump(results, results_file, indent=1)
+
+    exit_code = 0
+    num_regressed = num_no_baseline = 0
+    for name, benchmark in results["benchmarks"].items():
+        export = summarize(benchmark["phases"]["export"])
+        print(
+            f"{name}: export median {export['median']:.2f} ms"
+            f" (min {export['min']:.2f}, max {export['max']:.2f})"
+        )
+        if benchmark["errors"]:
+            print("    ERROR: The export had errors, the scene is wrong:")
+            for error in benchmark["errors"]:
+                print(f"        {error}")
+            exit_code = 1
+            continue
+
+        if not argv.quiet:
+            for phase, times in sorted(
+                benchmark["phases"].items(),
+                key=lambda item: -statistics.median(item[1]),
+            ):
+                print(f"    {phase:<40} {statistics.median(times):>10.2f} ms")
+
+        if argv.save_baselines:
+            save_baseline(name, benchmark, results["machine"], results["repeat"])
+            print(f"    Saved baseline {baseline_filepath(name)}")
+            continue
+
+        baseline = load_baseline(name)
+        if baseline is None:
+            print("    No baseline, record one with --save-baselines")
+            num_no_baseline += 1
+            continue
+        if baseline["params"] != benchmark["params"]:
+            print("    Baseline is for different parameters, record it again")
+            num_no_baseline += 1
+            continue
+        if baseline["machine"] != results["machine"]:
+            print(
+                "    WARNING: Baseline was recorded on a different machine"
+                f" ({baseline['machine']}), times may not be comparable"
+            )
+
+        regressions = find_regressions(benchmark, baseline, argv.threshold, argv.min_ms)
+        if regressions:
+            num_regressed += 1
+            exit_code = 1
+            for regression in regressions:
+                print(f"    REGRESSION: {regression}")
+
+    print(
+        f"FINAL RESULTS: {len(results['benchmarks'])} benchmarks,"
+        f" {num_regressed} regressed, {num_no_baseline} without a baseline."
+        f" Finished in {time.perf_counter() - timer_start:.4f} seconds"
+    )
+    if num_no_baseline and argv.require_baselines:
+        print("ERROR: --require-baselines, but some benchmarks have no baseline")
+        return 1
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
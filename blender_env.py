@@ -0,0 +1,18 @@
+# The environment tests.py, benchmarks.py, export.py, and run.py launch Blender
+# with, so "--addons io_xplane2blender" loads the addon out of this GIT repo
+
+import os
+from typing import Dict
+
+REPO_FOLDER = os.path.dirname(os.path.realpath(__file__))
+
+
+def make_blender_env(**extra_vars: str) -> Dict[str, str]:
+    """
+    Returns this process's environment variables with Blender's user scripts
+    folder set to this repo, and extra_vars added
+    """
+    # Environment variables - in order for --addons to work, we need to have OUR folder
+    # exist, and we need to have "addons/modules" simlink BACK to us to create the illusion
+    # of the directory structure Blender expects.
+    return dict(os.environ, BLENDER_USER_SCRIPTS=REPO_FOLDER, **extra_vars)
@@ -0,0 +1,393 @@
+# Exports every root of many .blend files without opening Blender's UI, for building
+# aircraft and scenery packages in CI. Like the test script, --blender lets you specify
+# an executable, and it injects the code via the --addons flag, e.g.
+#
+# python3 export.py --blender /Applications/Blender.app/Contents/MacOS/Blender "scenery/**/*.blend"
+#
+# Every root is exported relative to its .blend, exactly like the "Export OBJs" button.
+# A .blend is skipped if it hasn't changed since the last successful build (see --state),
+# and a JSON report of every .blend (timings, OBJs, log messages) is written to --report.
+
+import argparse
+import ast
+import concurrent.futures
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import blender_env
+
+ADDON_FOLDER = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), "io_xplane2blender"
+)
+
+# Bump when the state file's contents change, old ones will be ignored
+_STATE_VERSION = 1
+
+
+def _make_argparse():
+    parser = argparse.ArgumentParser(
+        description="Exports every root of many .blend files in the background"
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help=".blend files, globs of them ('**' is recursive), or project .json files."
+        ' A project file is {"blend_files": [globs relative to it]}',
+    )
+
+    export_control = parser.add_argument_group("Export Control")
+    export_control.add_argument(
+        "-j",
+        "--jobs",
+        default=1,
+        type=int,
+        help="How many .blend files to export at once",
+    )
+    export_control.add_argument(
+        "--export-jobs",
+        default=1,
+        type=int,
+        help="Background Blenders each .blend's roots are exported with",
+    )
+    export_control.add_argument(
+        "--incremental",
+        default=False,
+        help="Within a .blend, skip roots that haven't changed since they were last exported",
+        action="store_true",
+    )
+    export_control.add_argument(
+        "--force",
+        default=False,
+        help="Export every .blend, even unchanged ones",
+        action="store_true",
+    )
+
+    output_control = parser.add_argument_group("Output Control")
+    output_control.add_argument(
+        "--report",
+        default="xplane2blender_export_report.json",
+        type=str,
+        help="Where to write the JSON report",
+    )
+    output_control.add_argument(
+        "--state",
+        default="xplane2blender_export_state.json",
+        type=str,
+        help="Where to remember what was exported, for skipping unchanged .blend files",
+    )
+    output_control.add_argument(
+        "-q",
+        "--quiet",
+        default=False,
+        help="Only print a line per .blend file",
+        action="store_true",
+    )
+
+    blender_options = parser.add_argument_group("Blender Options")
+    blender_options.add_argument(
+        "--blender",
+        default="blender",  # Use the blender in the system path
+        type=str,
+        help="Provide alternative path to Blender executable",
+    )
+    blender_options.add_argument(
+        "-n",
+        "--no-factory-startup",
+        help="Run Blender with current prefs rather than factory prefs",
+        action="store_true",
+    )
+    return parser
+
+
+def get_addon_version() -> str:
+    """The version in io_xplane2blender's bl_info, read without importing bpy"""
+    with open(os.path.join(ADDON_FOLDER, "__init__.py")) as init_file:
+        for node in ast.parse(init_file.read()).body:
+            if isinstance(node, ast.Assign) and any(
+                getattr(target, "id", None) == "bl_info" for target in node.targets
+            ):
+                return ".".join(map(str, ast.literal_eval(node.value)["version"]))
+    return "unknown"
+
+
+def find_blend_files(inputs: List[str]) -> List[str]:
+    """
+    Returns the absolute paths of every .blend file matched by inputs,
+    in the order given, without duplicates
+    """
+    blend_files = []  # type: List[str]
+    for input_path in inputs:
+        if input_path.endswith(".json"):
+            with open(input_path) as project_file:
+                patterns = [
+                    os.path.join(os.path.dirname(os.path.abspath(input_path)), pattern)
+                    for pattern in json.load(project_file)["blend_files"]
+                ]
+        else:
+            patterns = [input_path]
+
+        for pattern in patterns:
+            matches = sorted(glob.glob(pattern, recursive=True))
+            if not matches:
+                print(f"WARNING: {pattern} matches no .blend files")
+            blend_files.extend(
+                os.path.abspath(match) for match in matches if match.endswith(".blend")
+            )
+    return list(dict.fromkeys(blend_files))
+
+
+def fingerprint_blend_file(blend_file: str, addon_version: str) -> str:
+    hasher = hashlib.sha1(addon_version.encode("utf-8"))
+    with open(blend_file, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def load_state(state_filepath: str) -> Dict[str, Dict[str, Any]]:
+    """The .blend files exported by the last builds, by absolute path"""
+    try:
+        with open(state_filepath) as state_file:
+            state = json.load(state_file)
+        if state.get("version") == _STATE_VERSION:
+            return state["blend_files"]
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+    return {}
+
+
+def save_state(state_filepath: str, blend_files: Dict[str, Dict[str, Any]]) -> None:
+    tmp_filepath = state_filepath + ".tmp"
+    with open(tmp_filepath, "w") as state_file:
+        json.dump(
+            {"version": _STATE_VERSION, "blend_files": blend_files},
+            state_file,
+            indent=1,
+            sort_keys=True,
+        )
+    os.replace(tmp_filepath, state_filepath)
+
+
+def is_unchanged(
+    blend_file: str, previous: Optional[Dict[str, Any]], addon_version: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Returns blend_file's updated state entry if it was exported with the same contents,
+    addon version and its OBJs still exist, otherwise None.
+    The contents are only hashed if the modification time or size changed
+    """
+    if not previous or not all(
+        os.path.isfile(obj_filepath) for obj_filepath in previous["obj_filepaths"]
+    ):
+        return None
+
+    stat = os.stat(blend_file)
+    if (stat.st_mtime_ns, stat.st_size) == (previous["mtime_ns"], previous["size"]):
+        if previous["addon_version"] == addon_version:
+            return previous
+        return None
+    elif fingerprint_blend_file(blend_file, addon_version) == previous["fingerprint"]:
+        # Touched, but not changed
+        return dict(previous, mtime_ns=stat.st_mtime_ns)
+    return None
+
+
+def get_obj_sizes(obj_filepaths: List[str]) -> List[Dict[str, Any]]:
+    return [
+        {"path": obj_filepath, "size": os.path.getsize(obj_filepath)}
+        for obj_filepath in obj_filepaths
+        if os.path.isfile(obj_filepath)
+    ]
+
+
+def export_blend_file(
+    argv: argparse.Namespace, blend_file: str, addon_version: str
+) -> Dict[str, Any]:
+    """Exports every root of a .blend file in a background Blender, returns its report"""
+    stat = os.stat(blend_file)
+    fingerprint = fingerprint_blend_file(blend_file, addon_version)
+    start = time.perf_counter()
+
+    with tempfile.TemporaryDirectory(prefix="xplane2blender_export_") as jobs_dir:
+        job_filepath = os.path.join(jobs_dir, "job.json")
+        result_filepath = os.path.join(jobs_dir, "result.json")
+        with open(job_filepath, "w") as job_file:
+            json.dump(
+                {
+                    "filepath": "",
+                    "export_is_relative": True,
+                    "incremental": argv.incremental,
+                    "jobs": argv.export_jobs,
+                    "report": result_filepath,
+                },
+                job_file,
+            )
+
+        blender_args = [
+            argv.blender,
+            "--addons",
+            "io_xplane2blender",
+            "--factory-startup",
+            "-noaudio",
+            "-b",
+            blend_file,
+            "--python-exit-code",
+            "1",
+            "--python-expr",
+            "import sys; from io_xplane2blender.xplane_export import export_from_job_file;"
+            " export_from_job_file(sys.argv[sys.argv.index('--') + 1])",
+            "--",
+            job_filepath,
+        ]
+        if argv.no_factory_startup:
+            blender_args.remove("--factory-startup")
+
+        completed = subprocess.run(
+            blender_args,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True,
+            env=blender_env.make_blender_env(),
+        )
+
+        try:
+            with open(result_filepath) as result_file:
+                result = json.load(result_file)
+        except (OSError, ValueError):
+            result = None
+
+    report = {
+        "blend_file": blend_file,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "fingerprint": fingerprint,
+        "addon_version": addon_version,
+        "seconds": round(time.perf_counter() - start, 3),
+        "exit_code": completed.returncode,
+    }
+    if result is None:
+        report.update(
+            status="failed",
+            objs=[],
+            obj_filepaths=[],
+            messages=[{"type": "error", "message": "Blender did not finish exporting"}],
+            output=completed.stdout,
+        )
+        return report
+
+    report.update(
+        status="exported" if result["status"] == "FINISHED" else "failed",
+        num_exported=result["num_exported"],
+        num_skipped=result["num_skipped"],
+        obj_filepaths=result["obj_filepaths"],
+        objs=get_obj_sizes(result["obj_filepaths"]),
+        messages=[
+            {"type": message_type, "message": message}
+            for message_type, message in result["messages"]
+        ],
+    )
+    if report["status"] == "failed":
+        report["output"] = completed.stdout
+    return report
+
+
+def main(argv=None) -> int:
+    """
+    Return is exit code, 0 for good, anything else is an error
+    """
+    if argv is None:
+        argv = _make_argparse().parse_args(sys.argv[1:])
+
+    timer_start = time.perf_counter()
+    addon_version = get_addon_version()
+    blend_files = find_blend_files(argv.inputs)
+    state = load_state(argv.state)
+
+    reports = {}  # type: Dict[str, Dict[str, Any]]
+    to_export = []  # type: List[str]
+    for blend_file in blend_files:
+        unchanged = (
+            None
+            if argv.force
+            else is_unchanged(blend_file, state.get(blend_file), addon_version)
+        )
+        if unchanged:
+            state[blend_file] = unchanged
+            reports[blend_file] = dict(
+                unchanged,
+                blend_file=blend_file,
+                status="skipped",
+                seconds=0,
+                objs=get_obj_sizes(unchanged["obj_filepaths"]),
+                messages=[],
+            )
+            print(f"{blend_file} unchanged, skipped")
+        else:
+            to_export.append(blend_file)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, argv.jobs)) as pool:
+        futures = {
+            pool.submit(export_blend_file, argv, blend_file, addon_version): blend_file
+            for blend_file in to_export
+        }
+        for future in concurrent.futures.as_completed(futures):
+            report = future.result()
+            blend_file = report["blend_file"]
+            reports[blend_file] = report
+            print(f"{blend_file} {report['status']} in {report['seconds']:.2f} seconds")
+            if not argv.quiet:
+                for message in report["messages"]:
+                    if message["type"] in {"error", "warning"}:
+                        print(f"    {message['type'].upper()}: {message['message']}")
+
+            if report["status"] == "exported":
+                state[blend_file] = {
+                    key: report[key]
+                    for key in (
+                        "mtime_ns",
+                        "size",
+                        "fingerprint",
+                        "addon_version",
+                        "obj_filepaths",
+                    )
+                }
+            else:
+                state.pop(blend_file, None)
+
+    save_state(argv.state, state)
+
+    ordered_reports = [reports[blend_file] for blend_file in blend_files]
+    summary = {
+        status: sum(report["status"] == status for report in ordered_reports)
+        for status in ("exported", "skipped", "failed")
+    }
+    with open(argv.report, "w") as report_file:
+        json.dump(
+            {
+                "addon_version": addon_version,
+                "seconds": round(time.perf_counter() - timer_start, 3),
+                "summary": summary,
+                "blend_files": ordered_reports,
+            },
+            report_file,
+            indent=1,
+        )
+
+    print(
+        "FINAL RESULTS: {exported} exported, {skipped} skipped, {failed} failed."
+        " Finished in {total_seconds:.4f} seconds".format(
+            **summary, total_seconds=time.perf_counter() - timer_start
+        )
+    )
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
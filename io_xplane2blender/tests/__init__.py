@@ -12,6 +12,7 @@ from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import bpy
+import numpy
 
 import io_xplane2blender
 from io_xplane2blender import xplane_config, xplane_helpers
@@ -28,6 +29,9 @@ from io_xplane2blender.xplane_types import (
 
 FLOAT_TOLERANCE = 0.0001
 
+# The tables assertFilesEqual compares as arrays
+_TABLE_DIRECTIVES = {"VT", "VLINE", "VLIGHT", "IDX", "IDX10"}
+
 __dirname__ = os.path.dirname(__file__)
 
 FilterLinesCallback = Callable[[List[Union[float, str]]], bool]
@@ -286,40 +290,55 @@ class XPlaneTestCase(unittest.TestCase):
 
         return lines
 
-    def assertFilesEqual(
+    def _mismatchContext(
         self,
-        a: str,
-        b: str,
-        filterCallback: Union[FilterLinesCallback, List[str]],
+        source: List[Tuple[Union[float, str]]],
+        lineIndex: int,
+        linePos: int,
+        segment: Union[float, str],
+    ) -> str:
+        """
+        Makes something like
+        479: ATTR_ 1.0
+        480> ATTR_ -0.45643 1.0 sim/test1
+        ?          ^~~~~~~~
+        481: ATTR_ 0.0
+        """
+        current_line = f"{lineIndex}> {' '.join(map(str, source[lineIndex]))}"
+        question_line = (
+            "?"
+            + " " * (len(str(lineIndex)) + 3)
+            + "^".rjust(len(" ".join(map(str, source[lineIndex][:linePos]))), " ")
+            + "~" * (len(str(segment)) - 1)
+        )
+
+        return "\n".join(
+            (
+                f"{lineIndex - 1}: {' '.join(map(str, source[lineIndex-1]))}"
+                if lineIndex > 0
+                else "",
+                current_line,
+                question_line,
+                f"{lineIndex + 1}: {' '.join(map(str, source[lineIndex+1]))}"
+                if lineIndex + 1 < len(source)
+                else "",
+            )
+        )
+
+    def assertParsedLinesEqual(
+        self,
+        linesA: List[Tuple[Union[float, str]]],
+        linesB: List[Tuple[Union[float, str]]],
         floatTolerance: float = FLOAT_TOLERANCE,
-    ):
+    ) -> None:
         """
-        a and b should be the contents of files a and b as returned
-        from open(file).read()
+        Compares lines parsed with parseFileToLines one by one,
+        numbers within floatTolerance
         """
 
         def isnumber(d):
             return isinstance(d, (float, int))
 
-        linesA = self.parseFileToLines(a)
-        linesB = self.parseFileToLines(b)
-
-        # if a filter function is provided, additionally filter lines with it
-        if isinstance(filterCallback, collections.abc.Collection):
-            linesA = [
-                line
-                for line in linesA
-                if any(directive in line[0] for directive in filterCallback)
-            ]
-            linesB = [
-                line
-                for line in linesB
-                if any(directive in line[0] for directive in filterCallback)
-            ]
-        else:
-            linesA = list(filter(filterCallback, linesA))
-            linesB = list(filter(filterCallback, linesB))
-
         # ensure same number of lines
         try:
             self.assertEquals(len(linesA), len(linesB))
@@ -369,49 +388,144 @@ class XPlaneTestCase(unittest.TestCase):
                     try:
                         self.assertFloatsEqual(segmentA, segmentB, floatTolerance)
                     except AssertionError as e:
-
-                        def make_context(source: List[str], segment: str) -> str:
-                            current_line = (
-                                f"{lineIndex}> {' '.join(map(str, source[lineIndex]))}"
-                            )
-                            # Makes something like
-                            # 480> ATTR_ -0.45643 1.0 sim/test1
-                            # ?          ^~~~~~~~
-                            # 480> ATTR_ -1.0 1.0 sim/test1
-                            # ?          ^~~~
-                            question_line = (
-                                "?"
-                                + " " * (len(str(lineIndex)) + 3)
-                                + "^".rjust(
-                                    len(" ".join(map(str, lineA[:linePos]))), " "
-                                )
-                                + "~" * (len(str(segment)) - 1)
-                            )
-
-                            return "\n".join(
-                                (
-                                    f"{lineIndex - 1}: {' '.join(map(str, source[lineIndex-1]))}"
-                                    if lineIndex > 0
-                                    else "",
-                                    current_line,
-                                    question_line,
-                                    f"{lineIndex + 1}: {' '.join(map(str, source[lineIndex+1]))}"
-                                    if lineIndex + 1 < len(source)
-                                    else "",
-                                )
-                            )
-
-                        context_lineA = make_context(linesA, segmentA)
-                        context_lineB = make_context(linesB, segmentB)
-
                         raise AssertionError(
                             e.args[0]
                             + "\n"
-                            + "\n\n".join((context_lineA, context_lineB))
+                            + "\n\n".join(
+                                (
+                                    self._mismatchContext(
+                                        linesA, lineIndex, linePos, segmentA
+                                    ),
+                                    self._mismatchContext(
+                                        linesB, lineIndex, linePos, segmentB
+                                    ),
+                                )
+                            )
                         ) from None
                 else:
                     self.assertEquals(segmentA, segmentB)
 
+    def _parseFileToBlocks(
+        self, data: str, filterCallback: Union[FilterLinesCallback, List[str]]
+    ) -> Optional[Tuple[List[Tuple[Union[float, str]]], Dict[str, numpy.ndarray]]]:
+        """
+        Like parseFileToLines then filtering, but the VT, VLINE, VLIGHT, IDX, and IDX10 tables
+        are each parsed into one array in one go, instead of line by line.
+
+        A table is kept or filtered out by its first line, like all the filter callbacks
+        in the tests, which only look at the directive. Returns the other lines and the
+        tables by directive, or None if a table is ragged or has something not a number
+        """
+
+        def passes(line: Tuple[Union[float, str]]) -> bool:
+            if isinstance(filterCallback, collections.abc.Collection):
+                return any(directive in line[0] for directive in filterCallback)
+            else:
+                return filterCallback(line)
+
+        lines = []  # type: List[str]
+        # directive: The rest of each of its lines
+        tables = collections.defaultdict(list)  # type: Dict[str, List[str]]
+        for line in filter(lambda l: len(l) > 0 and l[0] != "#", data.split("\n")):
+            if "#" in line:
+                line = line[0 : line.index("#")]
+            parts = line.split(None, 1)
+            if parts and parts[0] in _TABLE_DIRECTIVES:
+                tables[parts[0]].append(parts[1] if len(parts) > 1 else "")
+            elif parts:
+                lines.append(line)
+
+        parsed_lines = list(filter(passes, self.parseFileToLines("\n".join(lines))))
+        arrays = {}  # type: Dict[str, numpy.ndarray]
+        for directive, rests in tables.items():
+            if not passes(self.parseFileToLines(f"{directive} {rests[0]}")[0]):
+                continue
+            width = len(rests[0].split())
+            try:
+                values = numpy.array(" ".join(rests).split(), dtype=numpy.float64)
+            except ValueError:
+                return None
+            if directive not in {"IDX", "IDX10"}:
+                if width == 0 or len(values) != width * len(rests):
+                    return None
+                values = values.reshape(len(rests), width)
+            arrays[directive] = values
+        return parsed_lines, arrays
+
+    def assertFilesEqual(
+        self,
+        a: str,
+        b: str,
+        filterCallback: Union[FilterLinesCallback, List[str]],
+        floatTolerance: float = FLOAT_TOLERANCE,
+    ):
+        """
+        a and b should be the contents of files a and b as returned
+        from open(file).read()
+
+        The VT, VLINE, VLIGHT, IDX, and IDX10 tables are compared as arrays,
+        everything else line by line with assertParsedLinesEqual
+        """
+        parsedA = self._parseFileToBlocks(a, filterCallback)
+        parsedB = self._parseFileToBlocks(b, filterCallback)
+        if parsedA is None or parsedB is None:
+            # Something unusual, the slow way can tell what
+            linesA = self.parseFileToLines(a)
+            linesB = self.parseFileToLines(b)
+
+            # if a filter function is provided, additionally filter lines with it
+            if isinstance(filterCallback, collections.abc.Collection):
+                linesA = [
+                    line
+                    for line in linesA
+                    if any(directive in line[0] for directive in filterCallback)
+                ]
+                linesB = [
+                    line
+                    for line in linesB
+                    if any(directive in line[0] for directive in filterCallback)
+                ]
+            else:
+                linesA = list(filter(filterCallback, linesA))
+                linesB = list(filter(filterCallback, linesB))
+            return self.assertParsedLinesEqual(linesA, linesB, floatTolerance)
+
+        (linesA, tablesA), (linesB, tablesB) = parsedA, parsedB
+        for directive in sorted(set(tablesA) | set(tablesB)):
+            tableA = tablesA.get(directive, numpy.empty(0))
+            tableB = tablesB.get(directive, numpy.empty(0))
+            if tableA.shape != tableB.shape:
+                raise AssertionError(
+                    f"{directive} tables unequal: {tableA.shape} != {tableB.shape}"
+                )
+
+            mismatches = numpy.argwhere(~(numpy.abs(tableA - tableB) < floatTolerance))
+            if len(mismatches):
+                row, column = (
+                    mismatches[0] if tableA.ndim == 2 else (mismatches[0][0], 0)
+                )
+
+                def as_lines(table: numpy.ndarray) -> List[Tuple[Union[float, str]]]:
+                    return [
+                        (directive, *map(float, numpy.atleast_1d(r))) for r in table
+                    ]
+
+                # Numbered by row in the table
+                contextA, contextB = as_lines(tableA), as_lines(tableB)
+                segmentA, segmentB = contextA[row][column + 1], contextB[row][column + 1]
+                raise AssertionError(
+                    f"{segmentA} != {segmentB}, within a tolerance of {floatTolerance}"
+                    f" (row {row} of the {directive} table)\n"
+                    + "\n\n".join(
+                        (
+                            self._mismatchContext(contextA, row, column + 1, segmentA),
+                            self._mismatchContext(contextB, row, column + 1, segmentB),
+                        )
+                    )
+                )
+
+        self.assertParsedLinesEqual(linesA, linesB, floatTolerance)
+
     def assertFileOutputEqualsFixture(
         self,
         fileOutput: str,
@@ -454,7 +568,7 @@ class XPlaneTestCase(unittest.TestCase):
         of all messages
         """
         try:
-            found_errors = len(logger.findErrors())
+            found_errors = logger.countErrors()
             self.assertEqual(found_errors, expected_logger_errors)
         except AssertionError as e:
             raise AssertionError(
@@ -646,6 +760,7 @@ class XPlaneTestCase(unittest.TestCase):
             )
         out = xp_file.write()
         xplane_file._all_keyframe_infos.clear()
+        xplane_helpers.clear_resolved_paths()
 
         if dest:
             with open(get_tmp_folder()/Path(dest).with_suffix(".obj"), "w") as tmp_file:
@@ -659,6 +774,7 @@ class XPlaneTestCase(unittest.TestCase):
         Returns the content of the log file after export as a collection of lines, no trailing new lines,
         or KeyError if the text block doesn't exist yet (rare).
         """
+        logger.flush()
         return [l.body for l in bpy.data.texts["XPlane2Blender.log"].lines]
 
 
@@ -737,13 +853,22 @@ def get_tests_folder() -> pathlib.Path:
 
 
 def get_tmp_folder() -> pathlib.Path:
-    return os.path.realpath(os.path.join(__dirname__, "../../tests/tmp"))
+    # tests.py --jobs gives each worker its own, so tests running at once don't collide
+    return os.path.realpath(
+        os.environ.get(
+            "XPLANE2BLENDER_TMP_FOLDER", os.path.join(__dirname__, "../../tests/tmp")
+        )
+    )
 
 
 def make_fixture_path(dirname, filename, sub_dir=""):
     return os.path.join(dirname, "fixtures", sub_dir, filename + ".obj")
 
 
+# Called with each run's unittest.TestResult, see test_worker
+result_listeners = []  # type: List[Callable[[unittest.TestResult], None]]
+
+
 def runTestCases(testCases):
     # Until a better solution for knowing if the logger's error count should be used to quit the testing,
     # we are currently saying only 1 is allow per suite at a time (which is likely how it should be anyways)
@@ -758,3 +883,5 @@ def runTestCases(testCases):
     print(
         f"RESULT: After {(test_result.testsRun)} tests got {len(test_result.errors)} errors, {len(test_result.failures)} failures, and {len(test_result.skipped)} skipped"
     )
+    for listener in result_listeners:
+        listener(test_result)
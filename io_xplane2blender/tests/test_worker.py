@@ -0,0 +1,100 @@
+"""
+Runs many test files in one background Blender, one after another, so Blender
+starts and registers the addon once instead of once per file. Started by
+tests.py --persistent, see it for how to use this.
+
+Test file paths are read from stdin, one per line. After each file's output, a
+line starting with RESULT_MARKER is printed with its results as JSON. An empty
+line (or the end of stdin) quits.
+"""
+
+import json
+import os
+import runpy
+import sys
+import traceback
+import unittest
+from typing import Any, Dict, List
+
+import bpy
+
+from io_xplane2blender import tests, xplane_helpers
+from io_xplane2blender.xplane_config import setDebug
+from io_xplane2blender.xplane_types import xplane_file
+from io_xplane2blender.xplane_utils.xplane_profiler import profiler
+
+# Must be kept in sync with tests.py
+RESULT_MARKER = "XPLANE2BLENDER_WORKER_RESULT: "
+
+
+def reset_state(blend_file: str) -> None:
+    """
+    Makes things as if Blender was just started for the test file,
+    which uses blend_file if it exists
+    """
+    if os.path.exists(blend_file):
+        bpy.ops.wm.open_mainfile(filepath=blend_file)
+    else:
+        # Factory startup or not, like Blender was started
+        bpy.ops.wm.read_homefile()
+
+    xplane_file._all_keyframe_infos.clear()
+    xplane_helpers.clear_resolved_paths()
+    xplane_helpers.logger.clear()
+    profiler.stop()
+    setDebug(False)
+
+
+def _result_to_dict(test_result: unittest.TestResult) -> Dict[str, Any]:
+    return {
+        "testsRun": test_result.testsRun,
+        "errors": len(test_result.errors),
+        "failures": len(test_result.failures),
+        "skipped": len(test_result.skipped),
+        "failed": [str(test) for test, _ in test_result.errors + test_result.failures],
+    }
+
+
+def run_test_file(test_file: str) -> Dict[str, Any]:
+    """
+    Runs test_file like Blender's --python would, returns its results.
+    A test file that raises or never runs its tests has one error
+    """
+    test_results = []  # type: List[unittest.TestResult]
+    tests.result_listeners.append(test_results.append)
+    cwd = os.getcwd()
+    try:
+        reset_state(test_file.replace(".py", ".blend"))
+        runpy.run_path(test_file, run_name="__main__")
+    except (Exception, SystemExit):
+        traceback.print_exc()
+        test_results.clear()
+    finally:
+        tests.result_listeners.remove(test_results.append)
+        os.chdir(cwd)
+
+    if not test_results:
+        return {
+            "testsRun": 0,
+            "errors": 1,
+            "failures": 0,
+            "skipped": 0,
+            "failed": [test_file],
+        }
+
+    results = _result_to_dict(test_results[0])
+    for test_result in test_results[1:]:
+        for key, value in _result_to_dict(test_result).items():
+            results[key] += value
+    return results
+
+
+def main() -> None:
+    for line in sys.stdin:
+        test_file = line.strip()
+        if not test_file:
+            break
+        results = run_test_file(test_file)
+        # unittest writes to stderr, it must come before the results
+        sys.stderr.flush()
+        print(RESULT_MARKER + json.dumps(results), flush=True)
@@ -1,9 +1,13 @@
 """The starting point for the export process, the start of the addon"""
 
+import json
 import os
 import os.path
+import shutil
+import subprocess
 import sys
-from typing import IO, Any, Optional
+import tempfile
+from typing import IO, Any, List, Optional
 
 import bpy
 import mathutils
@@ -12,8 +16,14 @@ import io_xplane2blender
 from bpy_extras.io_utils import ExportHelper, ImportHelper
 
 from .xplane_config import getDebug
-from .xplane_helpers import XPlaneLogger, logger
+from .xplane_helpers import XPlaneLogger, is_exportable_root, logger
 from .xplane_types import xplane_file
+from .xplane_utils.xplane_export_manifest import (
+    ExportManifest,
+    fingerprint_xplane_file,
+)
+from .xplane_utils.xplane_memory_profiler import memory_profiler
+from .xplane_utils.xplane_profiler import profiler
 
 
 class XPLANE_MT_xplane_export_log(bpy.types.Menu):
@@ -28,10 +38,24 @@ class XPLANE_MT_xplane_export_log(bpy.types.Menu):
 
 
 def showLogDialog():
+    logger.flush()
     if not ("-b" in sys.argv or "--background" in sys.argv):
         bpy.ops.wm.call_menu(name="XPLANE_MT_xplane_export_log")
 
 
+def export_from_job_file(job_filepath: str) -> None:
+    """
+    The entry point of background Blenders started by a parallel export
+    or export.py, calls the export operator with the job file's arguments
+    """
+    with open(job_filepath) as job_file:
+        job = json.load(job_file)
+
+    # Whoever started us writes the log file
+    bpy.context.scene.xplane.log = False
+    bpy.ops.export.xplane_obj(**job)
+
+
 class EXPORT_OT_ExportXPlane(bpy.types.Operator, ExportHelper):
     """Export to X-Plane Object file format (.obj)"""
 
@@ -53,12 +77,47 @@ class EXPORT_OT_ExportXPlane(bpy.types.Operator, ExportHelper):
         default=False
     )
 
+    incremental: bpy.props.BoolProperty(
+        name="Incremental",
+        description="Skip roots that haven't changed since they were last exported incrementally",
+        default=False,
+    )
+
     export_is_relative: bpy.props.BoolProperty(
         name="Export Is Relative",
         description="Set to true when starting the export via the button (with or without the GUI on in case of unit testing)",
         default=False,
     )
 
+    jobs: bpy.props.IntProperty(
+        name="Jobs",
+        description="Background Blenders to export roots with, each exporting its share of the roots",
+        min=1,
+        max=64,
+        default=1,
+    )
+
+    only_roots: bpy.props.StringProperty(
+        name="Only Roots",
+        description="A JSON list of root keys (see xplane_file.get_root_key), if set only these roots will be exported",
+        default="",
+        options={"HIDDEN", "SKIP_SAVE"},
+    )
+
+    worker_result: bpy.props.StringProperty(
+        name="Worker Result",
+        description="Set by a parallel export for its workers. Where a worker writes its log messages and manifest changes",
+        default="",
+        options={"HIDDEN", "SKIP_SAVE"},
+    )
+
+    report: bpy.props.StringProperty(
+        name="Report",
+        description="Where to write a JSON report of the export: its log messages and the OBJs exported",
+        default="",
+        options={"HIDDEN", "SKIP_SAVE"},
+    )
+
     # Method: execute
     # Used from Blender when user invokes export.
     # Invokes the exporting.
@@ -66,6 +125,47 @@ class EXPORT_OT_ExportXPlane(bpy.types.Operator, ExportHelper):
     # Parameters:
     #   context - Blender context object.
     def execute(self, context):
+        self.manifest: Optional[ExportManifest] = None
+        self.num_exported = 0
+        self.num_skipped = 0
+        # Every OBJ this export is responsible for, skipped or written
+        self.obj_filepaths: List[str] = []
+        scene_xplane = bpy.context.scene.xplane
+        self.profile_time = (
+            scene_xplane.plugin_development and scene_xplane.dev_profile_export
+        )
+        if self.profile_time:
+            profiler.start()
+        if scene_xplane.plugin_development and scene_xplane.dev_profile_memory:
+            memory_profiler.start()
+        try:
+            result = self._export(context)
+        finally:
+            # Not every way out of _export ends logging
+            self._endProfiling()
+            logger.flush()
+        for result_filepath in filter(None, (self.worker_result, self.report)):
+            with open(result_filepath, "w") as result_file:
+                json.dump(
+                    {
+                        "status": next(iter(result)),
+                        "messages": [
+                            [message["type"], str(message["message"])]
+                            for message in logger.messages
+                        ],
+                        "obj_filepaths": self.obj_filepaths,
+                        "manifest_changes": self.manifest.changes
+                        if self.manifest
+                        else {},
+                        "num_exported": self.num_exported,
+                        "num_skipped": self.num_skipped,
+                    },
+                    result_file,
+                    indent=1,
+                )
+        return result
+
+    def _export(self, context):
         # prepare logging
         self._startLogging()
 
@@ -85,12 +185,32 @@ class EXPORT_OT_ExportXPlane(bpy.types.Operator, ExportHelper):
                 showLogDialog()
                 return {"CANCELLED"}
 
+        if self.incremental and not bpy.data.filepath:
+            logger.error("Save your blend file before exporting incrementally")
+            self._endLogging()
+            showLogDialog()
+            return {"CANCELLED"}
+        manifest = ExportManifest.for_current_blend() if self.incremental else None
+        self.manifest = manifest
+        root_keys = set(json.loads(self.only_roots)) if self.only_roots else None
+
         if (
             bpy.context.scene.xplane.plugin_development
             and bpy.context.scene.xplane.dev_enable_breakpoints
         ):
             breakpoint()
 
+        if self.jobs > 1 and not self.worker_result:
+            exportable_root_keys = [
+                xplane_file.get_root_key(root)
+                for root in xplane_file.get_potential_roots(
+                    bpy.context.scene, self.only_selected_roots, root_keys
+                )
+                if is_exportable_root(root, bpy.context.view_layer)
+            ]
+            if len(exportable_root_keys) > 1:
+                return self._exportInWorkers(exportable_root_keys, manifest)
+
         # store current frame as we will go back to it
         currentFrame = bpy.context.scene.frame_current
 
@@ -98,13 +218,19 @@ class EXPORT_OT_ExportXPlane(bpy.types.Operator, ExportHelper):
         bpy.context.scene.frame_set(frame=1)
         bpy.context.view_layer.update()
 
-        xplaneFiles = xplane_file.createFilesFromBlenderRootObjects(
-            bpy.context.scene, 
-            bpy.context.view_layer,
-            self.only_selected_roots            
-        )
+        with profiler.phase("createFilesFromBlenderRootObjects") as phase:
+            xplaneFiles = xplane_file.createFilesFromBlenderRootObjects(
+                bpy.context.scene, 
+                bpy.context.view_layer,
+                self.only_selected_roots,
+                root_keys,
+            )
+            phase.set(roots=len(xplaneFiles))
         for xplaneFile in xplaneFiles:
-            if not self._writeXPlaneFile(xplaneFile, export_directory):
+            with profiler.phase("_writeXPlaneFile", root=xplaneFile.filename):
+                written = self._writeXPlaneFile(xplaneFile, export_directory, manifest)
+            logger.flush()
+            if not written:
                 if logger.hasErrors():
                     self._endLogging()
                     showLogDialog()
@@ -125,6 +251,13 @@ class EXPORT_OT_ExportXPlane(bpy.types.Operator, ExportHelper):
         bpy.context.scene.frame_set(frame=currentFrame)
         bpy.context.view_layer.update()
 
+        if manifest and not self.worker_result:
+            manifest.save()
+            logger.success(
+                f"Incremental export: {self.num_exported} exported,"
+                f" {self.num_skipped} unchanged and skipped"
+            )
+
         # TODO: enable when log dialog box is working
         # if logger.hasErrors() or logger.hasWarnings():
         #     showLogDialog()
@@ -139,6 +272,129 @@ class EXPORT_OT_ExportXPlane(bpy.types.Operator, ExportHelper):
             self._endLogging()
             return {"CANCELLED"}
         elif not logger.hasErrors() and xplaneFiles:
+            if not self.worker_result:
+                logger.success("Export finished without errors")
+            self._endLogging()
+            return {"FINISHED"}
+
+    def _exportInWorkers(
+        self, root_keys: List[str], manifest: Optional[ExportManifest]
+    ) -> set:
+        """
+        Splits root_keys into self.jobs runs of consecutive roots, each exported
+        by a background Blender opening a copy of the current file. Their logs are
+        replayed in order and their manifest changes merged, as if exported here
+        """
+        if not bpy.data.filepath:
+            logger.error("Save your blend file before exporting with more than 1 job")
+            self._endLogging()
+            showLogDialog()
+            return {"CANCELLED"}
+
+        # Next to the original so '//' paths and relative exports mean the same thing
+        blend_dir, blend_name = os.path.split(bpy.data.filepath)
+        blend_copy = os.path.join(
+            blend_dir, f".{os.path.splitext(blend_name)[0]}_export_{os.getpid()}.blend"
+        )
+        bpy.ops.wm.save_as_mainfile(filepath=blend_copy, copy=True)
+        jobs_dir = tempfile.mkdtemp(prefix="xplane2blender_export_")
+
+        num_workers = min(self.jobs, len(root_keys))
+        worker_root_keys = [
+            root_keys[
+                i * len(root_keys) // num_workers : (i + 1) * len(root_keys) // num_workers
+            ]
+            for i in range(num_workers)
+        ]
+        addon_name = __name__.split(".")[0]
+        workers = []
+        try:
+            for i in range(num_workers):
+                job_filepath = os.path.join(jobs_dir, f"job_{i}.json")
+                with open(job_filepath, "w") as job_file:
+                    json.dump(
+                        {
+                            "filepath": self.filepath,
+                            "export_is_relative": self.export_is_relative,
+                            "incremental": self.incremental,
+                            "only_roots": json.dumps(worker_root_keys[i]),
+                            "worker_result": os.path.join(jobs_dir, f"result_{i}.json"),
+                        },
+                        job_file,
+                    )
+                log_file = open(os.path.join(jobs_dir, f"job_{i}.log"), "w")
+                workers.append(
+                    (
+                        subprocess.Popen(
+                            [
+                                bpy.app.binary_path,
+                                "-b",
+                                "-noaudio",
+                                "--addons",
+                                addon_name,
+                                blend_copy,
+                                "--python-exit-code",
+                                "1",
+                                "--python-expr",
+                                f"import sys; from {__name__} import export_from_job_file;"
+                                " export_from_job_file(sys.argv[sys.argv.index('--') + 1])",
+                                "--",
+                                job_filepath,
+                            ],
+                            stdout=log_file,
+                            stderr=subprocess.STDOUT,
+                        ),
+                        log_file,
+                    )
+                )
+
+            for worker, log_file in workers:
+                worker.wait()
+                log_file.close()
+
+            for i in range(num_workers):
+                try:
+                    with open(os.path.join(jobs_dir, f"result_{i}.json")) as result_file:
+                        result = json.load(result_file)
+                except (OSError, ValueError):
+                    with open(os.path.join(jobs_dir, f"job_{i}.log")) as log_file:
+                        print(log_file.read())
+                    logger.error(
+                        f"Export worker {i + 1} of {num_workers} failed, see the console"
+                    )
+                    continue
+
+                for message_type, message in result["messages"]:
+                    logger.log(message_type, message)
+                if manifest:
+                    manifest.apply_changes(result["manifest_changes"])
+                self.obj_filepaths.extend(result["obj_filepaths"])
+                self.num_exported += result["num_exported"]
+                self.num_skipped += result["num_skipped"]
+        finally:
+            for worker, log_file in workers:
+                if worker.poll() is None:
+                    worker.terminate()
+                    worker.wait()
+                log_file.close()
+            shutil.rmtree(jobs_dir, ignore_errors=True)
+            try:
+                os.remove(blend_copy)
+            except OSError:
+                pass
+
+        if manifest:
+            manifest.save()
+            logger.success(
+                f"Incremental export: {self.num_exported} exported,"
+                f" {self.num_skipped} unchanged and skipped"
+            )
+
+        if logger.hasErrors():
+            self._endLogging()
+            showLogDialog()
+            return {"CANCELLED"}
+        else:
             logger.success("Export finished without errors")
             self._endLogging()
             return {"FINISHED"}
@@ -156,6 +412,9 @@ class EXPORT_OT_ExportXPlane(bpy.types.Operator, ExportHelper):
         if debug:
             logLevels.append("info")
             logLevels.append("success")
+        elif self.incremental or profiler.enabled:
+            # For what was skipped, or the profile summary
+            logLevels.append("success")
 
         # always log to internal text file and console
         logger.addTransport(
@@ -174,15 +433,64 @@ class EXPORT_OT_ExportXPlane(bpy.types.Operator, ExportHelper):
                 logger.error("Cannot create log file if .blend file is not saved")
 
     def _endLogging(self):
+        self._endProfiling()
+        logger.flush()
         if self.logFile:
             self.logFile.close()
 
+    def _endProfiling(self):
+        """
+        If profiling, stops and writes the Chrome trace and memory report
+        next to the .blend (or the temp folder), and summaries to the log
+        """
+        if not profiler.enabled:
+            return
+        memory_profiling = memory_profiler.enabled
+        memory_profiler.stop()
+        profiler.stop()
+
+        def get_profile_filepath(name: str) -> str:
+            return os.path.join(
+                os.path.dirname(bpy.data.filepath) or tempfile.gettempdir(),
+                f"{name}_{os.getpid()}.json" if self.worker_result else f"{name}.json",
+            )
+
+        if self.profile_time:
+            trace_filepath = get_profile_filepath("xplane2blender_profile")
+            try:
+                profiler.write_chrome_trace(trace_filepath)
+            except OSError as e:
+                logger.warn(f"Could not write profile {trace_filepath}: {e}")
+            else:
+                logger.success(
+                    f"Wrote profile {trace_filepath}, open it in chrome://tracing or ui.perfetto.dev"
+                )
+            logger.success("Export profile:\n" + "\n".join(profiler.summary()))
+
+        if memory_profiling:
+            report_filepath = get_profile_filepath("xplane2blender_memory")
+            try:
+                memory_profiler.write_json(report_filepath)
+            except OSError as e:
+                logger.warn(f"Could not write memory report {report_filepath}: {e}")
+            else:
+                logger.success(f"Wrote memory report {report_filepath}")
+            logger.success(
+                "Export memory:\n" + "\n".join(memory_profiler.summary())
+            )
+
     def _writeXPlaneFile(
-        self, xplaneFile: xplane_file.XPlaneFile, directory: str
+        self,
+        xplaneFile: xplane_file.XPlaneFile,
+        directory: str,
+        manifest: Optional[ExportManifest] = None,
     ) -> bool:
         """
         Finally, at the end of it all, attempts to write an XPlaneFile.
         Returns False if there was a problem, else True
+
+        With a manifest, an XPlaneFile whose fingerprint hasn't changed since
+        its OBJ was written is skipped, before any meshes are evaluated
         """
         debug = getDebug()
 
@@ -214,9 +522,25 @@ class EXPORT_OT_ExportXPlane(bpy.types.Operator, ExportHelper):
         fullpath = os.path.abspath(
             os.path.join(os.path.dirname(bpy.context.blend_data.filepath), relpath)
         )
-        out = xplaneFile.write()
+
+        if manifest:
+            with profiler.phase("fingerprint_xplane_file"):
+                fingerprint = fingerprint_xplane_file(
+                    xplaneFile, bpy.context.view_layer
+                )
+            if manifest.is_unchanged(fullpath, fingerprint):
+                logger.info("Skipped unchanged %s" % fullpath)
+                self.obj_filepaths.append(fullpath)
+                self.num_skipped += 1
+                return True
+
+        with profiler.phase("XPlaneFile.write"):
+            out = xplaneFile.write()
+        memory_profiler.measure_xplane_file(xplaneFile, out)
 
         if logger.hasErrors():
+            if manifest:
+                manifest.forget(fullpath)
             return False
 
         plugin_development = bpy.context.scene.xplane.plugin_development
@@ -227,10 +551,16 @@ class EXPORT_OT_ExportXPlane(bpy.types.Operator, ExportHelper):
             except OSError as e:
                 logger.error(e)
             else:
-                with open(fullpath, "w") as objFile:
+                with profiler.phase("file_io", chars=len(out)), open(
+                    fullpath, "w"
+                ) as objFile:
                     logger.info("Writing %s" % fullpath)
                     objFile.write(out)
                     logger.success("Wrote %s" % fullpath)
+                self.obj_filepaths.append(fullpath)
+                if manifest:
+                    manifest.update(fullpath, fingerprint)
+                    self.num_exported += 1
         else:
             logger.info('Skipped writing %s due to "Dry Run"' % (fullpath))
 
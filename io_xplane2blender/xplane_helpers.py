@@ -3,7 +3,7 @@ import itertools
 import os
 import re
 from datetime import timezone
-from typing import Iterable, List, Optional, Tuple, Union
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 from pathlib import Path
 
 import bpy
@@ -55,11 +55,54 @@ def floatToStr(n: float) -> str:
     return s
 
 
+# Memoized path resolution, keyed by (kind, path, base_dir[, relative_to_dir]).
+# Cleared at the start of each export, so files changing between exports are seen
+_resolved_paths = {}  # type: Dict[Tuple[str, ...], str]
+
+
+def clear_resolved_paths() -> None:
+    _resolved_paths.clear()
+
+
+def get_absolute_path(path: str, base_dir: str) -> str:
+    """
+    Returns path, if relative, joined to base_dir, normalized.
+    Unlike os.path.abspath, the CWD is never used or changed
+    """
+    key = ("abs", path, base_dir)
+    try:
+        return _resolved_paths[key]
+    except KeyError:
+        abs_path = os.path.normpath(os.path.join(base_dir, path))
+        _resolved_paths[key] = abs_path
+        return abs_path
+
+
+def get_relative_path(path: str, base_dir: str, relative_to_dir: str) -> str:
+    """
+    Returns path (if relative, relative to base_dir) with symlinks and '..'s
+    resolved, relative to relative_to_dir, with '/' seperators.
+
+    Raises OSError if the path can't be resolved, ValueError if there is no relative
+    path between them (different drives). Failures are not memoized
+    """
+    key = ("rel", path, base_dir, relative_to_dir)
+    try:
+        return _resolved_paths[key]
+    except KeyError:
+        rel_path = os.path.relpath(
+            os.path.realpath(get_absolute_path(path, base_dir)),
+            get_absolute_path(relative_to_dir, base_dir),
+        ).replace("\\", "/")
+        _resolved_paths[key] = rel_path
+        return rel_path
+
+
 def resolveBlenderPath(path: str) -> str:
     blenddir = os.path.dirname(bpy.context.blend_data.filepath)
 
     if path[0:2] == "//":
-        return os.path.join(blenddir, path[2:])
+        return get_absolute_path(path[2:], blenddir)
     else:
         return path
 
@@ -530,46 +573,90 @@ non-existant bug
 """
 
 
+class LogMessage:
+    """
+    One logged message. Can still be read like the dict messages used to be,
+    message["type"], message["message"], message["context"]
+    """
+
+    __slots__ = ("type", "message", "context")
+
+    def __init__(self, messageType: str, message: str, context=None) -> None:
+        self.type = messageType
+        self.message = message
+        self.context = context
+
+    def __getitem__(self, key: str):
+        if key not in LogMessage.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __repr__(self) -> str:
+        return f"LogMessage({self.type!r}, {self.message!r}, {self.context!r})"
+
+
 class XPlaneLogger:
+    """
+    Messages are indexed by type as they are logged, so hasErrors, countErrors,
+    and friends don't look through every message, which is called after nearly
+    every export phase.
+
+    Transports with a flush attribute (InternalTextTransport, FileTransport) buffer
+    what they're given until flush is called, at the end of an export's roots,
+    when logging ends, or when the transports are cleared. Read a log's text block
+    after logger.flush()
+    """
+
     def __init__(self):
         self.transports = []
-        self.messages = []
+        self.messages: List[LogMessage] = []
+        # Message type: Its messages, in the order they were logged
+        self._messages_by_type: Dict[str, List[LogMessage]] = {}
 
     def addTransport(
         self, transport, messageTypes=["error", "warning", "info", "success"]
     ):
-        self.transports.append({"fn": transport, "types": messageTypes})
+        self.transports.append({"fn": transport, "types": frozenset(messageTypes)})
 
     def clear(self):
         self.clearTransports()
         self.clearMessages()
 
     def clearTransports(self):
+        # Nothing they buffered is lost
+        self.flush()
         del self.transports[:]
 
     def clearMessages(self):
         del self.messages[:]
+        self._messages_by_type.clear()
+
+    def flush(self):
+        """Writes what every buffered transport has buffered"""
+        for transport in self.transports:
+            flush = getattr(transport["fn"], "flush", None)
+            if flush:
+                flush()
 
     def messagesToString(self, messages=None):
         if messages == None:
             messages = self.messages
 
-        out = ""
-
-        for message in messages:
-            out += (
-                XPlaneLogger.messageToString(
-                    message["type"], message["message"], message["context"]
-                )
-                + "\n"
+        return "".join(
+            XPlaneLogger.messageToString(
+                message["type"], message["message"], message["context"]
             )
-
-        return out
+            + "\n"
+            for message in messages
+        )
 
     def log(self, messageType, message, context=None):
-        self.messages.append(
-            {"type": messageType, "message": message, "context": context}
-        )
+        log_message = LogMessage(messageType, message, context)
+        self.messages.append(log_message)
+        try:
+            self._messages_by_type[messageType].append(log_message)
+        except KeyError:
+            self._messages_by_type[messageType] = [log_message]
 
         for transport in self.transports:
             if messageType in transport["types"]:
@@ -587,31 +674,30 @@ class XPlaneLogger:
     def success(self, message, context=None):
         self.log("success", message, context)
 
-    def findOfType(self, messageType):
-        messages = []
+    def findOfType(self, messageType) -> List[LogMessage]:
+        return list(self._messages_by_type.get(messageType, ()))
 
-        for message in self.messages:
-            if message["type"] == messageType:
-                messages.append(message)
+    def countOfType(self, messageType) -> int:
+        return len(self._messages_by_type.get(messageType, ()))
 
-        return messages
-
-    def hasOfType(self, messageType):
-        for message in self.messages:
-            if message["type"] == messageType:
-                return True
-
-        return False
+    def hasOfType(self, messageType) -> bool:
+        return bool(self._messages_by_type.get(messageType))
 
     def findErrors(self):
         return self.findOfType("error")
 
+    def countErrors(self):
+        return self.countOfType("error")
+
     def hasErrors(self):
         return self.hasOfType("error")
 
     def findWarnings(self):
         return self.findOfType("warning")
 
+    def countWarnings(self):
+        return self.countOfType("warning")
+
     def hasWarnings(self):
         return self.hasOfType("warning")
 
@@ -625,22 +711,34 @@ class XPlaneLogger:
 
     @staticmethod
     def InternalTextTransport(name="XPlane2Blender.log"):
+        """Buffered, writing to the text block one message at a time is slow"""
         if bpy.data.texts.find(name) == -1:
             log = bpy.data.texts.new(name)
         else:
             log = bpy.data.texts[name]
 
         log.clear()
+        lines: List[str] = []
 
         def transport(messageType, message, context=None):
-            log.write(
-                XPlaneLogger.messageToString(messageType, message, context) + "\n"
-            )
-
+            lines.append(XPlaneLogger.messageToString(messageType, message, context))
+
+        def flush():
+            if not lines:
+                return
+            try:
+                log.write("\n".join(lines) + "\n")
+            except ReferenceError:
+                # The text block was deleted, like the tests do between exports
+                pass
+            lines.clear()
+
+        transport.flush = flush
         return transport
 
     @staticmethod
     def ConsoleTransport():
+        # Not buffered, what was printed just before a crash matters
         def transport(messageType, message, context=None):
             if io_xplane2blender.xplane_helpers.message_to_str_count == 1:
                 print("\n")
@@ -650,11 +748,18 @@ class XPlaneLogger:
 
     @staticmethod
     def FileTransport(filehandle):
+        """Buffered, flush before closing filehandle"""
+        lines: List[str] = []
+
         def transport(messageType, message, context=None):
-            filehandle.write(
-                XPlaneLogger.messageToString(messageType, message, context) + "\n"
-            )
+            lines.append(XPlaneLogger.messageToString(messageType, message, context))
+
+        def flush():
+            if lines and not filehandle.closed:
+                filehandle.write("\n".join(lines) + "\n")
+                lines.clear()
 
+        transport.flush = flush
         return transport
 
 
@@ -1,7 +1,7 @@
 from pathlib import Path
 import shutil
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import bpy
 
@@ -583,10 +583,98 @@ class SCENE_OT_export_to_relative_dir(bpy.types.Operator):
     initial_dir: bpy.props.StringProperty()
 
     def execute(self, context):
-        bpy.ops.export.xplane_obj(filepath=self.initial_dir, export_is_relative=True)
+        bpy.ops.export.xplane_obj(
+            filepath=self.initial_dir,
+            export_is_relative=True,
+            incremental=context.scene.xplane.incremental_export,
+            jobs=context.scene.xplane.export_jobs,
+        )
         return {"FINISHED"}
 
 
+class SCENE_OT_analyze_render_cost(bpy.types.Operator):
+    bl_label = "Analyze Render Cost"
+    bl_idname = "scene.xplane_analyze_render_cost"
+    bl_description = (
+        "Reports the draw calls, state changes, ANIM depth, vertex reuse, LODs,"
+        " and lights of every root's OBJ in the log, without exporting"
+    )
+
+    def execute(self, context):
+        # xplane_export imports us
+        from io_xplane2blender.xplane_export import showLogDialog
+        from io_xplane2blender.xplane_helpers import XPlaneLogger, logger
+        from io_xplane2blender.xplane_types import xplane_file
+        from io_xplane2blender.xplane_utils import (
+            xplane_obj_analyzer,
+            xplane_obj_reader,
+        )
+
+        logger.clear()
+        logger.addTransport(XPlaneLogger.InternalTextTransport("xplane2blender.log"))
+        logger.addTransport(XPlaneLogger.ConsoleTransport())
+
+        # Like an export, everything is analyzed in its initial state
+        current_frame = context.scene.frame_current
+        context.scene.frame_set(frame=1)
+        context.view_layer.update()
+        try:
+            for xplaneFile in xplane_file.createFilesFromBlenderRootObjects(
+                context.scene, context.view_layer
+            ):
+                out = xplaneFile.write()
+                if not out:
+                    # Why it couldn't be written is already in the log
+                    continue
+                cost = xplane_obj_analyzer.analyze(
+                    xplane_obj_reader.read_obj_string(out),
+                    xplane_obj_analyzer.object_names_from_xplane_file(xplaneFile),
+                )
+                logger.success(f"{xplaneFile.filename}.obj:")
+                for line in cost.report():
+                    if line.startswith("No LOD covers"):
+                        logger.warn(f"{xplaneFile.filename}.obj: {line}")
+                    else:
+                        logger.info(line)
+        finally:
+            context.scene.frame_set(frame=current_frame)
+        showLogDialog()
+        return {"FINISHED"}
+
+
+def _resolve_search_window_prop_dest(prop_dest: str) -> Tuple[Any, str]:
+    """
+    Turns prop_dest, a full path like "bpy.context.active_object.xplane.datarefs[0].path",
+    into the object owning the property and the property's name
+    """
+
+    def getattr_recursive(obj, names):
+        """This automatically expands [] operators"""
+        for name in names:
+            if "[" in name:
+                collection_name = name[: name.find("[")]
+                index = name[name.find("[") + 1 : -1]
+                obj = getattr(obj, collection_name)[int(index)]
+            else:
+                obj = getattr(obj, name)
+        return obj
+
+    components = prop_dest.split(".")
+    assert components[0] == "bpy"
+    return getattr_recursive(bpy, components[1:-1]), components[-1]
+
+
+def _set_search_window_prop_dest(prop_dest: str, value: str) -> None:
+    setattr(*_resolve_search_window_prop_dest(prop_dest), value)
+
+
+def _get_search_window_prop_dest(prop_dest: str) -> str:
+    try:
+        return getattr(*_resolve_search_window_prop_dest(prop_dest))
+    except (AttributeError, IndexError, ValueError):
+        return ""
+
+
 class XPLANE_OT_CommandSearchToggle(bpy.types.Operator):
     """
     This operator very simply passes it's associated command to the search window, which then opens it in the UI.
@@ -602,31 +690,17 @@ class XPLANE_OT_CommandSearchToggle(bpy.types.Operator):
 
     def execute(self, context):
         command_search_window_state = context.scene.xplane.command_search_window_state
-        # Load on first use
-        if len(command_search_window_state.command_search_list) == 0:
-            filepath = Path(
-                xplane_helpers.get_plugin_resources_folder(), "Commands.txt"
-            )
-            get_commands_txt_result = xplane_commands_txt_parser.get_commands_txt_file_content(
-                filepath.as_posix()
-            )
-            if isinstance(get_commands_txt_result, str):
-                short_filepath = "..." + os.path.sep.join(filepath.parts[-3:])
-                bpy.ops.xplane.msg(
-                    "INVOKE_DEFAULT", msg_text=short_filepath + " could not be parsed",
-                )
-                return {"CANCELLED"}
-            else:
-                file_content = get_commands_txt_result
-
-            command_search_list = (
-                bpy.context.scene.xplane.command_search_window_state.command_search_list
+        # Parse and index on first use, the results are kept in memory and shared by every scene
+        filepath = Path(xplane_helpers.get_plugin_resources_folder(), "Commands.txt")
+        get_commands_txt_result = xplane_commands_txt_parser.get_commands_txt_search_index(
+            filepath.as_posix()
+        )
+        if isinstance(get_commands_txt_result, str):
+            short_filepath = "..." + os.path.sep.join(filepath.parts[-3:])
+            bpy.ops.xplane.msg(
+                "INVOKE_DEFAULT", msg_text=short_filepath + " could not be parsed",
             )
-
-            for command_info in file_content:
-                command_search_list.add()
-                command_search_list[-1].command = command_info.command
-                command_search_list[-1].command_description = command_info.description
+            return {"CANCELLED"}
 
         prop = command_search_window_state.command_prop_dest
 
@@ -635,10 +709,37 @@ class XPLANE_OT_CommandSearchToggle(bpy.types.Operator):
             command_search_window_state.command_prop_dest = ""
         else:
             command_search_window_state.command_prop_dest = self.paired_command_prop
+            # Start from what's already typed, so the window opens on its completions
+            command_search_window_state.command_search_query = _get_search_window_prop_dest(
+                self.paired_command_prop
+            )
 
         return {"FINISHED"}
 
 
+class XPLANE_OT_CommandSearchPick(bpy.types.Operator):
+    """
+    Clicking a search result writes its command to the property the search window was opened for, and closes the window
+    """
+
+    bl_label = "Use Command"
+    bl_description = "Use this command"
+    bl_idname = "xplane.command_search_pick"
+
+    command: bpy.props.StringProperty()
+
+    def execute(self, context):
+        command_search_window_state = context.scene.xplane.command_search_window_state
+        assert (
+            command_search_window_state.command_prop_dest != ""
+        ), "should not be able to click button when search window is supposed to be closed"
+        _set_search_window_prop_dest(
+            command_search_window_state.command_prop_dest, self.command
+        )
+        command_search_window_state.command_prop_dest = ""
+        return {"FINISHED"}
+
+
 class XPLANE_OT_DatarefSearchToggle(bpy.types.Operator):
     """
     This operator very simply passes it's associated dataref to the search window, which then opens it in the UI.
@@ -654,35 +755,18 @@ class XPLANE_OT_DatarefSearchToggle(bpy.types.Operator):
 
     def execute(self, context):
         dataref_search_window_state = context.scene.xplane.dataref_search_window_state
-        # Load on first use
-        if len(dataref_search_window_state.dataref_search_list) == 0:
-            filepath = Path(
-                xplane_helpers.get_plugin_resources_folder(), "DataRefs.txt"
-            )
-            get_datarefs_txt_result = xplane_datarefs_txt_parser.get_datarefs_txt_file_content(
-                filepath.as_posix()
-            )
-            if isinstance(get_datarefs_txt_result, str):
-                short_filepath = "..." + os.path.sep.join(filepath.parts[-3:])
-
-                bpy.ops.xplane.msg(
-                    "INVOKE_DEFAULT", msg_text=short_filepath + " could not be parsed",
-                )
-                return {"CANCELLED"}
-            else:
-                file_content = get_datarefs_txt_result
+        # Parse and index on first use, the results are kept in memory and shared by every scene
+        filepath = Path(xplane_helpers.get_plugin_resources_folder(), "DataRefs.txt")
+        get_datarefs_txt_result = xplane_datarefs_txt_parser.get_datarefs_txt_search_index(
+            filepath.as_posix()
+        )
+        if isinstance(get_datarefs_txt_result, str):
+            short_filepath = "..." + os.path.sep.join(filepath.parts[-3:])
 
-            dataref_search_list = (
-                bpy.context.scene.xplane.dataref_search_window_state.dataref_search_list
+            bpy.ops.xplane.msg(
+                "INVOKE_DEFAULT", msg_text=short_filepath + " could not be parsed",
             )
-
-            for dref_info in file_content:
-                dataref_search_list.add()
-                dataref_search_list[-1].dataref_path = dref_info.path
-                dataref_search_list[-1].dataref_type = dref_info.type
-                dataref_search_list[-1].dataref_is_writable = dref_info.is_writable
-                dataref_search_list[-1].dataref_units = dref_info.units
-                dataref_search_list[-1].dataref_description = dref_info.description
+            return {"CANCELLED"}
 
         prop = dataref_search_window_state.dataref_prop_dest
 
@@ -691,10 +775,124 @@ class XPLANE_OT_DatarefSearchToggle(bpy.types.Operator):
             dataref_search_window_state.dataref_prop_dest = ""
         else:
             dataref_search_window_state.dataref_prop_dest = self.paired_dataref_prop
+            # Start from what's already typed, so the window opens on its completions
+            dataref_search_window_state.dataref_search_query = _get_search_window_prop_dest(
+                self.paired_dataref_prop
+            )
 
         return {"FINISHED"}
 
 
+class XPLANE_OT_DatarefSearchPick(bpy.types.Operator):
+    """
+    Clicking a search result writes its dataref to the property the search window was opened for, and closes the window
+    """
+
+    bl_label = "Use Dataref"
+    bl_description = "Use this dataref"
+    bl_idname = "xplane.dataref_search_pick"
+
+    dataref_path: bpy.props.StringProperty()
+
+    def execute(self, context):
+        dataref_search_window_state = context.scene.xplane.dataref_search_window_state
+        assert (
+            dataref_search_window_state.dataref_prop_dest != ""
+        ), "should not be able to click button when search window is supposed to be closed"
+        _set_search_window_prop_dest(
+            dataref_search_window_state.dataref_prop_dest, self.dataref_path
+        )
+        dataref_search_window_state.dataref_prop_dest = ""
+        return {"FINISHED"}
+
+
+class XPLANE_OT_SearchWindowChangePage(bpy.types.Operator):
+    """
+    Moves a search window to another page of results
+    """
+
+    bl_label = "Change Search Results Page"
+    bl_description = "Show the previous or next page of search results"
+    bl_idname = "xplane.search_window_change_page"
+
+    search_window: bpy.props.EnumProperty(
+        items=[
+            ("COMMAND", "Command", "The command search window"),
+            ("DATAREF", "Dataref", "The dataref search window"),
+        ]
+    )
+    page: bpy.props.IntProperty(default=0, min=0)
+
+    def execute(self, context):
+        if self.search_window == "COMMAND":
+            context.scene.xplane.command_search_window_state.command_search_page = (
+                self.page
+            )
+        else:
+            context.scene.xplane.dataref_search_window_state.dataref_search_page = (
+                self.page
+            )
+        return {"FINISHED"}
+
+
+class XPLANE_OT_SearchWindowSetQuery(bpy.types.Operator):
+    """
+    Replaces a search window's query, used by the path completion buttons
+    """
+
+    bl_label = "Complete Search Path"
+    bl_description = "Continue searching from this path"
+    bl_idname = "xplane.search_window_set_query"
+
+    search_window: bpy.props.EnumProperty(
+        items=[
+            ("COMMAND", "Command", "The command search window"),
+            ("DATAREF", "Dataref", "The dataref search window"),
+        ]
+    )
+    query: bpy.props.StringProperty()
+
+    def execute(self, context):
+        if self.search_window == "COMMAND":
+            context.scene.xplane.command_search_window_state.command_search_query = (
+                self.query
+            )
+        else:
+            context.scene.xplane.dataref_search_window_state.dataref_search_query = (
+                self.query
+            )
+        return {"FINISHED"}
+
+
+class XPLANE_OT_SearchWindowTreeToggle(bpy.types.Operator):
+    """
+    Expands or collapses a node of a search window's tree browser
+    """
+
+    bl_label = "Expand/Collapse"
+    bl_description = "Show or hide what's under this path"
+    bl_idname = "xplane.search_window_tree_toggle"
+
+    # Like the trees themselves, which nodes are expanded is only kept in memory
+    expanded = {"COMMAND": set(), "DATAREF": set()}  # type: Dict[str, Set[str]]
+
+    search_window: bpy.props.EnumProperty(
+        items=[
+            ("COMMAND", "Command", "The command search window"),
+            ("DATAREF", "Dataref", "The dataref search window"),
+        ]
+    )
+    path: bpy.props.StringProperty()
+
+    def execute(self, context):
+        expanded = XPLANE_OT_SearchWindowTreeToggle.expanded[self.search_window]
+        if self.path in expanded:
+            expanded.remove(self.path)
+        else:
+            expanded.add(self.path)
+        return {"FINISHED"}
+
+
 class XPLANE_OT_XPlaneMessage(bpy.types.Operator):
     bl_idname = "xplane.msg"
     bl_label = "XPlane2Blender Message"
@@ -757,6 +955,14 @@ class XPLANE_OT_bake_wiper_gradient_texture(bpy.types.Operator):
         default=(True,) * 4,
         size=4,
     )
+
+    workers: bpy.props.IntProperty(
+        name="Workers",
+        description="Background Blenders to split the frames between. With more than 1, frames already baked by an interrupted bake are reused",
+        default=1,
+        min=1,
+        max=64,
+    )
     # fmt: on
 
     def execute(self, context):
@@ -879,7 +1085,6 @@ class XPLANE_OT_bake_wiper_gradient_texture(bpy.types.Operator):
         img = find_baking_image(windshield)
         img_filepath = Path(bpy.path.abspath(img.filepath, library=img.library))
         bake_temp_folder = img_filepath.parent / Path("_tmp_bake_images")
-        bake_temp_folder.mkdir(parents=True, exist_ok=True)
         # --- Errors with the bake image --------------------------------------
         if img is None:
             bpy.ops.xplane.msg(
@@ -908,63 +1113,109 @@ class XPLANE_OT_bake_wiper_gradient_texture(bpy.types.Operator):
             return {"CANCELLED"}
         # ---------------------------------------------------------------------
 
-        def select_objects(wiper: xplane_props.XPlaneWiperSettings) -> None:
-            """Select Wiper Object (already guaranteed to exist) then Windshield"""
-            for obj in context.selected_objects:
-                obj.select_set(False)
-            object_datablock = bpy.data.objects[wiper.object_name]
-            object_datablock.select_set(True)
-            windshield.select_set(True)
-            context.view_layer.objects.active = windshield
-
         original_active_object = context.active_object
         original_frame = scene.frame_current
         original_margin = scene.render.bake.margin
         scene.render.bake.margin = 0
-        paths = []
-        for slot, wiper in enumerate(wipers, start=1):
-            if not self.debug_slots[slot - 1]:
-                continue
-            select_objects(wiper)
-
-            print(
-                "Animated baking for frames (%d - %d)" % (self.start, self.start + 255)
-            )
 
-            for cfra in range(self.start, self.start + 255):
-                assert 1 <= cfra <= 255 * 4, f"Start is {self.start}, cfra is {cfra}"
-                bake_start = time.perf_counter()
-                print("Baking frame %d" % cfra)
+        frames = [
+            xplane_wiper_gradient.WiperFrame(slot, wiper.object_name, cfra)
+            for slot, wiper in enumerate(wipers, start=1)
+            if self.debug_slots[slot - 1]
+            for cfra in range(self.start, self.start + 255)
+        ]
+        paths = [
+            xplane_wiper_gradient.wiper_frame_filepath(
+                bake_temp_folder, img_filepath, frame.slot, frame.cfra
+            )
+            for frame in frames
+        ]
 
-                # update scene to new frame and bake to template image
-                scene.frame_set(cfra)
-                new_img_filepath = bake_temp_folder / Path(
-                    f"{img_filepath.stem}_slot{slot}_{cfra:03}.png"
+        def restore_scene() -> None:
+            for obj in context.selected_objects:
+                obj.select_set(False)
+            context.view_layer.objects.active = original_active_object
+            scene.frame_set(original_frame)
+            scene.render.bake.margin = original_margin
+
+        if self.workers > 1:
+            xplane_wiper_gradient.prepare_bake_temp_folder(
+                bake_temp_folder,
+                {
+                    "blend": bpy.data.filepath,
+                    "engine": scene.render.engine,
+                    "image": str(img_filepath),
+                    "size": list(img.size),
+                    "start": self.start,
+                    "wipers": [wiper.object_name for wiper in wipers],
+                },
+            )
+            wm = context.window_manager
+            wm.progress_begin(0, len(frames))
+
+            def report_progress(num_baked: int, num_frames: int) -> None:
+                print(f"Baked {num_baked}/{num_frames} frames")
+                wm.progress_update(num_baked)
+
+            try:
+                error = xplane_wiper_gradient.bake_in_workers(
+                    frames,
+                    windshield,
+                    img,
+                    bake_temp_folder,
+                    self.workers,
+                    report_progress,
                 )
+            finally:
+                wm.progress_end()
+            if error:
+                restore_scene()
+                bpy.ops.xplane.msg("INVOKE_DEFAULT", msg_text=error)
+                return {"CANCELLED"}
+        else:
+            # Each frame is folded into the master as soon as it's baked,
+            # only going through files when debugging
+            master = xplane_wiper_gradient.new_wiper_gradient(*img.size)
+            if self.debug_reuse_temps:
+                bake_temp_folder.mkdir(parents=True, exist_ok=True)
+
+            for frame, new_img_filepath in zip(frames, paths):
+                assert (
+                    1 <= frame.cfra <= 255 * 4
+                ), f"Start is {self.start}, cfra is {frame.cfra}"
+                if frame.cfra == self.start:
+                    xplane_wiper_gradient.select_for_bake(
+                        context.view_layer,
+                        bpy.data.objects[frame.wiper_object_name],
+                        windshield,
+                    )
+                    print(
+                        "Animated baking for frames (%d - %d)"
+                        % (self.start, self.start + 255)
+                    )
+                bake_start = time.perf_counter()
+                print("Baking frame %d" % frame.cfra)
 
-                if not self.debug_reuse_temps or (
-                    self.debug_reuse_temps and not new_img_filepath.exists()
-                ):
-                    if is_cycles:
-                        ret = bpy.ops.object.bake(type=scene.cycles.bake_type)
-                    else:
-                        ret = bpy.ops.object.bake_image()
+                if self.debug_reuse_temps and new_img_filepath.exists():
+                    pixels = xplane_wiper_gradient.read_image_file_pixels(
+                        new_img_filepath
+                    )
                 else:
-                    ret = {}
-
-                if "CANCELLED" in ret:
-                    return {"CANCELLED"}
-                print("Bake time:", time.perf_counter() - bake_start)
-
-                # Currently the api has no img.save_as()
-                orig = img.filepath_raw
-                # !!! IMPORTANT! You must use filepath_raw! !!!
-                img.filepath_raw = str(new_img_filepath)
-                paths.append(Path(img.filepath_raw))
-                if not self.debug_reuse_temps:
-                    img.save()
-                    print("Saved %r" % new_img_filepath)
-                img.filepath_raw = orig
+                    # update scene to new frame and bake to template image
+                    ret = xplane_wiper_gradient.bake_frame(scene, frame.cfra)
+                    if "CANCELLED" in ret:
+                        restore_scene()
+                        return {"CANCELLED"}
+                    print("Bake time:", time.perf_counter() - bake_start)
+
+                    if self.debug_reuse_temps:
+                        xplane_wiper_gradient.save_baked_frame(img, new_img_filepath)
+                        print("Saved %r" % new_img_filepath)
+                    pixels = xplane_wiper_gradient.read_image_pixels(img)
+
+                xplane_wiper_gradient.add_wiper_frame(
+                    master, pixels, frame.slot, frame.cfra - self.start + 1
+                )
             print("Baking done!")
 
         try:
@@ -972,9 +1223,15 @@ class XPLANE_OT_bake_wiper_gradient_texture(bpy.types.Operator):
                 master_filepath = Path(bpy.path.abspath(self.debug_master_filepath))
             else:
                 master_filepath = img_filepath.parent / Path("wiper_gradient_texture.png")
-            xplane_wiper_gradient.make_wiper_images(paths, *img.size, master_filepath)
+            if self.workers > 1:
+                xplane_wiper_gradient.make_wiper_images(
+                    paths, *img.size, master_filepath
+                )
+            else:
+                xplane_wiper_gradient.save_wiper_gradient(master, master_filepath)
         except OSError as e:
-            bpy.ops.xplane.msg("INVOKE_DEFAULT", e)
+            restore_scene()
+            bpy.ops.xplane.msg("INVOKE_DEFAULT", msg_text=str(e))
             return {"CANCELLED"}
         else:
             rain.wiper_texture = bpy.path.relpath(str(master_filepath)).replace(
@@ -983,11 +1240,7 @@ class XPLANE_OT_bake_wiper_gradient_texture(bpy.types.Operator):
             if not self.debug_reuse_temps:
                 shutil.rmtree(bake_temp_folder, ignore_errors=True)
 
-        for obj in context.selected_objects:
-            obj.select_set(False)
-        context.view_layer.objects.active = original_active_object
-        scene.frame_set(original_frame)
-        scene.render.bake.margin = original_margin
+        restore_scene()
         return {"FINISHED"}
 
     @classmethod
@@ -1037,8 +1290,14 @@ _ops = (
     OBJECT_OT_add_xplane_material_condition,
     OBJECT_OT_remove_xplane_material_condition,
     SCENE_OT_export_to_relative_dir,
+    SCENE_OT_analyze_render_cost,
     XPLANE_OT_CommandSearchToggle,
+    XPLANE_OT_CommandSearchPick,
     XPLANE_OT_DatarefSearchToggle,
+    XPLANE_OT_DatarefSearchPick,
+    XPLANE_OT_SearchWindowChangePage,
+    XPLANE_OT_SearchWindowSetQuery,
+    XPLANE_OT_SearchWindowTreeToggle,
     XPLANE_OT_XPlaneMessage,
     XPLANE_OT_bake_wiper_gradient_texture,
 )
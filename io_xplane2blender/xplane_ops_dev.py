@@ -125,6 +125,7 @@ class SCENE_OT_dev_rerun_updater(bpy.types.Operator):
         io_xplane2blender.xplane_updater.update(
             xplane_helpers.VerStruct.parse_version(fake_version_str), logger
         )
+        logger.flush()
         return {"FINISHED"}
 
 
@@ -9,6 +9,7 @@ import bpy
 import io_xplane2blender
 from io_xplane2blender import xplane_config, xplane_constants, xplane_helpers
 from io_xplane2blender.xplane_constants import *
+from io_xplane2blender.xplane_utils import xplane_dataref_usage
 
 """
  #####     ##   ##  ##   ####  ####  ####  #
@@ -90,6 +91,11 @@ undebatable alphabetical listing.
 _version_safety_off = False
 
 
+def _update_dataref_usage(self, context):
+    """Keeps the dataref usage index current when a dataref property changes"""
+    xplane_dataref_usage.dataref_usage_index.update_datablock(self.id_data)
+
+
 class XPlane2BlenderVersion(bpy.types.PropertyGroup):
     """
     Contains useful methods for getting information about the
@@ -309,46 +315,6 @@ class XPlaneCustomAttribute(bpy.types.PropertyGroup):
 # fmt: on
 
 
-class ListItemCommand(bpy.types.PropertyGroup):
-    """
-    This is essentially a copy of xplane_commands_txt_parser.CommandInfoStruct's members
-    """
-
-    command: bpy.props.StringProperty(
-        name="Command For Search List",
-        description="A command path in the command search window. Comes from a Commands definitions file",
-    )
-
-    command_description: bpy.props.StringProperty(
-        name="Command Description For Search List",
-        description="Indicates the type, shown in a column in the commands search window. Comes from a Commands definitions file",
-    )
-
-
-class ListItemDataref(bpy.types.PropertyGroup):
-    """
-    This is essentially a copy of xplane_datarefs_txt_parser.DatarefInfoStruct's members
-    """
-
-    dataref_path: bpy.props.StringProperty(
-        name="Dataref Path Data For Search List",
-        description="A dataref path in the dataref search window. Comes from a Datarefs definitions file",
-    )
-
-    dataref_type: bpy.props.StringProperty(
-        name="Dataref Type Data For Search List",
-        description="Indicates the type, shown in a column in the datarefs search window. Comes from a Datarefs definitions file",
-    )
-
-    dataref_is_writable: bpy.props.StringProperty(
-        name="Dataref 'Is Writable' Data For Search List", description="A "
-    )
-
-    dataref_units: bpy.props.StringProperty(name="", description="")
-
-    dataref_description: bpy.props.StringProperty(name="", description="")
-
-
 class XPlaneCommandSearchWindow(bpy.types.PropertyGroup):
     # This is only set through a CommandSeachToggle's action.
     # It should be the full path to the command property to change,
@@ -360,50 +326,25 @@ class XPlaneCommandSearchWindow(bpy.types.PropertyGroup):
         description="The destination command property, starting with 'bpy.context...'",
     )
 
-    def onclick_command(self, context):
-        """
-        This method is called when the template_list uilist writes to the current selected index as the user selects.
-        We dig out our stashed search info, write the command, and clear the current search, zapping out the UI.
-        """
+    def update_command_search_query(self, context):
+        self.command_search_page = 0
 
-        xplane = context.scene.xplane
-        command_prop_dest = xplane.command_search_window_state.command_prop_dest
-        commands_search_list = xplane.command_search_window_state.command_search_list
-        commands_search_list_idx = (
-            xplane.command_search_window_state.command_search_list_idx
-        )
-        command = commands_search_list[commands_search_list_idx].command
-        assert (
-            command_prop_dest != ""
-        ), "should not be able to click button when search window is supposed to be closed"
-
-        def getattr_recursive(obj, names):
-            """This automatically expands [] operators"""
-            if len(names) == 1:
-                if "[" in names[0]:
-                    name = names[0]
-                    collection_name = name[: name.find("[")]
-                    index = name[name.find("[") + 1 : -1]
-                    return getattr(obj, collection_name)[int(index)]
-                else:
-                    return getattr(obj, names[0])
-            else:
-                if "[" in names[0]:
-                    name = names[0]
-                    collection_name = name[: name.find("[")]
-                    index = name[name.find("[") + 1 : -1]
-                    obj = getattr(obj, collection_name)[int(index)]
-                else:
-                    obj = getattr(obj, names[0])
-                return getattr_recursive(obj, names[1:])
-
-        components = command_prop_dest.split(".")
-        assert components[0] == "bpy"
-        setattr(getattr_recursive(bpy, components[1:-1]), components[-1], command)
-        xplane.command_search_window_state.command_prop_dest = ""
-
-    command_search_list: bpy.props.CollectionProperty(type=ListItemCommand)
-    command_search_list_idx: bpy.props.IntProperty(update=onclick_command)
+    command_search_page: bpy.props.IntProperty(
+        default=0,
+        min=0,
+        name="Command Search Page",
+        description="The page of search results currently shown",
+    )
+
+    # The commands themselves only live in xplane_commands_txt_parser's
+    # in-memory search index, never in the .blend file
+    command_search_query: bpy.props.StringProperty(
+        default="",
+        name="Command Search",
+        description="Search for commands by path or description, spaces require more terms and '|' searches for alternatives",
+        update=update_command_search_query,
+        options={"TEXTEDIT_UPDATE"},
+    )
 
 
 class XPlaneDatarefSearchWindow(bpy.types.PropertyGroup):
@@ -417,50 +358,25 @@ class XPlaneDatarefSearchWindow(bpy.types.PropertyGroup):
         description="The destination dataref property, starting with 'bpy.context...'",
     )
 
-    def onclick_dataref(self, context):
-        """
-        This method is called when the template_list uilist writes to the current selected index as the user selects.
-        We dig out our stashed search info, write the dataref, and clear the current search, zapping out the UI.
-        """
+    def update_dataref_search_query(self, context):
+        self.dataref_search_page = 0
 
-        xplane = context.scene.xplane
-        dataref_prop_dest = xplane.dataref_search_window_state.dataref_prop_dest
-        datarefs_search_list = xplane.dataref_search_window_state.dataref_search_list
-        datarefs_search_list_idx = (
-            xplane.dataref_search_window_state.dataref_search_list_idx
-        )
-        path = datarefs_search_list[datarefs_search_list_idx].dataref_path
-        assert (
-            dataref_prop_dest != ""
-        ), "should not be able to click button when search window is supposed to be closed"
-
-        def getattr_recursive(obj, names):
-            """This automatically expands [] operators"""
-            if len(names) == 1:
-                if "[" in names[0]:
-                    name = names[0]
-                    collection_name = name[: name.find("[")]
-                    index = name[name.find("[") + 1 : -1]
-                    return getattr(obj, collection_name)[int(index)]
-                else:
-                    return getattr(obj, names[0])
-            else:
-                if "[" in names[0]:
-                    name = names[0]
-                    collection_name = name[: name.find("[")]
-                    index = name[name.find("[") + 1 : -1]
-                    obj = getattr(obj, collection_name)[int(index)]
-                else:
-                    obj = getattr(obj, names[0])
-                return getattr_recursive(obj, names[1:])
-
-        components = dataref_prop_dest.split(".")
-        assert components[0] == "bpy"
-        setattr(getattr_recursive(bpy, components[1:-1]), components[-1], path)
-        xplane.dataref_search_window_state.dataref_prop_dest = ""
-
-    dataref_search_list: bpy.props.CollectionProperty(type=ListItemDataref)
-    dataref_search_list_idx: bpy.props.IntProperty(update=onclick_dataref)
+    dataref_search_page: bpy.props.IntProperty(
+        default=0,
+        min=0,
+        name="Dataref Search Page",
+        description="The page of search results currently shown",
+    )
+
+    # The datarefs themselves only live in xplane_datarefs_txt_parser's
+    # in-memory search index, never in the .blend file
+    dataref_search_query: bpy.props.StringProperty(
+        default="",
+        name="Dataref Search",
+        description="Search for datarefs by path, units, or description, spaces require more terms and '|' searches for alternatives",
+        update=update_dataref_search_query,
+        options={"TEXTEDIT_UPDATE"},
+    )
 
 
 # fmt: off
@@ -542,7 +458,8 @@ class XPlaneDataref(bpy.types.PropertyGroup):
     path: bpy.props.StringProperty(
         name = "Dataref Path",
         description = "Dataref Path",
-        default = ""
+        default = "",
+        update = _update_dataref_usage
     )
 
     value: bpy.props.FloatProperty(
@@ -861,12 +778,15 @@ class XPlaneManipulatorSettings(bpy.types.PropertyGroup):
     dataref1: bpy.props.StringProperty(
         name = "Dataref 1",
         description = "Dataref 1",
-        default = "")
+        default = "",
+        update = _update_dataref_usage
+    )
 
     dataref2: bpy.props.StringProperty(
         name = "Dataref 2",
         description = "Dataref 2",
-        default = ""
+        default = "",
+        update = _update_dataref_usage
     )
 
     step: bpy.props.FloatProperty(
@@ -1001,7 +921,8 @@ class XPlaneThermalSourceSettings(bpy.types.PropertyGroup):
         )
     dataref_on_off: bpy.props.StringProperty(
             name="Thermal On/Off Dataref",
-            description="Dataref that controls source on/off"
+            description="Dataref that controls source on/off",
+            update=_update_dataref_usage,
         )
 
 class XPlaneWiperSettings(bpy.types.PropertyGroup):
@@ -1012,7 +933,8 @@ class XPlaneWiperSettings(bpy.types.PropertyGroup):
     dataref: bpy.props.StringProperty(
         name="Wiper animation dref",
         description="The dataref that controls the motion of the wiper object",
-        default=""
+        default="",
+        update=_update_dataref_usage,
     )
     start: bpy.props.FloatProperty(
         name="Wiper Dataref Start",
@@ -1954,11 +1876,25 @@ class XPlaneSceneSettings(bpy.types.PropertyGroup):
         default = False
     )
 
+    export_jobs: bpy.props.IntProperty(
+        name = "Jobs",
+        description = "Background Blenders to export roots with. With more than 1 the .blend must be saved",
+        min = 1,
+        max = 64,
+        default = 1
+    )
+
     expanded_non_exporting_collections: bpy.props.BoolProperty(
             name = "Other Collections",
             description = "Reveals Non-Root Collections"
     )
 
+    incremental_export: bpy.props.BoolProperty(
+        name = "Incremental Export",
+        description = "Skip roots that haven't changed since they were last exported. Fingerprints are kept in xplane2blender_export_manifest.json next to the .blend",
+        default = False
+    )
+
     log: bpy.props.BoolProperty(
         name = "Create Log File",
         description = "If checked the debug information will be written to a log file",
@@ -1978,6 +1914,14 @@ class XPlaneSceneSettings(bpy.types.PropertyGroup):
         default=1
     )
 
+    wiper_bake_workers: bpy.props.IntProperty(
+        name = "Workers",
+        description = "Background Blenders to bake the wiper gradient texture with. With more than 1, frames already baked by an interrupted bake are reused",
+        min = 1,
+        max = 64,
+        default = 1
+    )
+
     #######################################
     #TODO: Should these be in their own namespace?
     dev_enable_breakpoints: bpy.props.BoolProperty(
@@ -1999,6 +1943,16 @@ class XPlaneSceneSettings(bpy.types.PropertyGroup):
         name       = "Fake XPlane2Blender Version",
         description = "The Fake XPlane2Blender Version to re-run the upgrader with",
         default = "")#str(bpy.context.scene.xplane.get("xplane2blender_ver")))
+
+    dev_profile_export: bpy.props.BoolProperty(
+        name        = "Profile Export",
+        description = "Times each phase of the export, writing a Chrome trace (xplane2blender_profile.json next to the .blend) and a summary to the log",
+        default = False)
+
+    dev_profile_memory: bpy.props.BoolProperty(
+        name        = "Profile Export Memory",
+        description = "Traces memory after each phase of the export, writing the peak, top allocating lines, and sizes of the exporter's structures (xplane2blender_memory.json next to the .blend) and a summary to the log. Makes exporting much slower",
+        default = False)
     #######################################
 
     optimize: bpy.props.BoolProperty(
@@ -2104,7 +2058,8 @@ class XPlaneObjectSettings(bpy.types.PropertyGroup):
     lightLevel_dataref: bpy.props.StringProperty(
         name = "Dataref",
         description = "The dataref is interpreted as a value between v1 and v2. Values outside v1 and v2 are clamped",
-        default = ""
+        default = "",
+        update = _update_dataref_usage
     )
     # --------------------------------------------------------------------------
     override_lods: bpy.props.BoolProperty(
@@ -2244,8 +2199,8 @@ class XPlaneMaterialSettings(bpy.types.PropertyGroup):
             (DEVICE_Primus_MFD_3,       DEVICE_Primus_MFD_3,        DEVICE_Primus_MFD_3),
             (DEVICE_Primus_RMU_1,       DEVICE_Primus_RMU_1,        DEVICE_Primus_RMU_1),
             (DEVICE_Primus_RMU_2,       DEVICE_Primus_RMU_2,        DEVICE_Primus_RMU_2),
-            (DEVICE_MCDU_1,             DEVICE_MCDU_1,              DEVICE_MCDU_1),
-            (DEVICE_MCDU_2,             DEVICE_MCDU_2,              DEVICE_MCDU_2),
+            (DEVICE_FMGSMCDU_1,         DEVICE_FMGSMCDU_1,          DEVICE_FMGSMCDU_1),
+            (DEVICE_FMGSMCDU_2,         DEVICE_FMGSMCDU_2,          DEVICE_FMGSMCDU_2),
             (DEVICE_PLUGIN,             DEVICE_PLUGIN,              DEVICE_PLUGIN)
             
         ]
@@ -2417,7 +2372,8 @@ class XPlaneMaterialSettings(bpy.types.PropertyGroup):
     lightLevel_dataref: bpy.props.StringProperty(
         name = "Dataref",
         description = "The dataref is interpreted as a value between v1 and v2. Values outside v1 and v2 are clamped",
-        default = ""
+        default = "",
+        update = _update_dataref_usage
     )
 
     poly_os: bpy.props.IntProperty(
@@ -2565,7 +2521,8 @@ class XPlaneLightSettings(bpy.types.PropertyGroup):
     dataref: bpy.props.StringProperty(
         name = 'Dataref',
         description = "An X-Plane Dataref",
-        default = ""
+        default = "",
+        update = _update_dataref_usage
     )
 
     uv: bpy.props.FloatVectorProperty(
@@ -2596,9 +2553,7 @@ _classes = (
     XPlaneMagnet,
     XPlaneEmpty,
     XPlaneExportPathDirective,
-    ListItemCommand,
     XPlaneCommandSearchWindow,
-    ListItemDataref,
     XPlaneDatarefSearchWindow,
     XPlaneManipulatorSettings,
     XPlaneCockpitRegion,
@@ -28,6 +28,9 @@ from io_xplane2blender.xplane_types import (
     xplane_material,
     xplane_material_utils,
 )
+from io_xplane2blender.xplane_utils import xplane_dataref_usage
+from io_xplane2blender.xplane_utils.xplane_memory_profiler import memory_profiler
+from io_xplane2blender.xplane_utils.xplane_profiler import profiler
 
 from ..xplane_helpers import (
     BlenderParentType,
@@ -50,26 +53,51 @@ class NotExportableRootError(ValueError):
     pass
 
 
+def get_root_key(potential_root: PotentialRoot) -> str:
+    """
+    Names a root unambiguously across Blender sessions,
+    since a Collection and Object can share a name
+    """
+    return f"{type(potential_root).__name__}:{potential_root.name}"
+
+
+def get_potential_roots(
+    scene: bpy.types.Scene,
+    only_selected_roots: bool = False,
+    root_keys: Optional[Set[str]] = None,
+) -> List[PotentialRoot]:
+    """
+    Returns every potential root in the order they are exported in,
+    only the selected ones or only those with a root key in root_keys if given
+    """
+    if only_selected_roots:
+        potential_roots = [ob for ob in scene.objects if ob.select_get()]
+    else:
+        potential_roots = (
+            scene.objects[:] + xplane_helpers.get_collections_in_scene(scene)[1:]
+        )
+
+    if root_keys is not None:
+        potential_roots = [r for r in potential_roots if get_root_key(r) in root_keys]
+    return potential_roots
+
+
 def createFilesFromBlenderRootObjects(
     scene: bpy.types.Scene, 
     view_layer: bpy.types.ViewLayer,
     only_selected_roots: bool = False,    
+    root_keys: Optional[Set[str]] = None,
 ) -> List["XPlaneFile"]:
     """
     Returns a list of all created XPlaneFiles from all valid roots found,
     ignoring any that could not be created.
 
-    view_layer is needed to test exportability
+    view_layer is needed to test exportability. See get_potential_roots
+    for only_selected_roots and root_keys
     """
     xplane_files: List["XPlaneFile"] = []
-    
-    if only_selected_roots:
-        potential_roots = [ob for ob in scene.objects if ob.select_get()]
-    else:
-        potential_roots = (
-            scene.objects[:] + xplane_helpers.get_collections_in_scene(scene)[1:]
-        )
-    
+    potential_roots = get_potential_roots(scene, only_selected_roots, root_keys)
+
     for potential_root in potential_roots:
         try:
             xplane_file = createFileFromBlenderRootObject(potential_root, view_layer)
@@ -78,9 +106,14 @@ def createFilesFromBlenderRootObjects(
         else:
             xplane_files.append(xplane_file)
 
+    memory_profiler.measure(
+        "_all_keyframe_infos", _all_keyframe_infos, scenes=len(_all_keyframe_infos)
+    )
     # Without this the cache never gets cleared
     # and no new animations are exported without a restart
     _all_keyframe_infos.clear()
+    # Each export resolves resource paths fresh
+    xplane_helpers.clear_resolved_paths()
 
     return xplane_files
 
@@ -129,7 +162,9 @@ def createFileFromBlenderRootObject(
     filename = layer_props.name if layer_props.name else exportable_root.name
 
     xplane_file = XPlaneFile(filename, layer_props)
-    xplane_file.create_xplane_bone_hiearchy(exportable_root)
+    with profiler.phase("create_xplane_bone_hiearchy", root=filename) as phase:
+        xplane_file.create_xplane_bone_hiearchy(exportable_root)
+        phase.set(objects=len(xplane_file._bl_obj_name_to_bone))
     bpy.context.scene.frame_set(1)
     assert xplane_file.rootBone, "Root Bone was not assigned during __init__ function"
     return xplane_file
@@ -176,6 +211,16 @@ def _pre_scan_all_keyframes():
     else:
         scene_keyframe_infos = collections.defaultdict(dict)
 
+    with profiler.phase("_pre_scan_all_keyframes") as phase:
+        _pre_scan_all_keyframes_uncached(scene_keyframe_infos)
+        phase.set(objects=len(scene_keyframe_infos))
+    bpy.context.scene.frame_set(1)
+    _all_keyframe_infos[bpy.context.scene.name] = scene_keyframe_infos
+    return
+
+
+def _pre_scan_all_keyframes_uncached(scene_keyframe_infos) -> None:
+    """Fills scene_keyframe_infos with every object and bone's LocRotPerFrame"""
     # A set of all keyframes that could have data we care about
     frames_to_visit = sorted(
         {
@@ -214,9 +259,6 @@ def _pre_scan_all_keyframes():
             scene_keyframe_infos[(obj.name, None)][frame_num] = l
         # --- End objects to visit ---------------
     # --- End frames to visit---------------------
-    bpy.context.scene.frame_set(1)
-    _all_keyframe_infos[bpy.context.scene.name] = scene_keyframe_infos
-    return
 
 
 class XPlaneFile:
@@ -692,6 +734,44 @@ class XPlaneFile:
 
         return True
 
+    def validateDatarefs(self) -> None:
+        """
+        Warns about datarefs used in this OBJ that don't match DataRefs.txt,
+        see xplane_dataref_usage.validate_usages
+        """
+        usage_index = xplane_dataref_usage.dataref_usage_index
+        usages = usage_index.usages_of_datablock(self.options.id_data)
+
+        def collect_usages(bone: XPlaneBone) -> None:
+            if bone.blenderBone:
+                armature = bone.blenderBone.id_data
+                usages.extend(
+                    usage
+                    for usage in usage_index.usages_of_datablock(armature)
+                    if usage.bone_name == bone.blenderBone.name
+                )
+            elif bone.blenderObject and bone.blenderObject != self.options.id_data:
+                usages.extend(usage_index.usages_of_datablock(bone.blenderObject))
+                if bone.blenderObject.type == "LIGHT":
+                    usages.extend(
+                        usage_index.usages_of_datablock(bone.blenderObject.data)
+                    )
+            for child in bone.children:
+                collect_usages(child)
+
+        collect_usages(self.rootBone)
+        materials = {
+            slot.material
+            for xplane_object in self.get_xplane_objects()
+            for slot in xplane_object.blenderObject.material_slots
+            if slot.material
+        }
+        for material in materials:
+            usages.extend(usage_index.usages_of_datablock(material))
+
+        # A Light or Material can be shared, but only needs checking once
+        xplane_dataref_usage.validate_usages(dict.fromkeys(usages))
+
     def getMaterials(self) -> List[bpy.types.Material]:
         """
         Returns a list of the materials used in the OBJ, or an empty list if none found
@@ -761,7 +841,9 @@ class XPlaneFile:
         Writes the contents of the file to one giant string with \n's,
         to be written to a file or compared in a unit test
         """
-        self.mesh.collectXPlaneObjects(self.get_xplane_objects())
+        with profiler.phase("collectXPlaneObjects", root=self.filename) as phase:
+            self.mesh.collectXPlaneObjects(self.get_xplane_objects())
+            phase.set(vertices=len(self.mesh.vertices), indices=len(self.mesh.indices))
 
         # - validateMaterials() > every object's material's XPlaneMaterial.isValid > xplane_material_utils.validate
         # - getReferenceMaterials can end up revalidating all of self.getMaterials
@@ -771,14 +853,18 @@ class XPlaneFile:
         # always acts consistently. Nothing mysteriously works based on co-incidence or superstition
         # and no "reference material" can be used without all materials being consistenly correct.
         # The downside is tediousness when one material is slightly wrong
-        if not self.validateMaterials():
-            return ""
+        with profiler.phase("validateMaterials", root=self.filename):
+            if not self.validateMaterials():
+                return ""
         if not self.validateOptions():
             return ""
+        with profiler.phase("validateDatarefs", root=self.filename):
+            self.validateDatarefs()
 
-        self.referenceMaterials = xplane_material_utils.getReferenceMaterials(
-            self.getMaterials(), self.options.export_type
-        )
+        with profiler.phase("getReferenceMaterials", root=self.filename):
+            self.referenceMaterials = xplane_material_utils.getReferenceMaterials(
+                self.getMaterials(), self.options.export_type
+            )
 
         refMatNames = [refMat.name for refMat in self.referenceMaterials if refMat]
         logger.info(
@@ -789,14 +875,17 @@ class XPlaneFile:
         # if self.options.autodetectTextures == False:
         #    logger.info('Autodetect textures overridden for file %s: not fully checking manually entered textures against Blender-based reference materials\' textures' % (self.filename))
 
-        if not self.compareMaterials(self.referenceMaterials):
-            return ""
+        with profiler.phase("compareMaterials", root=self.filename):
+            if not self.compareMaterials(self.referenceMaterials):
+                return ""
 
         o = ""
-        o += self.header.write()
+        with profiler.phase("XPlaneHeader.write", root=self.filename):
+            o += self.header.write()
         o += "\n"
 
-        meshOut = self.mesh.write()
+        with profiler.phase("XPlaneMesh.write", root=self.filename):
+            meshOut = self.mesh.write()
         o += meshOut
 
         if len(meshOut):
@@ -931,9 +1020,15 @@ class XPlaneFile:
             # or subsequent calls to commands.write
             for lod_bucket_index, lod_bucket in enumerate(defined_buckets):
                 o += f"ATTR_LOD\t{lod_bucket.near}\t{lod_bucket.far}\n"
-                o += self.commands.write(lod_bucket_index=lod_bucket_index)
+                with profiler.phase(
+                    "XPlaneCommands.write",
+                    root=self.filename,
+                    lod_bucket=str(lod_bucket_index),
+                ):
+                    o += self.commands.write(lod_bucket_index=lod_bucket_index)
         else:
-            o += self.commands.write(lod_bucket_index=None)
+            with profiler.phase("XPlaneCommands.write", root=self.filename):
+                o += self.commands.write(lod_bucket_index=None)
 
         # print(o)
         return o
@@ -14,6 +14,8 @@ from ..xplane_helpers import (
     effective_normal_metalness,
     effective_normal_metalness_draped,
     floatToStr,
+    get_absolute_path,
+    get_relative_path,
     logger,
     resolveBlenderPath,
     is_path_decal_lib
@@ -22,6 +24,7 @@ from .xplane_attribute import XPlaneAttribute, XPlaneAttributeName
 from .xplane_attributes import XPlaneAttributes
 
 from ..xplane_utils.xplane_effective_gloss import get_effective_gloss
+from ..xplane_utils.xplane_profiler import profiler
 
 
 class XPlaneHeader:
@@ -1066,27 +1069,23 @@ class XPlaneHeader:
         else:
             res_path = Path(res_path)
 
-        old_cwd = os.getcwd()
         if bpy.data.filepath:
             # This makes '.' the .blend file directory
-            os.chdir(Path(bpy.data.filepath).parent)
+            base_dir = os.path.dirname(bpy.data.filepath)
         else:
-            os.chdir(Path(export_dir))
+            base_dir = export_dir
 
         try:
-            # 1. '.' is CWD -> Path.resolve
-            # 3. All paths are given '/' sperators -> Path.resolve
-            # 4. '..'s are resolved, '.' is a no-op -> Path.resolve
-            # 5. All paths must be relative to the OBJ -> Path.relative_to(does order of args matter)?
-            # 7. Invalid paths are a validation error -> Path.resolve throws OSError
-            # 8. Paths are minimal, "./path/tex.png" is "path/tex.png" -> Path.resolve
+            # 1. '.' is the base directory -> get_relative_path
+            # 3. All paths are given '/' sperators -> get_relative_path
+            # 4. '..'s are resolved, '.' is a no-op -> os.path.realpath
+            # 5. All paths must be relative to the OBJ -> os.path.relpath
+            # 7. Invalid paths are a validation error -> os.path.realpath throws OSError
+            # 8. Paths are minimal, "./path/tex.png" is "path/tex.png" -> os.path.realpath
             # 10. Absolute paths are okay as long as we can make a relative path os.path.relpath
-            rel_path = os.path.relpath(res_path.resolve(), export_dir).replace(
-                "\\", "/"
-            )
+            return get_relative_path(str(res_path), base_dir, export_dir)
         except OSError:
             logger.error(f"Path '{res_path}' is invalid")
-            os.chdir(old_cwd)
             raise
         except ValueError:
             logger.error(
@@ -1094,11 +1093,7 @@ class XPlaneHeader:
             )
             # 6. If not possible (different drive letter), validation error Path.relative_to ValueError
             # 7. Invalid paths are a validation error -> Path.resolve throws OSError
-            os.chdir(old_cwd)
             raise
-        else:
-            os.chdir(old_cwd)
-            return rel_path
 
     # Method: _getCanonicalTexturePath
     # Returns normalized (canonical) path to texture
@@ -1114,19 +1109,15 @@ class XPlaneHeader:
         if texpath[0:2] == "//":
             texpath = texpath[2:]
 
-        if os.path.isabs(texpath):
-            texpath = os.path.abspath(os.path.normpath(texpath))
-        else:
-            texpath = os.path.abspath(os.path.normpath(os.path.join(blenddir, texpath)))
-
-        return texpath
+        return get_absolute_path(texpath, blenddir)
 
     def write(self) -> str:
         """
         Writes the collected Blender and XPlane2Blender data
         as content for the OBJ
         """
-        self._init()
+        with profiler.phase("XPlaneHeader._init", root=self.xplaneFile.filename):
+            self._init()
         system = platform.system()
 
         # line ending types (I = UNIX/DOS, A = MacOS)
@@ -12,6 +12,7 @@ from io_xplane2blender import xplane_helpers
 from ..xplane_config import getDebug
 from ..xplane_constants import *
 from ..xplane_helpers import floatToStr, logger
+from ..xplane_utils.xplane_profiler import profiler
 from .xplane_face import XPlaneFace
 from .xplane_object import XPlaneObject
 
@@ -57,103 +58,107 @@ class XPlaneMesh:
                 and xplaneObject.xplaneBone
                 and not xplaneObject.export_animation_only
             ):
-                xplaneObject.indices[0] = len(self.indices)
-                first_vertice_of_this_xplaneObject = len(self.vertices)
-
-                # This is the heart of the exporter turning object into VT/IDX table:
-                # - Get the mesh of the object with its modifiers
-                # and transformations applied, rotated and moved by the bake matrix
-                #
-                # After that, the mesh needs to have some of it's data refreshed
-                # - Recalc normals split
-                # - Recalc tessface (now called loop triangles)
-
-                # create a copy of the xplaneObject mesh with modifiers applied and triangulated
-                evaluated_obj = xplaneObject.blenderObject.evaluated_get(dg)
-                mesh = evaluated_obj.to_mesh(
-                    preserve_all_data_layers=False, depsgraph=dg
-                )
-
-                xplaneObject.bakeMatrix = (
-                    xplaneObject.xplaneBone.getBakeMatrixForAttached()
-                )
-                mesh.transform(xplaneObject.bakeMatrix)
-
-                if "calc_normals_split" in mesh:
-                    mesh.calc_normals_split()
-                mesh.calc_loop_triangles()
-                loop_triangles = mesh.loop_triangles
-                try:
-                    uv_layer = mesh.uv_layers[xplaneObject.material.uv_name]
-                except (KeyError, TypeError) as e:
-                    uv_layer = None
-
-                TempFace = collections.namedtuple(
-                    "TempFace",
-                    field_names=[
-                        "original_face",  # type: bpy.types.MeshLoopTriangle
-                        "indices",  # type: Tuple[float, float, float]
-                        "normal",  # type: Tuple[float, float, float]
-                        "split_normals",  # type: Tuple[Tuple[float, float, float], Tuple[float, float, float], Tuple[float, float, float]]
-                        "uvs",  # type: Tuple[mathutils.Vector, mathutils.Vector, mathutils.Vector]
-                    ],
-                )
-                tmp_faces = []  # type: List[TempFace]
-                for tri in mesh.loop_triangles:
-                    tmp_face = TempFace(
-                        original_face=tri,
-                        # BAD NAME ALERT!
-                        # mesh.vertices is the actual vertex table,
-                        # tri.vertices is indices in that vertex table
-                        indices=tri.vertices,
-                        normal=tri.normal,
-                        split_normals=tri.split_normals,
-                        uvs=tuple(
-                            uv_layer.data[loop_index].uv for loop_index in tri.loops
-                        )
-                        if uv_layer
-                        else (mathutils.Vector((0.0, 0.0)),) * 3,
+                with profiler.phase(
+                    "collect_mesh", object=xplaneObject.name
+                ) as phase:
+                    xplaneObject.indices[0] = len(self.indices)
+                    first_vertice_of_this_xplaneObject = len(self.vertices)
+
+                    # This is the heart of the exporter turning object into VT/IDX table:
+                    # - Get the mesh of the object with its modifiers
+                    # and transformations applied, rotated and moved by the bake matrix
+                    #
+                    # After that, the mesh needs to have some of it's data refreshed
+                    # - Recalc normals split
+                    # - Recalc tessface (now called loop triangles)
+
+                    # create a copy of the xplaneObject mesh with modifiers applied and triangulated
+                    evaluated_obj = xplaneObject.blenderObject.evaluated_get(dg)
+                    mesh = evaluated_obj.to_mesh(
+                        preserve_all_data_layers=False, depsgraph=dg
                     )
-                    tmp_faces.append(tmp_face)
-
-                vertices_dct = {}
-                for tmp_face in tmp_faces:
-                    # To reverse the winding order for X-Plane from CCW to CW,
-                    # we iterate backwards through the mesh data structures
-                    for i in reversed(range(0, 3)):
-                        index = tmp_face.indices[i]
-                        vertex = xplane_helpers.vec_b_to_x(mesh.vertices[index].co)
-                        normal = xplane_helpers.vec_b_to_x(
-                            tmp_face.split_normals[i]
-                            if tmp_face.original_face.use_smooth
-                            else tmp_face.normal
-                        )
-                        uv = tmp_face.uvs[i]
-                        vt_entry = tuple(vertex[:] + normal[:] + uv[:])
-
-                        # Optimization Algorithm:
-                        # Try to find a matching vt_entry's index in the mesh's index table
-                        # If found, skip adding to global vertices list
-                        # If not found (-1), append the new vert, save its vertex
-                        if bpy.context.scene.xplane.optimize:
-                            vindex = vertices_dct.get(vt_entry, -1)
-                        else:
-                            vindex = -1
-
-                        if vindex == -1:
-                            vindex = self.globalindex
-                            self.vertices.append(vt_entry)
-                            self.globalindex += 1
-
-                        if bpy.context.scene.xplane.optimize:
-                            vertices_dct[vt_entry] = vindex
 
-                        self.indices.append(vindex)
-
-                    # store the faces in the prim
-                    xplaneObject.indices[1] = len(self.indices)
-
-                evaluated_obj.to_mesh_clear()
+                    xplaneObject.bakeMatrix = (
+                        xplaneObject.xplaneBone.getBakeMatrixForAttached()
+                    )
+                    mesh.transform(xplaneObject.bakeMatrix)
+
+                    if "calc_normals_split" in mesh:
+                        mesh.calc_normals_split()
+                    mesh.calc_loop_triangles()
+                    loop_triangles = mesh.loop_triangles
+                    try:
+                        uv_layer = mesh.uv_layers[xplaneObject.material.uv_name]
+                    except (KeyError, TypeError) as e:
+                        uv_layer = None
+
+                    TempFace = collections.namedtuple(
+                        "TempFace",
+                        field_names=[
+                            "original_face",  # type: bpy.types.MeshLoopTriangle
+                            "indices",  # type: Tuple[float, float, float]
+                            "normal",  # type: Tuple[float, float, float]
+                            "split_normals",  # type: Tuple[Tuple[float, float, float], Tuple[float, float, float], Tuple[float, float, float]]
+                            "uvs",  # type: Tuple[mathutils.Vector, mathutils.Vector, mathutils.Vector]
+                        ],
+                    )
+                    tmp_faces = []  # type: List[TempFace]
+                    for tri in mesh.loop_triangles:
+                        tmp_face = TempFace(
+                            original_face=tri,
+                            # BAD NAME ALERT!
+                            # mesh.vertices is the actual vertex table,
+                            # tri.vertices is indices in that vertex table
+                            indices=tri.vertices,
+                            normal=tri.normal,
+                            split_normals=tri.split_normals,
+                            uvs=tuple(
+                                uv_layer.data[loop_index].uv for loop_index in tri.loops
+                            )
+                            if uv_layer
+                            else (mathutils.Vector((0.0, 0.0)),) * 3,
+                        )
+                        tmp_faces.append(tmp_face)
+
+                    vertices_dct = {}
+                    for tmp_face in tmp_faces:
+                        # To reverse the winding order for X-Plane from CCW to CW,
+                        # we iterate backwards through the mesh data structures
+                        for i in reversed(range(0, 3)):
+                            index = tmp_face.indices[i]
+                            vertex = xplane_helpers.vec_b_to_x(mesh.vertices[index].co)
+                            normal = xplane_helpers.vec_b_to_x(
+                                tmp_face.split_normals[i]
+                                if tmp_face.original_face.use_smooth
+                                else tmp_face.normal
+                            )
+                            uv = tmp_face.uvs[i]
+                            vt_entry = tuple(vertex[:] + normal[:] + uv[:])
+
+                            # Optimization Algorithm:
+                            # Try to find a matching vt_entry's index in the mesh's index table
+                            # If found, skip adding to global vertices list
+                            # If not found (-1), append the new vert, save its vertex
+                            if bpy.context.scene.xplane.optimize:
+                                vindex = vertices_dct.get(vt_entry, -1)
+                            else:
+                                vindex = -1
+
+                            if vindex == -1:
+                                vindex = self.globalindex
+                                self.vertices.append(vt_entry)
+                                self.globalindex += 1
+
+                            if bpy.context.scene.xplane.optimize:
+                                vertices_dct[vt_entry] = vindex
+
+                            self.indices.append(vindex)
+
+                        # store the faces in the prim
+                        xplaneObject.indices[1] = len(self.indices)
+
+                    phase.set(triangles=len(tmp_faces))
+                    evaluated_obj.to_mesh_clear()
 
     def writeVertices(self) -> str:
         """
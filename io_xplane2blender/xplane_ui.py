@@ -4,12 +4,20 @@ Creates the User Interface for all X-Plane properties.
 
 import collections
 import math
-from typing import Optional, Union
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
 
 import bpy
 from bpy.types import Object, UILayout
 
-from io_xplane2blender import xplane_constants, xplane_props, xplane_types, xplane_utils
+from io_xplane2blender import (
+    xplane_constants,
+    xplane_helpers,
+    xplane_props,
+    xplane_types,
+    xplane_utils,
+)
+from io_xplane2blender.xplane_utils import xplane_path_trie, xplane_search_index
 
 from .xplane_constants import *
 from .xplane_ops import *
@@ -97,10 +105,12 @@ class RENDER_PT_xplane(bpy.types.Panel):
 
             op = row.operator("xplane.bake_wiper_gradient_texture", text=bake_op_text)
             op.start = scene.xplane.wiper_bake_start
+            op.workers = scene.xplane.wiper_bake_workers
 
             row = layout.row()
             row.prop(scene.xplane, "wiper_bake_start")
             row.label(text=f"End Frame: {scene.xplane.wiper_bake_start + 254}")
+            layout.row().prop(scene.xplane, "wiper_bake_workers")
 
         draw_bake_op(self.layout)
 
@@ -327,8 +337,12 @@ def rain_layout(
 
 
 def scene_layout(layout: bpy.types.UILayout, scene: bpy.types.Scene):
-    layout.row().operator("scene.export_to_relative_dir", icon="EXPORT")
     row = layout.row()
+    row.operator("scene.export_to_relative_dir", icon="EXPORT")
+    row.prop(scene.xplane, "incremental_export")
+    row.prop(scene.xplane, "export_jobs")
+    row = layout.row()
+    row.operator("scene.xplane_analyze_render_cost", icon="INFO")
     layout.row().prop(scene.xplane, "version")
 
     xp2b_ver = xplane_helpers.VerStruct.current()
@@ -420,6 +434,8 @@ def scene_dev_layout(layout: bpy.types.UILayout, scene: bpy.types.Scene):
         dev_box_column.prop(scene.xplane, "dev_enable_breakpoints")
         dev_box_column.prop(scene.xplane, "dev_continue_export_on_error")
         dev_box_column.prop(scene.xplane, "dev_export_as_dry_run")
+        dev_box_column.prop(scene.xplane, "dev_profile_export")
+        dev_box_column.prop(scene.xplane, "dev_profile_memory")
         # Exact same operator, more convient place
         dev_box_column.operator("scene.export_to_relative_dir", icon="EXPORT")
         op = dev_box_column.operator(
@@ -978,29 +994,203 @@ def custom_layer_layout(
             subrow.prop(attr, "reset")
 
 
+def _search_window_completions_layout(
+    layout: bpy.types.UILayout,
+    search_window: str,
+    search_index: xplane_search_index.SearchIndex,
+    query: str,
+) -> None:
+    """
+    For path-like queries, draws buttons that complete the next segment of the path
+    """
+    MAX_COMPLETIONS = 8
+    if "/" not in query or " " in query or "|" in query:
+        return
+
+    completions = search_index.path_trie.complete(query)
+    if len(completions) == 1 and completions[0].path == query:
+        return
+
+    column = layout.column(align=True)
+    for node in completions[:MAX_COMPLETIONS]:
+        row = column.row(align=True)
+        row.alignment = "LEFT"
+        complete_op = row.operator(
+            "xplane.search_window_set_query",
+            text=node.path if node.is_leaf else f"{node.path}/ ({node.count})",
+            emboss=False,
+            icon="FILE" if node.is_leaf else "FILE_FOLDER",
+        )
+        complete_op.search_window = search_window
+        complete_op.query = node.path if node.is_leaf else node.path + "/"
+    if len(completions) > MAX_COMPLETIONS:
+        column.label(text=f"...and {len(completions) - MAX_COMPLETIONS} more")
+
+
+def _search_window_page_layout(
+    layout: bpy.types.UILayout,
+    search_window: str,
+    search_index: xplane_search_index.SearchIndex,
+    query: str,
+    page: int,
+    draw_result: Callable[[bpy.types.UILayout, Any, str], None],
+) -> None:
+    """
+    Draws only the rows of the current page of search results,
+    followed by the page controls
+    """
+    num_results = search_index.count(query)
+    num_pages = max(
+        1, math.ceil(num_results / xplane_search_index.RESULTS_PAGE_SIZE)
+    )
+    page = min(page, num_pages - 1)
+
+    column = layout.column(align=True)
+    for i in search_index.search_page(query, page):
+        item = search_index.items[i]
+        draw_result(column.row(align=True), item, "")
+
+    row = layout.row(align=True)
+    prev_op = row.operator(
+        "xplane.search_window_change_page", text="", icon="TRIA_LEFT"
+    )
+    prev_op.search_window = search_window
+    prev_op.page = max(0, page - 1)
+    row.label(text=f"Page {page + 1} of {num_pages} ({num_results} results)")
+    next_op = row.operator(
+        "xplane.search_window_change_page", text="", icon="TRIA_RIGHT"
+    )
+    next_op.search_window = search_window
+    next_op.page = min(num_pages - 1, page + 1)
+
+
+def _search_window_tree_layout(
+    layout: bpy.types.UILayout,
+    search_window: str,
+    search_index: xplane_search_index.SearchIndex,
+    draw_result: Callable[[bpy.types.UILayout, Any, str], None],
+) -> None:
+    """
+    Draws the path tree browser. Only nodes the user has expanded are drawn
+    (or even computed), one level at a time
+    """
+    expanded = XPLANE_OT_SearchWindowTreeToggle.expanded[search_window]
+    column = layout.column(align=True)
+
+    def indented_row(depth: int) -> bpy.types.UILayout:
+        row = column.row(align=True)
+        row.alignment = "LEFT"
+        for _ in range(depth):
+            row.label(text="", icon="BLANK1")
+        return row
+
+    def draw_node(node: xplane_path_trie.PathTrieNode) -> None:
+        for child in node.children:
+            if child.is_leaf:
+                draw_result(indented_row(child.depth - 1), child.item, child.name)
+                continue
+
+            is_expanded = child.path in expanded
+            toggle_op = indented_row(child.depth - 1).operator(
+                "xplane.search_window_tree_toggle",
+                text=f"{child.name} ({child.count})",
+                emboss=False,
+                icon="DISCLOSURE_TRI_DOWN" if is_expanded else "DISCLOSURE_TRI_RIGHT",
+            )
+            toggle_op.search_window = search_window
+            toggle_op.path = child.path
+            if is_expanded:
+                # Rare, but a path can also be the prefix of another
+                if child.item is not None:
+                    draw_result(indented_row(child.depth), child.item, child.name)
+                draw_node(child)
+
+    draw_node(search_index.path_trie.root)
+
+
+def _search_window_layout(
+    layout: bpy.types.UILayout,
+    search_window: str,
+    search_index: Union[xplane_search_index.SearchIndex, str],
+    query: str,
+    page: int,
+    draw_result: Callable[[bpy.types.UILayout, Any, str], None],
+) -> None:
+    """
+    Draws the tree browser when there is no query,
+    otherwise any path completions and the current page of search results
+    """
+    if isinstance(search_index, str):
+        layout.label(text=search_index, icon="ERROR")
+    elif not query.strip():
+        _search_window_tree_layout(layout, search_window, search_index, draw_result)
+    else:
+        _search_window_completions_layout(layout, search_window, search_index, query)
+        _search_window_page_layout(
+            layout, search_window, search_index, query, page, draw_result
+        )
+
+
 def command_search_window_layout(layout):
+    # Imported here, it imports xplane_export, which imports this
+    from io_xplane2blender.xplane_utils import xplane_commands_txt_parser
+
     scene = bpy.context.scene
-    row = layout.row()
-    row.template_list(
-        "XPLANE_UL_CommandSearchList",
-        "",
-        scene.xplane.command_search_window_state,
-        "command_search_list",
-        scene.xplane.command_search_window_state,
-        "command_search_list_idx",
+    state = scene.xplane.command_search_window_state
+    box = layout.box()
+    box.prop(state, "command_search_query", text="", icon="VIEWZOOM")
+
+    def draw_result(row: bpy.types.UILayout, command_info, text: str) -> None:
+        row.alignment = "LEFT"
+        row.operator(
+            "xplane.command_search_pick",
+            text=text or command_info.command,
+            emboss=False,
+        ).command = command_info.command
+        row.label(text="|")
+        row.label(text=command_info.description or "")
+
+    _search_window_layout(
+        box,
+        "COMMAND",
+        xplane_commands_txt_parser.get_commands_txt_search_index(
+            Path(xplane_helpers.get_plugin_resources_folder(), "Commands.txt").as_posix()
+        ),
+        state.command_search_query,
+        state.command_search_page,
+        draw_result,
     )
 
 
 def dataref_search_window_layout(layout):
+    from io_xplane2blender.xplane_utils import xplane_datarefs_txt_parser
+
     scene = bpy.context.scene
-    row = layout.row()
-    row.template_list(
-        "XPLANE_UL_DatarefSearchList",
-        "",
-        scene.xplane.dataref_search_window_state,
-        "dataref_search_list",
-        scene.xplane.dataref_search_window_state,
-        "dataref_search_list_idx",
+    state = scene.xplane.dataref_search_window_state
+    box = layout.box()
+    box.prop(state, "dataref_search_query", text="", icon="VIEWZOOM")
+
+    def draw_result(row: bpy.types.UILayout, dref_info, text: str) -> None:
+        row.alignment = "LEFT"
+        row.operator(
+            "xplane.dataref_search_pick", text=text or dref_info.path, emboss=False
+        ).dataref_path = dref_info.path
+        row.label(text="|")
+        row.label(text=dref_info.type)
+        row.label(text="|")
+        row.label(text=dref_info.is_writable)
+        row.label(text="|")
+        row.label(text=dref_info.units)
+
+    _search_window_layout(
+        box,
+        "DATAREF",
+        xplane_datarefs_txt_parser.get_datarefs_txt_search_index(
+            Path(xplane_helpers.get_plugin_resources_folder(), "DataRefs.txt").as_posix()
+        ),
+        state.dataref_search_query,
+        state.dataref_search_page,
+        draw_result,
     )
 
 
@@ -1918,162 +2108,6 @@ def weight_layout(layout: bpy.types.UILayout, obj: bpy.types.Object) -> None:
         row.prop(obj.xplane, "weight")
 
 
-class XPLANE_UL_CommandSearchList(bpy.types.UIList):
-    import io_xplane2blender.xplane_utils.xplane_commands_txt_parser
-
-    def draw_item(
-        self,
-        context,
-        layout,
-        data,
-        item,
-        icon,
-        active_data,
-        active_propname,
-        index,
-        flt_flag,
-    ):
-
-        # Ben says: this is a total hack.  By just BASHING the filter, we open it always, rather than making the user open it.
-        # Sadly there's no sane way to open the filter programmatically because Blender - the UI never gets access to the UIList
-        # derivative, and we don't know its constructor syntax to override it.
-        self.use_filter_show = True
-        if self.layout_type in {"DEFAULT", "COMPACT"}:
-            # This code makes labels - highlighting the label acts like a click via trickery
-            layout.alignment = "EXPAND"
-            row = layout.row(align=True)
-            row.alignment = "LEFT"
-            row.label(text=item.command, icon="NONE")
-            row.label(text="|")
-            row.label(text=item.command_description, icon="NONE")
-            return
-
-        elif self.layout_type in {"GRID"}:
-            pass
-
-    def draw_filter(self, context, layout):
-        row = layout.row()
-        subrow = row.row(align=True)
-        subrow.prop(self, "filter_name", text="")
-
-    # Called once to filter/reorder items.
-    def filter_items(self, context, data, propname):
-        flt_flags = []
-        flt_neworder = []
-
-        filter_name = self.filter_name
-        if filter_name == "":
-            return flt_flags, flt_neworder
-
-        # Search info:
-        # A set of one or more unique searches (split on |) composed of one or more unique search terms (split by ' ')
-        # A command must match at least one search in all searches, and must partially match each search term
-        search_info = []
-        for search in filter_name.upper().split("|"):
-            search_info.append(frozenset(search.split(" ")))
-        search_info = set(search_info)
-
-        def check_command(command_path: str, search_info: List[str]) -> bool:
-            upper_command = command_path.upper()
-            for search in search_info:
-                for search_term in search:
-                    if not search_term in upper_command:
-                        break
-                else:
-                    return True
-            return False
-
-        for (
-            command_info
-        ) in bpy.context.scene.xplane.command_search_window_state.command_search_list:
-            if check_command(command_info.command, search_info):
-                flt_flags.append(self.bitflag_filter_item)
-            else:
-                flt_flags.append(0 << 0)
-
-        return flt_flags, flt_neworder
-
-
-class XPLANE_UL_DatarefSearchList(bpy.types.UIList):
-    import io_xplane2blender.xplane_utils.xplane_datarefs_txt_parser
-
-    def draw_item(
-        self,
-        context,
-        layout,
-        data,
-        item,
-        icon,
-        active_data,
-        active_propname,
-        index,
-        flt_flag,
-    ):
-
-        # Ben says: this is a total hack.  By just BASHING the filter, we open it always, rather than making the user open it.
-        # Sadly there's no sane way to open the filter programmatically because Blender - the UI never gets access to the UIList
-        # derivative, and we don't know its constructor syntax to override it.
-        self.use_filter_show = True
-        if self.layout_type in {"DEFAULT", "COMPACT"}:
-            # This code makes labels - highlighting the label acts like a click via trickery
-            layout.alignment = "EXPAND"
-            row = layout.row(align=True)
-            row.alignment = "LEFT"
-            row.label(text=item.dataref_path, icon="NONE")
-            row.label(text="|")
-            row.label(text=item.dataref_type, icon="NONE")
-            row.label(text="|")
-            row.label(text=item.dataref_is_writable, icon="NONE")
-            row.label(text="|")
-            row.label(text=item.dataref_units, icon="NONE")
-            return
-
-        elif self.layout_type in {"GRID"}:
-            pass
-
-    def draw_filter(self, context, layout):
-        row = layout.row()
-        subrow = row.row(align=True)
-        subrow.prop(self, "filter_name", text="")
-
-    # Called once to filter/reorder items.
-    def filter_items(self, context, data, propname):
-        flt_flags = []
-        flt_neworder = []
-
-        filter_name = self.filter_name
-        if filter_name == "":
-            return flt_flags, flt_neworder
-
-        # Search info:
-        # A set of one or more unique searches (split on |) composed of one or more unique search terms (split by ' ')
-        # A dataref must match at least one search in all searches, and must partially match each search term
-        search_info = []
-        for search in filter_name.upper().split("|"):
-            search_info.append(frozenset(search.split(" ")))
-        search_info = set(search_info)
-
-        def check_dref(dataref_path: str, search_info: List[str]) -> bool:
-            upper_dref = dataref_path.upper()
-            for search in search_info:
-                for search_term in search:
-                    if not search_term in upper_dref:
-                        break
-                else:
-                    return True
-            return False
-
-        for (
-            dref
-        ) in bpy.context.scene.xplane.dataref_search_window_state.dataref_search_list:
-            if check_dref(dref.dataref_path, search_info):
-                flt_flags.append(self.bitflag_filter_item)
-            else:
-                flt_flags.append(0 << 0)
-
-        return flt_flags, flt_neworder
-
-
 _XPlaneUITypes = (
     BONE_PT_xplane,
     DATA_PT_xplane,
@@ -2081,8 +2115,6 @@ _XPlaneUITypes = (
     OBJECT_PT_xplane,
     RENDER_PT_xplane,
     SCENE_PT_xplane,
-    XPLANE_UL_CommandSearchList,
-    XPLANE_UL_DatarefSearchList,
 )
 
 register, unregister = bpy.utils.register_classes_factory(_XPlaneUITypes)
@@ -38,7 +38,19 @@ import functools
 import itertools
 import pprint
 import re
-from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Union
+import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 
 import bpy
 from bpy.app.handlers import persistent
@@ -263,7 +275,7 @@ def _update_LocRot(
         )
 
 
-def _rollback_blend_glass(logger: XPlaneLogger) -> None:
+def _rollback_blend_glass(mat: bpy.types.Material, logger: XPlaneLogger) -> None:
     """
     Side Effects: mat.xplane.blend_glass may change, mat.xplane.blend_v1100 deleted
 
@@ -272,35 +284,34 @@ def _rollback_blend_glass(logger: XPlaneLogger) -> None:
 
     This saves Blend Glass (if needed) before blend_v1100 is deleted
     """
-    for mat in bpy.data.materials:
-        v10 = mat.xplane.get("blend_v1000")
-        v11 = mat.xplane.get("blend_v1100")
-
-        if v11 == 3:  # Aka, where BLEND_GLASS was in the enum
-            # v4.1.0 note - we've moved blend_glass to the header
-            # but I don't want to change the rest of this function
-            # So... we fake it to match later expectations!
-            mat["xplane"]["blend_glass"] = True
-
-            # This bit of code reachs around Blender's magic EnumProperty
-            # stuff and get at the RNA behind it, all to find the name.
-            # If the default for blend_v1000 ever changes, we'll be covered.
-            blend_v1000 = xplane_props.XPlaneMaterialSettings.bl_rna.properties[
-                "blend_v1000"
-            ]
-            enum_items = blend_v1000.enum_items
+    v10 = mat.xplane.get("blend_v1000")
+    v11 = mat.xplane.get("blend_v1100")
+
+    if v11 == 3:  # Aka, where BLEND_GLASS was in the enum
+        # v4.1.0 note - we've moved blend_glass to the header
+        # but I don't want to change the rest of this function
+        # So... we fake it to match later expectations!
+        mat["xplane"]["blend_glass"] = True
+
+        # This bit of code reachs around Blender's magic EnumProperty
+        # stuff and get at the RNA behind it, all to find the name.
+        # If the default for blend_v1000 ever changes, we'll be covered.
+        blend_v1000 = xplane_props.XPlaneMaterialSettings.bl_rna.properties[
+            "blend_v1000"
+        ]
+        enum_items = blend_v1000.enum_items
 
-            if v10 is None:
-                v10_mode = enum_items[enum_items.find(blend_v1000.default)].name
-            else:
-                v10_mode = enum_items[v10].name
-            logger.info(
-                'Set material "{name}"\'s Blend Glass property to true and its Blend Mode to {v10_mode}'.format(
-                    name=mat.name, v10_mode=v10_mode
-                )
+        if v10 is None:
+            v10_mode = enum_items[enum_items.find(blend_v1000.default)].name
+        else:
+            v10_mode = enum_items[v10].name
+        logger.info(
+            'Set material "{name}"\'s Blend Glass property to true and its Blend Mode to {v10_mode}'.format(
+                name=mat.name, v10_mode=v10_mode
             )
+        )
 
-        xplane_updater_helpers.delete_property_from_datablock(mat.xplane, "blend_v1100")
+    xplane_updater_helpers.delete_property_from_datablock(mat.xplane, "blend_v1100")
 
 
 def _set_shadow_local_and_delete_global_shadow(
@@ -332,7 +343,7 @@ def _set_shadow_local_and_delete_global_shadow(
     def _print_error_table(
         material_uses: Dict[bpy.types.Material, List[UsedLayerInfo]]
     ) -> None:
-        error_count = len(logger.findErrors())
+        error_count = logger.countErrors()
         for mat, layers_used_in in material_uses.items():
             if len(layers_used_in) > 1 and any(
                 layers_used_in[0].cast_shadow != l.cast_shadow for l in layers_used_in
@@ -357,7 +368,7 @@ def _set_shadow_local_and_delete_global_shadow(
                         ]
                     )
                 )
-        if len(logger.findErrors()) > error_count:
+        if logger.countErrors() > error_count:
             logger.info(
                 "'Cast shadows' has been replaced by the Material's 'Cast Shadows (Local)'."
                 " The above OBJs may have incorrect shadows unless 'Cast Shadows (Local)'"
@@ -492,122 +503,234 @@ def _move_global_material_props(
                     )
 
 
-def _panel_to_cockpit_feature(logger: xplane_helpers.XPlaneLogger):
-    for mat in bpy.data.materials:
-        mat.xplane.cockpit_feature = (
-            xplane_constants.COCKPIT_FEATURE_PANEL
-            if mat.xplane.get("panel", False)
-            else xplane_constants.COCKPIT_FEATURE_NONE
-        )
+def _update_light_intensity(light: bpy.types.Light, logger: XPlaneLogger) -> None:
+    light_intensity = xplane_updater_helpers.delete_property_from_datablock(
+        light.xplane, "param_intensity"
+    )
 
+    if light_intensity != None:
+        light.xplane.param_intensity_new = light_intensity
 
-def _regions_change_panel_mode(logger: xplane_helpers.XPlaneLogger):
-    for col in bpy.data.collections:
-        col.xplane.layer.cockpit_panel_mode = (
-            xplane_constants.PANEL_COCKPIT_REGION
-            if int(col.xplane.layer.cockpit_regions)
-            else col.xplane.layer.cockpit_panel_mode
-        )
 
-def _update_light_intensities(logger: xplane_helpers.XPlaneLogger):
-    for light in bpy.data.lights:
-        light_intensity = xplane_updater_helpers.delete_property_from_datablock(light.xplane, "param_intensity")
-        
-        if light_intensity != None:
-            light.xplane.param_intensity_new = light_intensity
+def _delete_pre_4_0_0_alpha_6_layer_props(
+    has_layer: Union[bpy.types.Collection, bpy.types.Object], logger: XPlaneLogger
+) -> None:
+    """
+    Side Effects: Disables autodetect textures, deletes the XPlaneLayer's
+    "index" and "Include in Export"
+
+    I acknowledge that the 3_3_0 updater already has code like this,
+    however it doesn't matter much since most people aren't coming from
+    that anymore /s
+    """
+    has_layer.xplane.layer.autodetectTextures = False
+    xplane_updater_helpers.delete_property_from_datablock(
+        has_layer.xplane.layer, "index"
+    )
+    xplane_updater_helpers.delete_property_from_datablock(
+        has_layer.xplane.layer, "export"
+    )
+
+
+def _delete_export_mesh(obj: bpy.types.Object, logger: XPlaneLogger) -> None:
+    xplane_updater_helpers.delete_property_from_datablock(obj.xplane, "export_mesh")
+
+
+def _delete_export_mode(scene: bpy.types.Scene, logger: XPlaneLogger) -> None:
+    xplane_updater_helpers.delete_property_from_datablock(scene.xplane, "exportMode")
+
+
+def _set_default_light_type(light: bpy.types.Light, logger: XPlaneLogger) -> None:
+    # Remember, get returning 0 and return None means something different
+    if light.xplane.get("type") is None:
+        light.xplane.type = xplane_constants.LIGHT_DEFAULT
+
+
+def _panel_to_cockpit_feature(mat: bpy.types.Material, logger: XPlaneLogger) -> None:
+    mat.xplane.cockpit_feature = (
+        xplane_constants.COCKPIT_FEATURE_PANEL
+        if mat.xplane.get("panel", False)
+        else xplane_constants.COCKPIT_FEATURE_NONE
+    )
+
+
+def _regions_change_panel_mode(col: bpy.types.Collection, logger: XPlaneLogger) -> None:
+    col.xplane.layer.cockpit_panel_mode = (
+        xplane_constants.PANEL_COCKPIT_REGION
+        if int(col.xplane.layer.cockpit_regions)
+        else col.xplane.layer.cockpit_panel_mode
+    )
+
+
+def _pad_layer_props(
+    has_layer: Union[bpy.types.Collection, bpy.types.Object], logger: XPlaneLogger
+) -> None:
+    """
+    Since someone could add lods/cockpit_regions just before export, export needs to be the one
+    to validate the size of the collection
+    """
+    layer_props = has_layer.xplane.layer
+    while len(layer_props.lod) < xplane_constants.MAX_LODS - 1:
+        layer_props.lod.add()
+    while len(layer_props.cockpit_region) < xplane_constants.MAX_COCKPIT_REGIONS:
+        layer_props.cockpit_region.add()
+
+
+class _Migration(NamedTuple):
+    """
+    What a file last saved before version needs, either run once over the whole file,
+    or visits, (datablock type, function) pairs called with every datablock of that type
+    """
+
+    version: str
+    name: str
+    run: Optional[Callable[[XPlaneLogger], None]] = None
+    visits: Tuple[Tuple[str, Callable[[Any, XPlaneLogger], None]], ...] = ()
+
+
+# In the order they're applied. Migrations that visit datablocks share one traversal
+# of bpy.data with the ones around them, those that run over the whole file can't
+# fmt: off
+_MIGRATIONS = (
+    _Migration("4.3.2", "Light intensities", visits=(("lights", _update_light_intensity),)),
+    _Migration("4.0.0", "Layers to collections", run=_layers_to_collection),
+    _Migration("3.3.0", "Pre-3.3.0 properties", run=_change_pre_3_3_0_properties),
+    _Migration(
+        "3.4.0",
+        "Loc, Rot, and LocRot to Transform",
+        visits=(("bones", _update_LocRot), ("objects", _update_LocRot)),
+    ),
+    _Migration(
+        "3.5.0-beta.2+32.20180725010500",
+        "Blend Glass rollback",
+        visits=(("materials", _rollback_blend_glass),),
+    ),
+    _Migration(
+        "3.5.1-dev.0+43.20190606030000",
+        "Cast Shadows to Cast Shadows (Local)",
+        run=_set_shadow_local_and_delete_global_shadow,
+    ),
+    _Migration(
+        "4.0.0-alpha.6+71.20200207171400",
+        "Pre-4.0.0-alpha.6 properties",
+        visits=(
+            ("collections", _delete_pre_4_0_0_alpha_6_layer_props),
+            ("objects", _delete_pre_4_0_0_alpha_6_layer_props),
+            ("objects", _delete_export_mesh),
+            ("scenes", _delete_export_mode),
+        ),
+    ),
+    _Migration(
+        "4.0.0-beta.2+88.20200622133200",
+        "Default light type",
+        visits=(("lights", _set_default_light_type),),
+    ),
+    _Migration(
+        "4.1.0-alpha.1+92.20201020151500",
+        "Material properties to OBJ settings",
+        run=_move_global_material_props,
+    ),
+    _Migration(
+        "4.1.0-alpha.1+97.20201109172400",
+        "Panel to Cockpit Feature",
+        visits=(("materials", _panel_to_cockpit_feature),),
+    ),
+    _Migration(
+        "4.1.0-beta.1+100.20201117112800",
+        "Regions change panel mode",
+        visits=(("collections", _regions_change_panel_mode),),
+    ),
+)
+# fmt: on
+
+_PAD_LAYER_PROPS = _Migration(
+    "",
+    "Missing LODs and cockpit regions",
+    visits=(("collections", _pad_layer_props), ("objects", _pad_layer_props)),
+)
+
+# Datablock type: Every datablock of it, in the order they're traversed
+_DATABLOCKS = {
+    "scenes": lambda: bpy.data.scenes[:],
+    "collections": lambda: bpy.data.collections[:],
+    "objects": lambda: bpy.data.objects[:],
+    "bones": lambda: [bone for arm in bpy.data.armatures for bone in arm.bones],
+    "materials": lambda: bpy.data.materials[:],
+    "lights": lambda: bpy.data.lights[:],
+}  # type: Dict[str, Callable[[], List[Any]]]
+
+
+def _traverse(migrations: List[_Migration], logger: XPlaneLogger) -> int:
+    """
+    Visits every datablock a migration visits once, calling all its
+    migrations' functions for it in order. Returns how many were visited
+    """
+    visitors = collections.defaultdict(
+        list
+    )  # type: Dict[str, List[Callable[[Any, XPlaneLogger], None]]]
+    for migration in migrations:
+        for datablock_type, visit in migration.visits:
+            visitors[datablock_type].append(visit)
+
+    num_visited = 0
+    for datablock_type, get_datablocks in _DATABLOCKS.items():
+        if datablock_type not in visitors:
+            continue
+        type_visitors = visitors[datablock_type]
+        for datablock in get_datablocks():
+            for visit in type_visitors:
+                visit(datablock, logger)
+            num_visited += 1
+    return num_visited
+
 
 def update(
-    last_version: xplane_helpers.VerStruct, logger: xplane_helpers.XPlaneLogger
+    last_version: xplane_helpers.VerStruct,
+    logger: xplane_helpers.XPlaneLogger,
+    pad_layer_props: bool = False,
 ) -> None:
     """
     Entry point for the updater, which may change or delete XPlane2Blender
     properties of this .blend file to match the data model of this version of XPlane2Blender.
     Adding new properties to the data model is done elsewhere.
 
+    Only the migrations last_version needs are applied, and bpy.data is traversed
+    once for all the ones between those that run over the whole file. If
+    pad_layer_props, missing LODs and cockpit regions are added in the last traversal.
+    How long each took is logged
+
     Re-running the updater should result in no changes
     """
-    if last_version < xplane_helpers.VerStruct.parse_version("4.3.2"):
-        _update_light_intensities(logger)
-            
-    if last_version < xplane_helpers.VerStruct.parse_version("4.0.0"):
-        _layers_to_collection(logger)
-
-    if last_version < xplane_helpers.VerStruct.parse_version("3.3.0"):
-        _change_pre_3_3_0_properties(logger)
-
-    if last_version < xplane_helpers.VerStruct.parse_version("3.4.0"):
-        for arm in bpy.data.armatures:
-            for bone in arm.bones:
-                # Thanks to Python's duck typing and Blender's PointerProperties, this works
-                _update_LocRot(bone, logger)
-
-        for obj in bpy.data.objects:
-            _update_LocRot(obj, logger)
-
-    if last_version < xplane_helpers.VerStruct.parse_version(
-        "3.5.0-beta.2+32.20180725010500"
-    ):
-        _rollback_blend_glass(logger)
-
-    if last_version < xplane_helpers.VerStruct.parse_version(
-        "3.5.1-dev.0+43.20190606030000"
-    ):
-        _set_shadow_local_and_delete_global_shadow(logger)
-
-    if last_version < xplane_helpers.VerStruct.parse_version(
-        "4.0.0-alpha.6+71.20200207171400"
-    ):
-        # --- Disable autodetect textures --------------------------------------
-
-        # I acknowledge that the 3_3_0 updater already has code like this,
-        # however it doesn't matter much since most people aren't coming from
-        # that anymore /s
-        for has_layer in bpy.data.collections[:] + bpy.data.objects[:]:
-            has_layer.xplane.layer.autodetectTextures = False
-        # --- Delete "exportMode" ----------------------------------------------
-        for scene in bpy.data.scenes:
-            xplane_updater_helpers.delete_property_from_datablock(
-                scene.xplane, "exportMode"
-            )
-        # ----------------------------------------------------------------------
-        # --- Delete index -----------------------------------------------------
-        for has_layer in bpy.data.collections[:] + bpy.data.objects[:]:
-            xplane_updater_helpers.delete_property_from_datablock(
-                has_layer.xplane.layer, "index"
-            )
-        # ----------------------------------------------------------------------
-        # --- Delete XPlaneObjectSettings.export_mesh---------------------------
-        for obj in bpy.data.objects:
-            xplane_updater_helpers.delete_property_from_datablock(
-                obj.xplane, "export_mesh"
+    needed = [
+        migration
+        for migration in _MIGRATIONS
+        if last_version < xplane_helpers.VerStruct.parse_version(migration.version)
+    ]
+    if pad_layer_props:
+        needed.append(_PAD_LAYER_PROPS)
+
+    # Migrations that share a traversal, or one that runs over the whole file
+    steps = []  # type: List[List[_Migration]]
+    for migration in needed:
+        if migration.run or not steps or steps[-1][-1].run:
+            steps.append([migration])
+        else:
+            steps[-1].append(migration)
+
+    for step in steps:
+        start = time.perf_counter()
+        if step[0].run:
+            step[0].run(logger)
+            logger.info(
+                f"Updated {step[0].name} in {(time.perf_counter() - start) * 1000:.1f} ms"
             )
-        # ----------------------------------------------------------------------
-        # --- Delete all XPlaneLayer's "Include in Export" ---------------------
-        for has_layer in bpy.data.collections[:] + bpy.data.objects[:]:
-            xplane_updater_helpers.delete_property_from_datablock(
-                has_layer.xplane.layer, "export"
+        else:
+            num_visited = _traverse(step, logger)
+            logger.info(
+                f"Updated {', '.join(migration.name for migration in step)}"
+                f" ({num_visited} datablocks)"
+                f" in {(time.perf_counter() - start) * 1000:.1f} ms"
             )
-        # ----------------------------------------------------------------------
-
-    if last_version < xplane_helpers.VerStruct.parse_version(
-        "4.0.0-beta.2+88.20200622133200"
-    ):
-        # Remember, get returning 0 and return None means something different
-        for light in filter(lambda l: l.xplane.get("type") is None, bpy.data.lights):
-            light.xplane.type = xplane_constants.LIGHT_DEFAULT
-
-    if last_version < xplane_helpers.VerStruct.parse_version(
-        "4.1.0-alpha.1+92.20201020151500"
-    ):
-        _move_global_material_props(logger)
-    if last_version < xplane_helpers.VerStruct.parse_version(
-        "4.1.0-alpha.1+97.20201109172400"
-    ):
-        _panel_to_cockpit_feature(logger)
-    if last_version < xplane_helpers.VerStruct.parse_version(
-        "4.1.0-beta.1+100.20201117112800"
-    ):
-        _regions_change_panel_mode(logger)
 
 
 def _synchronize_last_version_across_histories(last_version: xplane_helpers.VerStruct):
@@ -621,6 +744,8 @@ def _synchronize_last_version_across_histories(last_version: xplane_helpers.VerS
 def load_handler(dummy):
     from io_xplane2blender.xplane_utils import xplane_lights_txt_parser
 
+    load_start = time.perf_counter()
+
     # --- Setup logger (Startup) ----------------------------------------------
     logger = xplane_helpers.logger
     logger.clear()
@@ -631,11 +756,29 @@ def load_handler(dummy):
     logger.addTransport(XPlaneLogger.ConsoleTransport())
     # -------------------------------------------------------------------------
     for scene in bpy.data.scenes:
-        # _search_list_idx is not updated because it would call onclick_dataref
-        # and is always changed on click. Stale data shouldn't be a problem.
-        scene.xplane.command_search_window_state.command_search_list.clear()
+        # Older versions copied all of DataRefs.txt and Commands.txt into
+        # every scene that opened a search window, and saved it.
+        # The search index now only lives in memory, so we clean up what's left
+        for window_state, search_list in (
+            ("command_search_window_state", "command_search_list"),
+            ("dataref_search_window_state", "dataref_search_list"),
+        ):
+            try:
+                window_state_idprop = scene["xplane"][window_state]
+            except KeyError:
+                continue
+            num_items = len(window_state_idprop.get(search_list, ()))
+            xplane_updater_helpers.delete_property_from_datablock(
+                window_state_idprop, search_list
+            )
+            xplane_updater_helpers.delete_property_from_datablock(
+                window_state_idprop, search_list + "_idx"
+            )
+            if num_items:
+                logger.info(
+                    f"Deleted {num_items} saved {search_list} items from scene '{scene.name}'"
+                )
         scene.xplane.command_search_window_state.command_prop_dest = ""
-        scene.xplane.dataref_search_window_state.dataref_search_list.clear()
         scene.xplane.dataref_search_window_state.dataref_prop_dest = ""
     # --- Parse lights.txt file -----------------------------------------------
     try:
@@ -674,21 +817,21 @@ def load_handler(dummy):
         )
     # -------------------------------------------------------------------------
 
-    # --- Add/Correct Layer Props ---------------------------------------------
-    for layer_props in [
-        has_layer_props.xplane.layer
-        for has_layer_props in bpy.data.objects[:] + bpy.data.collections[:]
-    ]:
-        # Since someone could add lods/cockpit_regions just before export, export needs to be the one
-        # to validate the size of the collection
-        while len(layer_props.lod) < xplane_constants.MAX_LODS - 1:
-            layer_props.lod.add()
-        while len(layer_props.cockpit_region) < xplane_constants.MAX_COCKPIT_REGIONS:
-            layer_props.cockpit_region.add()
-    # -------------------------------------------------------------------------
+    current_version = xplane_helpers.VerStruct.current()
 
     # do not update newly created files
     if not bpy.context.blend_data.filepath:
+        # ...but a startup file from another version may be missing LODs and cockpit regions
+        startup_versions = [
+            xplane_helpers.VerStruct.from_version_entry(
+                scene.xplane.xplane2blender_ver_history[-1]
+            )
+            for scene in bpy.data.scenes
+            if scene.xplane.xplane2blender_ver_history
+        ]
+        if not startup_versions or max(startup_versions) != current_version:
+            update(current_version, logger, pad_layer_props=True)
+        logger.flush()
         return
 
     assert bpy.data.filepath, "We've missed the new file check"
@@ -701,8 +844,6 @@ def load_handler(dummy):
     logger.addTransport(XPlaneLogger.ConsoleTransport())
     # -------------------------------------------------------------------------
 
-    current_version = xplane_helpers.VerStruct.current()
-
     def handle_legacy_idprop(scene: bpy.types.Scene):
         if scene.get("xplane2blender_version") != xplane_constants.DEPRECATED_XP2B_VER:
             # "3.2.0 was the last version without an updater, so default to that."
@@ -741,7 +882,7 @@ def load_handler(dummy):
         logger.info(
             f"The current addon version, '{current_version}', is greater than the previous version, '{last_version}'. The updater will run as needed."
         )
-        update(last_version, logger)
+        update(last_version, logger, pad_layer_props=True)
 
         logger.success(
             f"Your file was successfully updated to XPlane2Blender {current_version}"
@@ -751,10 +892,18 @@ def load_handler(dummy):
             f"DANGER: VERSION ISSUE MAY CORRUPT WORK! CHECK BLENDER AND ADDON VERSION. You have opened this file in an older version of XPlane2Blender."
             f" If saved and opened with a later version, the updater may re-run and overwrite data."
         )
+        # No migrations, but it may have fewer LODs or cockpit regions than we expect
+        update(last_version, logger, pad_layer_props=True)
+    # Files saved with this version are already padded, new LODs and cockpit
+    # regions are added when they're needed by update_lods and update_cockpit_regions
 
     # Add the current version to the history, no matter what. Just in case it means something
     _synchronize_last_version_across_histories(current_version)
     logger.info(f"Added '{current_version}' to version history")
+    logger.info(
+        f"Load handler finished in {(time.perf_counter() - load_start) * 1000:.1f} ms"
+    )
+    logger.flush()
 
 
 bpy.app.handlers.load_post.append(load_handler)
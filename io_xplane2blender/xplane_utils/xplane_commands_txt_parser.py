@@ -8,6 +8,7 @@ from typing import List, Optional, Union
 
 from io_xplane2blender import xplane_helpers
 from io_xplane2blender.xplane_export import showLogDialog
+from io_xplane2blender.xplane_utils.xplane_search_index import SearchIndex
 
 
 """
@@ -45,6 +46,7 @@ class CommandInfoStruct:
 
 
 _commands_txt_content = {}  # type: Dict[str,List[CommandInfoStruct]]
+_commands_txt_search_index = {}  # type: Dict[str,SearchIndex]
 
 
 def parse_commands_txt(filepath: str) -> Union[List[CommandInfoStruct], str]:
@@ -82,6 +84,7 @@ def parse_commands_txt(filepath: str) -> Union[List[CommandInfoStruct], str]:
                 return last_error
             else:
                 _commands_txt_content[filepath] = file_contents
+                _commands_txt_search_index.pop(filepath, None)
                 return _commands_txt_content[filepath]
 
     except Exception as e:
@@ -94,3 +97,16 @@ def get_commands_txt_file_content(filepath: str) -> Union[List[CommandInfoStruct
     else:
         # Lazy parsing of file
         return parse_commands_txt(filepath)
+
+
+def get_commands_txt_search_index(filepath: str) -> Union[SearchIndex, str]:
+    """
+    Returns a SearchIndex over the contents of a Commands.txt file,
+    parsing the file and building the index on first use, or an error string
+    """
+    if filepath not in _commands_txt_search_index:
+        content = get_commands_txt_file_content(filepath)
+        if isinstance(content, str):
+            return content
+        _commands_txt_search_index[filepath] = SearchIndex.from_commands(content)
+    return _commands_txt_search_index[filepath]
@@ -0,0 +1,385 @@
+"""
+A scene-wide index of which datablocks use which datarefs.
+
+The index is built once, the first time something asks it a question,
+then kept up to date one datablock at a time from the depsgraph and the
+dataref properties' update callbacks. Undo, redo, and loading a file throw
+it away to be rebuilt on next use, as does adding or removing datablocks.
+
+Where a dataref is used:
+- Object, Bone: xplane.datarefs[].path (animation, show/hide)
+- Object, Material: xplane.lightLevel_dataref when Light Level is overridden
+- Object: xplane.manip.dataref1/2 for manipulators that write datarefs
+- Light: xplane.dataref
+- Object, Collection: xplane.layer.rain wipers and thermal sources, for roots
+"""
+
+import os
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+
+import bpy
+from bpy.app.handlers import persistent
+
+from io_xplane2blender import xplane_constants, xplane_helpers
+
+_ARRAY_INDEX_RE = re.compile(r"^(.*?)\[(\d+)\]$")
+
+# Manipulator types whose dataref(s) are taken from animations when autodetect is on,
+# matching what the Manipulator panel shows
+_MANIPULATORS_AUTODETECT_EXPLICIT = {xplane_constants.MANIP_DRAG_AXIS}
+_MANIPULATORS_AUTODETECT_IMPLICIT = {
+    xplane_constants.MANIP_DRAG_AXIS_DETENT,
+    xplane_constants.MANIP_DRAG_ROTATE,
+    xplane_constants.MANIP_DRAG_ROTATE_DETENT,
+}
+_MANIPULATORS_DATAREF2 = {
+    xplane_constants.MANIP_DRAG_XY,
+    xplane_constants.MANIP_DRAG_AXIS_DETENT,
+    xplane_constants.MANIP_DRAG_ROTATE_DETENT,
+}
+
+
+class DatarefUsage(NamedTuple):
+    """
+    One place a dataref is used. prop is the property's path from the datablock
+    (or bone), such as 'xplane.datarefs[0].path'
+    """
+
+    id_type: str  # "OBJECT", "ARMATURE", "MATERIAL", "LIGHT", or "COLLECTION"
+    id_name: str
+    bone_name: Optional[str]
+    prop: str
+    dataref: str  # As written by the user, including any array index
+    path: str  # Without any array index
+    array_index: Optional[int]
+    is_written: bool  # True if the datablock writes to the dataref, like a manipulator
+
+    @property
+    def owner(self) -> str:
+        """A name for the user, like 'Object 'Knob'' or 'Bone 'Armature:Needle''"""
+        if self.bone_name is not None:
+            return f"Bone '{self.id_name}:{self.bone_name}'"
+        return f"{self.id_type.title()} '{self.id_name}'"
+
+
+def split_array_index(dataref: str) -> Tuple[str, Optional[int]]:
+    """
+    Splits 'sim/path[3]' into ('sim/path', 3), and 'sim/path' into ('sim/path', None)
+    """
+    match = _ARRAY_INDEX_RE.match(dataref)
+    if match:
+        return match.group(1), int(match.group(2))
+    return dataref, None
+
+
+def _scan_datarefs(
+    usages: List[DatarefUsage],
+    id_type: str,
+    id_name: str,
+    bone_name: Optional[str],
+    props: Iterable[Tuple[str, str, bool]],
+) -> None:
+    for prop, dataref, is_written in props:
+        dataref = dataref.strip()
+        if not dataref or dataref == "none":
+            continue
+        path, array_index = split_array_index(dataref)
+        usages.append(
+            DatarefUsage(
+                id_type,
+                id_name,
+                bone_name,
+                prop,
+                dataref,
+                path,
+                array_index,
+                is_written,
+            )
+        )
+
+
+def _layer_props(layer: "xplane_props.XPlaneLayer") -> Iterable[Tuple[str, str, bool]]:
+    rain = layer.rain
+    for i in range(1, 5):
+        if getattr(rain, f"wiper_{i}_enabled"):
+            yield (
+                f"xplane.layer.rain.wiper_{i}.dataref",
+                getattr(rain, f"wiper_{i}").dataref,
+                False,
+            )
+        if getattr(rain, f"thermal_source_{i}_enabled"):
+            yield (
+                f"xplane.layer.rain.thermal_source_{i}.dataref_on_off",
+                getattr(rain, f"thermal_source_{i}").dataref_on_off,
+                False,
+            )
+
+
+def _manip_props(manip: "xplane_props.XPlaneManipulatorSettings"):
+    manip_type = manip.type
+    if (
+        manip_type == xplane_constants.MANIP_NOOP
+        or manip_type.startswith("command")
+        or (
+            manip_type in _MANIPULATORS_AUTODETECT_EXPLICIT
+            and manip.autodetect_settings_opt_in
+            and manip.autodetect_datarefs
+        )
+        or (
+            manip_type in _MANIPULATORS_AUTODETECT_IMPLICIT
+            and manip.autodetect_datarefs
+        )
+    ):
+        return
+    yield ("xplane.manip.dataref1", manip.dataref1, True)
+    if manip_type in _MANIPULATORS_DATAREF2:
+        # A detent axis dataref is only read
+        yield (
+            "xplane.manip.dataref2",
+            manip.dataref2,
+            manip_type == xplane_constants.MANIP_DRAG_XY,
+        )
+
+
+def scan_datablock(datablock: bpy.types.ID) -> List[DatarefUsage]:
+    """
+    Returns every dataref usage stored on a single Object, Armature,
+    Material, Light, or Collection. Other datablocks have none
+    """
+    usages = []  # type: List[DatarefUsage]
+    name = datablock.name
+    if isinstance(datablock, bpy.types.Object):
+        xp = datablock.xplane
+        _scan_datarefs(
+            usages,
+            "OBJECT",
+            name,
+            None,
+            (
+                (f"xplane.datarefs[{i}].path", dref.path, False)
+                for i, dref in enumerate(xp.datarefs)
+            ),
+        )
+        if xp.lightLevel:
+            _scan_datarefs(
+                usages,
+                "OBJECT",
+                name,
+                None,
+                [("xplane.lightLevel_dataref", xp.lightLevel_dataref, False)],
+            )
+        if xp.manip.enabled:
+            _scan_datarefs(usages, "OBJECT", name, None, _manip_props(xp.manip))
+        if xp.isExportableRoot:
+            _scan_datarefs(usages, "OBJECT", name, None, _layer_props(xp.layer))
+    elif isinstance(datablock, bpy.types.Armature):
+        for bone in datablock.bones:
+            _scan_datarefs(
+                usages,
+                "ARMATURE",
+                name,
+                bone.name,
+                (
+                    (f"xplane.datarefs[{i}].path", dref.path, False)
+                    for i, dref in enumerate(bone.xplane.datarefs)
+                ),
+            )
+    elif isinstance(datablock, bpy.types.Material):
+        if datablock.xplane.lightLevel:
+            _scan_datarefs(
+                usages,
+                "MATERIAL",
+                name,
+                None,
+                [
+                    (
+                        "xplane.lightLevel_dataref",
+                        datablock.xplane.lightLevel_dataref,
+                        False,
+                    )
+                ],
+            )
+    elif isinstance(datablock, bpy.types.Light):
+        _scan_datarefs(
+            usages,
+            "LIGHT",
+            name,
+            None,
+            [("xplane.dataref", datablock.xplane.dataref, False)],
+        )
+    elif isinstance(datablock, bpy.types.Collection):
+        if datablock.xplane.is_exportable_collection:
+            _scan_datarefs(
+                usages, "COLLECTION", name, None, _layer_props(datablock.xplane.layer)
+            )
+    return usages
+
+
+_INDEXED_TYPES = (
+    bpy.types.Object,
+    bpy.types.Armature,
+    bpy.types.Material,
+    bpy.types.Light,
+    bpy.types.Collection,
+)
+
+
+def _indexed_datablocks() -> Iterable[bpy.types.ID]:
+    yield from bpy.data.objects
+    yield from bpy.data.armatures
+    yield from bpy.data.materials
+    yield from bpy.data.lights
+    yield from bpy.data.collections
+
+
+def _datablock_counts() -> Tuple[int, ...]:
+    return (
+        len(bpy.data.objects),
+        len(bpy.data.armatures),
+        len(bpy.data.materials),
+        len(bpy.data.lights),
+        len(bpy.data.collections),
+    )
+
+
+class DatarefUsageIndex:
+    """
+    Maps dataref paths (without array indices) to the datablocks that use them.
+
+    Datablocks are keyed by their pointer, which survives renames, and each
+    path knows only which datablocks use it. Rescanning a datablock touches only
+    the paths it used before and uses now
+    """
+
+    def __init__(self):
+        self._built = False
+        self._counts = ()  # type: Tuple[int, ...]
+        self._by_datablock = {}  # type: Dict[int, List[DatarefUsage]]
+        self._by_path = {}  # type: Dict[str, Set[int]]
+
+    def invalidate(self) -> None:
+        """Throws away the index, it will be rebuilt the next time it is used"""
+        self._built = False
+        self._by_datablock.clear()
+        self._by_path.clear()
+
+    def _ensure_built(self) -> None:
+        # Depsgraph updates don't tell us about deleted datablocks,
+        # so any change in how many there are means starting over
+        if self._built and self._counts == _datablock_counts():
+            return
+        self.invalidate()
+        for datablock in _indexed_datablocks():
+            self._set_usages(datablock.as_pointer(), scan_datablock(datablock))
+        self._counts = _datablock_counts()
+        self._built = True
+
+    def _set_usages(self, key: int, usages: List[DatarefUsage]) -> None:
+        for usage in self._by_datablock.pop(key, ()):
+            keys = self._by_path.get(usage.path)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_path[usage.path]
+        if usages:
+            self._by_datablock[key] = usages
+            for usage in usages:
+                self._by_path.setdefault(usage.path, set()).add(key)
+
+    def update_datablock(self, datablock: bpy.types.ID) -> None:
+        """
+        Rescans a single datablock. Does nothing if the index hasn't been built yet,
+        since the datablock will be scanned when it is
+        """
+        if self._built and isinstance(datablock, _INDEXED_TYPES):
+            self._set_usages(datablock.as_pointer(), scan_datablock(datablock))
+
+    def usages(self, dataref: str) -> List[DatarefUsage]:
+        """
+        Returns every use of a dataref. Any array index in dataref is ignored,
+        so 'sim/path' and 'sim/path[2]' both find 'sim/path[0]' and 'sim/path[1]'
+        """
+        self._ensure_built()
+        path = split_array_index(dataref.strip())[0]
+        return [
+            usage
+            for key in self._by_path.get(path, ())
+            for usage in self._by_datablock[key]
+            if usage.path == path
+        ]
+
+    def usages_of_datablock(self, datablock: bpy.types.ID) -> List[DatarefUsage]:
+        self._ensure_built()
+        return list(self._by_datablock.get(datablock.as_pointer(), ()))
+
+    def paths(self) -> List[str]:
+        """Every dataref path used in this file, sorted"""
+        self._ensure_built()
+        return sorted(self._by_path)
+
+
+dataref_usage_index = DatarefUsageIndex()
+
+
+@persistent
+def _depsgraph_update_post_handler(scene, depsgraph):
+    if not dataref_usage_index._built:
+        return
+    for update in depsgraph.updates:
+        datablock = update.id.original
+        dataref_usage_index.update_datablock(datablock)
+
+
+@persistent
+def _invalidate_handler(dummy):
+    dataref_usage_index.invalidate()
+
+
+bpy.app.handlers.depsgraph_update_post.append(_depsgraph_update_post_handler)
+bpy.app.handlers.load_post.append(_invalidate_handler)
+bpy.app.handlers.undo_post.append(_invalidate_handler)
+bpy.app.handlers.redo_post.append(_invalidate_handler)
+
+
+def _get_datarefs_txt_lookup() -> Union[Dict[str, "DatarefInfoStruct"], str]:
+    # Imported here to avoid an import cycle through xplane_export
+    from io_xplane2blender.xplane_utils import xplane_datarefs_txt_parser
+
+    return xplane_datarefs_txt_parser.get_datarefs_txt_lookup(
+        os.path.join(xplane_helpers.get_plugin_resources_folder(), "DataRefs.txt")
+    )
+
+
+def validate_usages(usages: Iterable[DatarefUsage]) -> None:
+    """
+    Warns about array indices out of bounds, array indices on non-array datarefs,
+    and manipulators writing read-only datarefs, according to DataRefs.txt.
+    Datarefs DataRefs.txt doesn't know about, like those from plugins, are skipped
+    """
+    logger = xplane_helpers.logger
+    lookup = _get_datarefs_txt_lookup()
+    if isinstance(lookup, str):
+        logger.warn(f"Could not check datarefs against DataRefs.txt: {lookup}")
+        return
+
+    for usage in usages:
+        info = lookup.get(usage.path)
+        if info is None:
+            continue
+        if usage.array_index is not None:
+            if not info.is_array_type:
+                logger.warn(
+                    f"{usage.owner}'s {usage.prop} '{usage.dataref}' has an array index,"
+                    f" but '{usage.path}' is not an array"
+                )
+            elif info.array_size and usage.array_index >= info.array_size:
+                logger.warn(
+                    f"{usage.owner}'s {usage.prop} '{usage.dataref}' is out of bounds,"
+                    f" '{usage.path}' has {info.array_size} elements"
+                )
+        if usage.is_written and info.is_writable != "y":
+            logger.warn(
+                f"{usage.owner}'s {usage.prop} '{usage.dataref}' is written by"
+                f" a manipulator, but '{usage.path}' is read-only"
+            )
@@ -4,10 +4,11 @@ import re
 import sys
 from collections import OrderedDict
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Union
 
 from io_xplane2blender import xplane_helpers
 from io_xplane2blender.xplane_export import showLogDialog
+from io_xplane2blender.xplane_utils.xplane_search_index import SearchIndex
 
 
 """
@@ -89,6 +90,8 @@ class DatarefInfoStruct:
 
 
 _datarefs_txt_content = {}  # type: Dict[str,List[DatarefInfoStruct]]
+_datarefs_txt_search_index = {}  # type: Dict[str,SearchIndex]
+_datarefs_txt_lookup = {}  # type: Dict[str,Dict[str,DatarefInfoStruct]]
 
 
 def parse_datarefs_txt(filepath: str) -> Union[List[DatarefInfoStruct], str]:
@@ -143,6 +146,8 @@ def parse_datarefs_txt(filepath: str) -> Union[List[DatarefInfoStruct], str]:
                 return "File has no datarefs in it"
 
             _datarefs_txt_content[filepath] = file_contents
+            _datarefs_txt_search_index.pop(filepath, None)
+            _datarefs_txt_lookup.pop(filepath, None)
             return _datarefs_txt_content[filepath]
     except Exception as e:
         return e.args[1]
@@ -154,3 +159,29 @@ def get_datarefs_txt_file_content(filepath: str) -> Union[List[DatarefInfoStruct
     else:
         # Lazy parsing of file
         return parse_datarefs_txt(filepath)
+
+
+def get_datarefs_txt_search_index(filepath: str) -> Union[SearchIndex, str]:
+    """
+    Returns a SearchIndex over the contents of a DataRefs.txt file,
+    parsing the file and building the index on first use, or an error string
+    """
+    if filepath not in _datarefs_txt_search_index:
+        content = get_datarefs_txt_file_content(filepath)
+        if isinstance(content, str):
+            return content
+        _datarefs_txt_search_index[filepath] = SearchIndex.from_datarefs(content)
+    return _datarefs_txt_search_index[filepath]
+
+
+def get_datarefs_txt_lookup(filepath: str) -> Union[Dict[str, DatarefInfoStruct], str]:
+    """
+    Returns a dict of path to DatarefInfoStruct for the contents of a DataRefs.txt file,
+    parsing the file on first use, or an error string
+    """
+    if filepath not in _datarefs_txt_lookup:
+        content = get_datarefs_txt_file_content(filepath)
+        if isinstance(content, str):
+            return content
+        _datarefs_txt_lookup[filepath] = {dref.path: dref for dref in content}
+    return _datarefs_txt_lookup[filepath]
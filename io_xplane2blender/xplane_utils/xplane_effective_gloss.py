@@ -1,6 +1,49 @@
+"""
+Estimates the effective gloss of a normal map decal, for NORMAL_DECAL_PARAMS(_PROJ).
+
+Estimating means loading and fitting the whole image, so results are cached,
+keyed by the image's absolute path, modification time, and size. The cache
+lives in memory and, once the .blend is saved, in GLOSS_CACHE_FILENAME next to it,
+so exporting many OBJs sharing a decal (or exporting again tomorrow) only pays once.
+"""
+
+import json
+import math
+import os
+from typing import Dict, Iterator, Optional, Tuple
+
 import numpy
 import bpy
 
+from io_xplane2blender.xplane_utils.xplane_profiler import profiler
+
+try:
+    # Reads images a few rows at a time, without making Image datablocks
+    import OpenImageIO
+except ImportError:
+    OpenImageIO = None
+
+GLOSS_CACHE_FILENAME = "xplane2blender_gloss_cache.json"
+
+# Bump when the estimation changes, so old cache files are ignored
+_GLOSS_CACHE_VERSION = 2
+
+ALPHA_CANDIDATES = 100
+HISTOGRAM_BINS = 2 * ALPHA_CANDIDATES
+
+# Roughly how much of an image is read at once
+TILE_BYTES = 16 * 1024 * 1024
+
+# How sure we want to be that a sampled histogram is within max_error
+SAMPLE_CONFIDENCE = 0.99
+
+# Absolute path of the image -> (mtime_ns, size, gloss)
+_GlossCache = Dict[str, Tuple[int, int, float]]
+
+# Cache file path (or "" for an unsaved .blend) -> its contents
+_gloss_caches = {}  # type: Dict[str, _GlossCache]
+
+
 def ggx_distribution_cdf(x, alpha):
     sin_x_squared = numpy.sin(x) ** 2
     cos_x_squared = numpy.cos(x) ** 2
@@ -9,35 +52,226 @@ def ggx_distribution_cdf(x, alpha):
 
     return sin_x_squared / (cos_x_squared * (alpha_squared - 1) + 1)
 
-def get_effective_gloss(file_path) -> float:
-    alpha = 0.5
 
+def _open_row_tiles_oiio(
+    file_path: str,
+) -> Optional[Tuple[int, Iterator[numpy.ndarray]]]:
+    image_input = OpenImageIO.ImageInput.open(file_path)
+    if image_input is None:
+        return None
+    spec = image_input.spec()
+    channels = min(spec.nchannels, 2)
+    tile_rows = max(1, TILE_BYTES // (spec.width * channels * 4))
+
+    def row_tiles():
+        try:
+            for y in range(spec.y, spec.y + spec.height, tile_rows):
+                tile = image_input.read_scanlines(
+                    0,
+                    0,
+                    y,
+                    min(y + tile_rows, spec.y + spec.height),
+                    0,
+                    0,
+                    channels,
+                    OpenImageIO.FLOAT,
+                )
+                if tile is None:
+                    return
+                yield tile.reshape(-1, channels)
+        finally:
+            image_input.close()
+
+    return spec.width * spec.height, row_tiles()
+
+
+def _open_row_tiles_bpy(
+    file_path: str,
+) -> Optional[Tuple[int, Iterator[numpy.ndarray]]]:
     try:
         image = bpy.data.images.load(file_path)
     except RuntimeError:
-        image = None
-
-    if image != None:
-        precision = 100
-        
-        normals = 2 * numpy.array(image.pixels, dtype=float) - 1
-        normals = numpy.reshape(normals, (image.size[1], image.size[0], image.channels))
-
-        angles = numpy.arccos(numpy.sqrt(numpy.clip(1 - numpy.sum(normals[:, :, :2] ** 2, axis=2), 0, 1)))
-        
-        histogram, bins = numpy.histogram(angles, bins=(2 * precision), range=(0, numpy.pi / 2), density=True)
-        histogram *= bins[1:] - bins[:-1]
-        
-        error = numpy.inf
-        
-        for current_alpha in numpy.linspace(1 / precision, 1, precision):
-            expected = ggx_distribution_cdf(bins, current_alpha)
-            expected = expected[1:] - expected[:-1]
-
-            current_error = numpy.sum(numpy.abs(expected - histogram))
-            
-            if current_error < error:
-                error = current_error
-                alpha = current_alpha
-
-    return float(numpy.clip((1 - numpy.sqrt(alpha)) / 0.96875, 0, 1))
\ No newline at end of file
+        return None
+
+    try:
+        width, height = image.size
+        channels = image.channels
+        # One float32 copy of the image, no float64 or per pixel temporaries
+        pixels = numpy.empty(width * height * channels, dtype=numpy.float32)
+        image.pixels.foreach_get(pixels)
+    finally:
+        # Once we have the pixels, the image is no use to anyone
+        bpy.data.images.remove(image)
+
+    pixels = pixels.reshape(-1, channels)
+    tile_pixels = max(width, TILE_BYTES // (channels * 4))
+    return (
+        len(pixels),
+        (
+            pixels[start : start + tile_pixels, :2]
+            for start in range(0, len(pixels), tile_pixels)
+        ),
+    )
+
+
+def _open_row_tiles(file_path: str) -> Optional[Tuple[int, Iterator[numpy.ndarray]]]:
+    """
+    Returns how many pixels an image has and an iterator over rows of them,
+    as (num_pixels, channels) float32 arrays with values from 0 to 1, at most
+    TILE_BYTES at a time, with only the red and green channels.
+    Returns None if the image can't be read.
+
+    With OpenImageIO (bundled with newer Blenders) only a tile is ever in memory,
+    otherwise the image is loaded through bpy.data.images and copied once
+    """
+    if OpenImageIO is not None:
+        return _open_row_tiles_oiio(file_path)
+    else:
+        return _open_row_tiles_bpy(file_path)
+
+
+def _angle_histogram(
+    file_path: str, max_error: Optional[float] = None
+) -> Optional[numpy.ndarray]:
+    """
+    Returns the fraction of the normal map's pixels whose angle from straight up
+    falls into each of HISTOGRAM_BINS bins between 0 and pi/2, or None if the
+    image couldn't be read.
+
+    Angles are never computed, each pixel's x^2 + y^2 is compared against the
+    bin edges' sin^2 instead. With max_error, only a random sample of pixels
+    is counted, large enough that (with SAMPLE_CONFIDENCE) the histogram's CDF
+    is within max_error of the whole image's (Dvoretzky-Kiefer-Wolfowitz)
+    """
+    opened = _open_row_tiles(file_path)
+    if opened is None:
+        return None
+    num_pixels, row_tiles = opened
+
+    edges = numpy.sin(numpy.linspace(0, numpy.pi / 2, HISTOGRAM_BINS + 1)) ** 2
+    # The last bin includes pi/2, like numpy.histogram's does
+    inner_edges = edges[1:-1].astype(numpy.float32)
+    counts = numpy.zeros(HISTOGRAM_BINS, dtype=numpy.int64)
+
+    sample_rate = 1.0
+    if max_error:
+        num_samples = math.log(2 / (1 - SAMPLE_CONFIDENCE)) / (2 * max_error ** 2)
+        sample_rate = min(1.0, num_samples / max(num_pixels, 1))
+    # Seeded, so exporting the same texture twice gives the same gloss
+    rng = numpy.random.default_rng(0)
+
+    for tile in row_tiles:
+        if sample_rate < 1:
+            tile = tile[rng.random(len(tile), dtype=numpy.float32) < sample_rate]
+        xy = tile * numpy.float32(2) - numpy.float32(1)
+        xy *= xy
+        r_squared = xy[:, 0]
+        if xy.shape[1] > 1:
+            r_squared += xy[:, 1]
+        counts += numpy.bincount(
+            numpy.searchsorted(inner_edges, r_squared, side="right"),
+            minlength=HISTOGRAM_BINS,
+        )
+
+    total = counts.sum()
+    if not total:
+        return None
+    return counts / total
+
+
+def _fit_ggx_alpha(histogram: numpy.ndarray) -> float:
+    """
+    Returns the candidate GGX alpha whose distribution is closest (L1) to histogram,
+    all candidates fitted at once
+    """
+    bins = numpy.linspace(0, numpy.pi / 2, HISTOGRAM_BINS + 1)
+    alphas = numpy.linspace(1 / ALPHA_CANDIDATES, 1, ALPHA_CANDIDATES)
+    expected = numpy.diff(ggx_distribution_cdf(bins, alphas[:, numpy.newaxis]), axis=1)
+    errors = numpy.abs(expected - histogram).sum(axis=1)
+    # argmin picks the first of any ties, smallest alpha wins
+    return float(alphas[numpy.argmin(errors)])
+
+
+def _estimate_gloss(file_path: str, max_error: Optional[float] = None) -> float:
+    histogram = _angle_histogram(file_path, max_error)
+    alpha = _fit_ggx_alpha(histogram) if histogram is not None else 0.5
+    return float(numpy.clip((1 - numpy.sqrt(alpha)) / 0.96875, 0, 1))
+
+
+def _get_gloss_cache_filepath() -> str:
+    """The cache file next to the .blend, or "" if the .blend has never been saved"""
+    if bpy.data.filepath:
+        return os.path.join(os.path.dirname(bpy.data.filepath), GLOSS_CACHE_FILENAME)
+    return ""
+
+
+def _get_gloss_cache(cache_filepath: str) -> _GlossCache:
+    if cache_filepath not in _gloss_caches:
+        cache = {}  # type: _GlossCache
+        if cache_filepath:
+            try:
+                with open(cache_filepath) as cache_file:
+                    contents = json.load(cache_file)
+                if contents.get("version") == _GLOSS_CACHE_VERSION:
+                    cache = {
+                        path: (int(mtime_ns), int(size), float(gloss))
+                        for path, (mtime_ns, size, gloss) in contents["entries"].items()
+                    }
+            except (OSError, ValueError, KeyError, TypeError, AttributeError):
+                # Missing or corrupt, we'll make a new one
+                pass
+        _gloss_caches[cache_filepath] = cache
+    return _gloss_caches[cache_filepath]
+
+
+def _save_gloss_cache(cache_filepath: str, cache: _GlossCache) -> None:
+    if not cache_filepath:
+        return
+    tmp_filepath = cache_filepath + ".tmp"
+    try:
+        with open(tmp_filepath, "w") as cache_file:
+            json.dump(
+                {"version": _GLOSS_CACHE_VERSION, "entries": cache},
+                cache_file,
+                indent=1,
+                sort_keys=True,
+            )
+        # Atomic, so two Blenders exporting at once can't leave half a file
+        os.replace(tmp_filepath, cache_filepath)
+    except OSError:
+        # Read-only folders just mean no cache between sessions
+        pass
+
+
+def clear_gloss_cache() -> None:
+    """Forgets all cached estimates in memory. Cache files on disk are left alone"""
+    _gloss_caches.clear()
+
+
+def get_effective_gloss(file_path: str, max_error: Optional[float] = None) -> float:
+    """
+    Returns the effective gloss of the normal map at file_path (which may be
+    relative to the .blend), estimating it only if the file has changed since last time.
+
+    max_error allows estimating from a sample of the pixels, see _angle_histogram.
+    Only exact estimates are cached, but a cached exact estimate is always used
+    """
+    abs_path = os.path.normpath(bpy.path.abspath(file_path))
+    try:
+        stat = os.stat(abs_path)
+    except OSError:
+        # Nothing to key on, but nothing expensive to load either
+        return _estimate_gloss(abs_path)
+
+    cache_filepath = _get_gloss_cache_filepath()
+    cache = _get_gloss_cache(cache_filepath)
+    cached = cache.get(abs_path)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+
+    with profiler.phase("estimate_gloss", path=abs_path):
+        gloss = _estimate_gloss(abs_path, max_error)
+    if not max_error:
+        cache[abs_path] = (stat.st_mtime_ns, stat.st_size, gloss)
+        _save_gloss_cache(cache_filepath, cache)
+    return gloss
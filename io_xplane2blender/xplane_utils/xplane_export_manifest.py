@@ -0,0 +1,536 @@
+"""
+Incremental export: fingerprints what an exportable root's OBJ is made from,
+so an unchanged root can be skipped before any mesh is evaluated.
+
+Fingerprints are kept in EXPORT_MANIFEST_FILENAME next to the .blend,
+keyed by the OBJ's absolute path. A root is skipped only if its fingerprint
+matches and its OBJ is still there.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+import bpy
+import numpy
+
+import io_xplane2blender
+from io_xplane2blender import xplane_helpers
+
+EXPORT_MANIFEST_FILENAME = "xplane2blender_export_manifest.json"
+
+# Bump when what goes into a fingerprint changes
+_EXPORT_MANIFEST_VERSION = 2
+
+# UI only, changing these changes no OBJ
+_IGNORED_SCENE_PROPS = {
+    "command_search_window_state",
+    "dataref_search_window_state",
+    "dev_profile_export",
+    "dev_profile_memory",
+    "expanded_non_exporting_collections",
+    "export_jobs",
+    "incremental_export",
+    "wiper_bake_start",
+    "wiper_bake_workers",
+}
+
+# Every ID has these, things like user counts that change with nothing to export
+_ID_PROPS = frozenset(prop.identifier for prop in bpy.types.ID.bl_rna.properties)
+
+# XPlaneLayer properties whose images get_effective_gloss reads for the header
+_NORMAL_DECAL_PROPS = (
+    "file_normal_decal1",
+    "file_normal_decal2",
+    "file_draped_normal_decal1",
+    "file_draped_normal_decal2",
+)
+
+# Modifiers whose inputs aren't fingerprinted, a root using one is always exported
+_UNHASHABLE_MODIFIERS = {"NODES"}
+
+_lights_txt_digest = None  # type: Optional[str]
+
+# Absolute path: (st_mtime_ns, st_size, sha1 of its contents)
+_file_digests = {}  # type: Dict[str, Tuple[int, int, str]]
+
+
+def _get_lights_txt_digest() -> str:
+    global _lights_txt_digest
+    if _lights_txt_digest is None:
+        with open(
+            os.path.join(xplane_helpers.get_plugin_resources_folder(), "lights.txt"),
+            "rb",
+        ) as lights_txt:
+            _lights_txt_digest = hashlib.sha1(lights_txt.read()).hexdigest()
+    return _lights_txt_digest
+
+
+def _hash_file(hasher: "hashlib._Hash", filepath: str) -> None:
+    """Hashes the contents of the file at filepath, which may be .blend relative"""
+    abs_path = os.path.normpath(bpy.path.abspath(filepath)) if filepath else ""
+    try:
+        stat = os.stat(abs_path)
+    except OSError:
+        _hash_value(hasher, (filepath, None))
+        return
+    cached = _file_digests.get(abs_path)
+    if not cached or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+        with open(abs_path, "rb") as f:
+            cached = (
+                stat.st_mtime_ns,
+                stat.st_size,
+                hashlib.sha1(f.read()).hexdigest(),
+            )
+        _file_digests[abs_path] = cached
+    _hash_value(hasher, (filepath, cached[2]))
+
+
+def _plain(value: Any) -> Any:
+    """
+    Turns RNA arrays, mathutils types, and enum flag sets into tuples,
+    whose repr (unlike theirs) is always their values in order
+    """
+    if isinstance(value, (str, bytes, int, float, bool)) or value is None:
+        return value
+    elif isinstance(value, (set, frozenset)):
+        return tuple(sorted(value))
+    try:
+        return tuple(_plain(v) for v in value)
+    except TypeError:
+        return value
+
+
+def _hash_value(hasher: "hashlib._Hash", value: Any) -> None:
+    hasher.update(repr(_plain(value)).encode("utf-8"))
+    hasher.update(b"\0")
+
+
+def _hash_property_group(
+    hasher: "hashlib._Hash",
+    prop_group: bpy.types.bpy_struct,
+    ignore=frozenset(),
+    follow_pointers=True,
+) -> None:
+    """
+    Hashes every property of prop_group, following nested PropertyGroups.
+    Pointers to datablocks are hashed by name, those are hashed on their own.
+
+    Use follow_pointers=False for Blender's own structs, whose pointers can go
+    round in circles
+    """
+    for prop in prop_group.bl_rna.properties:
+        if prop.identifier in ignore or prop.identifier == "rna_type":
+            continue
+        value = getattr(prop_group, prop.identifier)
+        _hash_value(hasher, prop.identifier)
+        if prop.type == "POINTER":
+            if value is None or isinstance(value, bpy.types.ID):
+                _hash_value(hasher, value.name if value else None)
+            elif follow_pointers:
+                _hash_property_group(hasher, value)
+        elif prop.type == "COLLECTION":
+            _hash_value(hasher, len(value))
+            if follow_pointers:
+                for member in value:
+                    _hash_property_group(hasher, member)
+        else:
+            _hash_value(hasher, value)
+
+
+def _hash_foreach(
+    hasher: "hashlib._Hash",
+    seq: bpy.types.bpy_prop_collection,
+    attr: str,
+    dims: int,
+    dtype: type,
+) -> None:
+    values = numpy.empty(len(seq) * dims, dtype=dtype)
+    seq.foreach_get(attr, values)
+    hasher.update(values.tobytes())
+
+
+def _hash_matrix(hasher: "hashlib._Hash", matrix) -> None:
+    _hash_value(hasher, tuple(tuple(row) for row in matrix))
+
+
+def _hash_mesh(hasher: "hashlib._Hash", mesh: bpy.types.Mesh) -> None:
+    _hash_foreach(hasher, mesh.vertices, "co", 3, numpy.float32)
+    _hash_foreach(hasher, mesh.loops, "vertex_index", 1, numpy.int32)
+    _hash_foreach(hasher, mesh.polygons, "loop_start", 1, numpy.int32)
+    _hash_foreach(hasher, mesh.polygons, "loop_total", 1, numpy.int32)
+    _hash_foreach(hasher, mesh.polygons, "material_index", 1, numpy.int32)
+    _hash_foreach(hasher, mesh.polygons, "use_smooth", 1, bool)
+    _hash_foreach(hasher, mesh.edges, "use_edge_sharp", 1, bool)
+    for uv_layer in mesh.uv_layers:
+        _hash_value(hasher, (uv_layer.name, uv_layer.active_render))
+        _hash_foreach(hasher, uv_layer.data, "uv", 2, numpy.float32)
+    _hash_value(
+        hasher,
+        (
+            getattr(mesh, "use_auto_smooth", None),
+            getattr(mesh, "auto_smooth_angle", None),
+            mesh.has_custom_normals,
+        ),
+    )
+    if mesh.has_custom_normals and hasattr(mesh, "calc_normals_split"):
+        # Custom normals are only readable as split normals
+        mesh.calc_normals_split()
+        _hash_foreach(hasher, mesh.loops, "normal", 3, numpy.float32)
+    _hash_value(hasher, [mat.name if mat else None for mat in mesh.materials])
+
+    shape_keys = mesh.shape_keys
+    if shape_keys:
+        _hash_value(
+            hasher,
+            (
+                shape_keys.use_relative,
+                shape_keys.reference_key.name,
+                shape_keys.eval_time,
+            ),
+        )
+        for key_block in shape_keys.key_blocks:
+            _hash_value(
+                hasher,
+                (
+                    key_block.name,
+                    key_block.value,
+                    key_block.mute,
+                    key_block.relative_key.name,
+                    key_block.slider_min,
+                    key_block.slider_max,
+                    key_block.vertex_group,
+                    key_block.interpolation,
+                ),
+            )
+            _hash_foreach(hasher, key_block.data, "co", 3, numpy.float32)
+
+
+def _hash_vertex_weights(hasher: "hashlib._Hash", obj: bpy.types.Object) -> None:
+    """Hashes the vertex groups of a mesh object, which Armature modifiers deform by"""
+    _hash_value(hasher, [group.name for group in obj.vertex_groups])
+    if obj.vertex_groups:
+        _hash_value(
+            hasher,
+            [
+                [(element.group, element.weight) for element in vertex.groups]
+                for vertex in obj.data.vertices
+            ],
+        )
+
+
+def _hash_fcurve(hasher: "hashlib._Hash", fcurve: bpy.types.FCurve) -> None:
+    _hash_value(hasher, (fcurve.data_path, fcurve.array_index, fcurve.mute))
+    _hash_value(hasher, [kf.interpolation for kf in fcurve.keyframe_points])
+    for attr in ("co", "handle_left", "handle_right"):
+        _hash_foreach(hasher, fcurve.keyframe_points, attr, 2, numpy.float32)
+    for modifier in fcurve.modifiers:
+        _hash_property_group(hasher, modifier, follow_pointers=False)
+
+
+def _hash_action(hasher: "hashlib._Hash", action: Optional[bpy.types.Action]) -> None:
+    if action is None:
+        _hash_value(hasher, None)
+        return
+    _hash_value(hasher, action.name)
+    for fcurve in action.fcurves:
+        _hash_fcurve(hasher, fcurve)
+
+
+def _hash_animation_data(
+    hasher: "hashlib._Hash",
+    animation_data: Optional[bpy.types.AnimData],
+    view_layer: bpy.types.ViewLayer,
+    visited: Set[Tuple[str, str]],
+) -> None:
+    """Hashes the action and the drivers, with what their variables read"""
+    if animation_data is None:
+        _hash_value(hasher, None)
+        return
+    _hash_action(hasher, animation_data.action)
+    for fcurve in animation_data.drivers:
+        _hash_fcurve(hasher, fcurve)
+        driver = fcurve.driver
+        _hash_value(hasher, (driver.type, driver.expression, driver.use_self))
+        for variable in driver.variables:
+            _hash_value(hasher, (variable.name, variable.type))
+            for target in variable.targets:
+                _hash_value(
+                    hasher,
+                    (
+                        target.id_type,
+                        target.data_path,
+                        target.bone_target,
+                        target.transform_type,
+                        target.transform_space,
+                        target.rotation_mode,
+                    ),
+                )
+                if target.id:
+                    _hash_id(hasher, target.id, view_layer, visited)
+
+
+def _id_key(datablock: bpy.types.ID) -> Tuple[str, str]:
+    return (type(datablock).__name__, datablock.name_full)
+
+
+def _hash_id(
+    hasher: "hashlib._Hash",
+    datablock: bpy.types.ID,
+    view_layer: bpy.types.ViewLayer,
+    visited: Set[Tuple[str, str]],
+) -> None:
+    """
+    Hashes a datablock something points to by what's in it,
+    visited stops it going round in circles or hashing one twice
+    """
+    key = _id_key(datablock)
+    _hash_value(hasher, key)
+    if key in visited:
+        return
+    visited.add(key)
+
+    if isinstance(datablock, bpy.types.Object):
+        _hash_object(hasher, datablock, view_layer, visited)
+    elif isinstance(datablock, bpy.types.Collection):
+        for obj in sorted(datablock.all_objects, key=lambda obj: obj.name):
+            _hash_id(hasher, obj, view_layer, visited)
+    elif isinstance(datablock, bpy.types.Mesh):
+        _hash_mesh(hasher, datablock)
+    elif isinstance(datablock, bpy.types.Image):
+        _hash_value(hasher, (datablock.source, bool(datablock.packed_file)))
+        _hash_file(hasher, datablock.filepath)
+    elif not isinstance(datablock, bpy.types.Scene):
+        # Scenes only get their name, their pointers go everywhere
+        _hash_property_group(hasher, datablock, ignore=_ID_PROPS, follow_pointers=False)
+        _hash_pointers(hasher, datablock, view_layer, visited)
+
+
+def _hash_pointers(
+    hasher: "hashlib._Hash",
+    struct: bpy.types.bpy_struct,
+    view_layer: bpy.types.ViewLayer,
+    visited: Set[Tuple[str, str]],
+) -> None:
+    """
+    Hashes the datablocks struct (like a modifier or constraint) points to,
+    directly or from the members of its collections, like an Armature
+    constraint's targets
+    """
+    for prop in struct.bl_rna.properties:
+        if prop.identifier == "rna_type" or prop.type not in {"POINTER", "COLLECTION"}:
+            continue
+        value = getattr(struct, prop.identifier)
+        if prop.type == "POINTER":
+            if isinstance(value, bpy.types.ID):
+                _hash_id(hasher, value, view_layer, visited)
+        else:
+            for member in value:
+                for member_prop in member.bl_rna.properties:
+                    if member_prop.type == "POINTER":
+                        member_value = getattr(member, member_prop.identifier)
+                        if isinstance(member_value, bpy.types.ID):
+                            _hash_id(hasher, member_value, view_layer, visited)
+
+
+def _hash_material(hasher: "hashlib._Hash", material: bpy.types.Material) -> None:
+    _hash_value(hasher, (material.name, material.specular_intensity))
+    _hash_property_group(hasher, material.xplane)
+
+
+def _hash_object(
+    hasher: "hashlib._Hash",
+    obj: bpy.types.Object,
+    view_layer: bpy.types.ViewLayer,
+    visited: Set[Tuple[str, str]],
+) -> None:
+    _hash_value(
+        hasher,
+        (
+            obj.name,
+            obj.type,
+            obj.parent.name if obj.parent else None,
+            obj.parent_type,
+            obj.parent_bone,
+            obj.rotation_mode,
+            obj.hide_viewport,
+            obj.hide_get(view_layer=view_layer),
+        ),
+    )
+    # matrix_world is only updated with the depsgraph, matrix_basis comes straight
+    # from location, rotation and scale
+    _hash_matrix(hasher, obj.matrix_basis)
+    _hash_matrix(hasher, obj.matrix_world)
+    _hash_matrix(hasher, obj.matrix_parent_inverse)
+    _hash_property_group(hasher, obj.xplane)
+    _hash_animation_data(hasher, obj.animation_data, view_layer, visited)
+
+    # What they point to is hashed by its content, not its name
+    for modifier in obj.modifiers:
+        _hash_property_group(hasher, modifier, follow_pointers=False)
+        _hash_pointers(hasher, modifier, view_layer, visited)
+    for constraint in obj.constraints:
+        _hash_property_group(hasher, constraint, follow_pointers=False)
+        _hash_pointers(hasher, constraint, view_layer, visited)
+
+    for slot in obj.material_slots:
+        _hash_value(hasher, slot.link)
+        if slot.material:
+            _hash_material(hasher, slot.material)
+
+    if obj.type == "MESH":
+        _hash_mesh(hasher, obj.data)
+        _hash_vertex_weights(hasher, obj)
+        _hash_animation_data(hasher, obj.data.animation_data, view_layer, visited)
+        if obj.data.shape_keys:
+            _hash_animation_data(
+                hasher, obj.data.shape_keys.animation_data, view_layer, visited
+            )
+    elif obj.type == "LIGHT":
+        _hash_property_group(hasher, obj.data, ignore=_ID_PROPS, follow_pointers=False)
+        _hash_property_group(hasher, obj.data.xplane)
+    elif obj.type == "ARMATURE":
+        for bone in obj.data.bones:
+            _hash_value(hasher, (bone.name, bone.parent.name if bone.parent else None))
+            _hash_matrix(hasher, bone.matrix_local)
+            _hash_property_group(hasher, bone.xplane)
+        for pose_bone in obj.pose.bones:
+            _hash_value(hasher, (pose_bone.name, pose_bone.rotation_mode))
+            _hash_matrix(hasher, pose_bone.matrix_basis)
+
+
+def fingerprint_root(
+    exportable_root: xplane_helpers.ExportableRoot,
+    objects: Iterable[bpy.types.Object],
+    view_layer: bpy.types.ViewLayer,
+) -> Optional[str]:
+    """
+    Returns a digest of everything that goes into exportable_root's OBJ:
+    its layer settings and normal decal images, the objects it collected (their
+    mesh data, shape keys, vertex weights, transforms, actions, drivers,
+    materials, and XPlane settings, and what their modifiers, constraints, and
+    drivers point to), the scene's XPlane settings, lights.txt, and the
+    XPlane2Blender and Blender versions.
+
+    None if something in it can't be fingerprinted, it must always be exported
+    """
+    objects = sorted(objects, key=lambda obj: obj.name)
+    if any(
+        modifier.type in _UNHASHABLE_MODIFIERS
+        for obj in objects
+        for modifier in obj.modifiers
+    ):
+        return None
+
+    hasher = hashlib.sha1()
+    _hash_value(
+        hasher,
+        (
+            _EXPORT_MANIFEST_VERSION,
+            io_xplane2blender.bl_info["version"],
+            bpy.app.version,
+            _get_lights_txt_digest(),
+        ),
+    )
+    _hash_property_group(hasher, bpy.context.scene.xplane, ignore=_IGNORED_SCENE_PROPS)
+    _hash_value(hasher, (type(exportable_root).__name__, exportable_root.name))
+    _hash_property_group(hasher, exportable_root.xplane.layer)
+    for prop in _NORMAL_DECAL_PROPS:
+        _hash_file(hasher, getattr(exportable_root.xplane.layer, prop))
+
+    # The root's objects are hashed here, not by whatever points to them
+    visited = {_id_key(obj) for obj in objects}
+    for obj in objects:
+        _hash_object(hasher, obj, view_layer, visited)
+    return hasher.hexdigest()
+
+
+def fingerprint_xplane_file(
+    xplane_file: "xplane_file.XPlaneFile", view_layer: bpy.types.ViewLayer
+) -> Optional[str]:
+    """fingerprint_root for a collected XPlaneFile, before it is written"""
+    return fingerprint_root(
+        xplane_file.options.id_data,
+        (
+            bpy.data.objects[name]
+            for name in xplane_file._bl_obj_name_to_bone
+            if name in bpy.data.objects
+        ),
+        view_layer,
+    )
+
+
+class ExportManifest:
+    """
+    The fingerprints each OBJ was last exported with,
+    read from and saved to EXPORT_MANIFEST_FILENAME next to the .blend
+    """
+
+    def __init__(self, manifest_filepath: str) -> None:
+        self.manifest_filepath = manifest_filepath
+        self.fingerprints = {}  # type: Dict[str, str]
+        # What update and forget changed, None for forgotten.
+        # Export workers hand these back instead of saving
+        self.changes = {}  # type: Dict[str, Optional[str]]
+        try:
+            with open(manifest_filepath) as manifest_file:
+                contents = json.load(manifest_file)
+            if contents.get("version") == _EXPORT_MANIFEST_VERSION:
+                self.fingerprints = {
+                    str(path): str(fingerprint)
+                    for path, fingerprint in contents["roots"].items()
+                }
+        except (OSError, ValueError, KeyError, AttributeError):
+            # Missing or corrupt, everything gets exported
+            pass
+
+    @classmethod
+    def for_current_blend(cls) -> "ExportManifest":
+        return cls(
+            os.path.join(os.path.dirname(bpy.data.filepath), EXPORT_MANIFEST_FILENAME)
+        )
+
+    def is_unchanged(self, obj_filepath: str, fingerprint: Optional[str]) -> bool:
+        """True if obj_filepath exists and was exported with this fingerprint"""
+        return (
+            fingerprint is not None
+            and self.fingerprints.get(os.path.normpath(obj_filepath)) == fingerprint
+            and os.path.isfile(obj_filepath)
+        )
+
+    def update(self, obj_filepath: str, fingerprint: Optional[str]) -> None:
+        """A fingerprint of None (see fingerprint_root) is forgotten instead"""
+        if fingerprint is None:
+            self.forget(obj_filepath)
+            return
+        self.fingerprints[os.path.normpath(obj_filepath)] = fingerprint
+        self.changes[os.path.normpath(obj_filepath)] = fingerprint
+
+    def forget(self, obj_filepath: str) -> None:
+        self.fingerprints.pop(os.path.normpath(obj_filepath), None)
+        self.changes[os.path.normpath(obj_filepath)] = None
+
+    def apply_changes(self, changes: Dict[str, Optional[str]]) -> None:
+        """Applies another ExportManifest's changes"""
+        for obj_filepath, fingerprint in changes.items():
+            if fingerprint is None:
+                self.forget(obj_filepath)
+            else:
+                self.update(obj_filepath, fingerprint)
+
+    def save(self) -> None:
+        tmp_filepath = self.manifest_filepath + ".tmp"
+        try:
+            with open(tmp_filepath, "w") as manifest_file:
+                json.dump(
+                    {"version": _EXPORT_MANIFEST_VERSION, "roots": self.fingerprints},
+                    manifest_file,
+                    indent=1,
+                    sort_keys=True,
+                )
+            os.replace(tmp_filepath, self.manifest_filepath)
+        except OSError as e:
+            xplane_helpers.logger.warn(
+                f"Could not save export manifest {self.manifest_filepath}: {e}"
+            )
@@ -721,7 +721,7 @@ def parse_lights_file():
     if _parsed_lights_txt_content:
         return
 
-    num_logger_problems = len(logger.findErrors())
+    num_logger_problems = logger.countErrors()
     LIGHTS_FILEPATH = os.path.join(
         xplane_constants.ADDON_RESOURCES_FOLDER, "lights.txt"
     )
@@ -878,7 +878,7 @@ def parse_lights_file():
                             else:
                                 return False
 
-                    prev_logger_errors = len(logger.findErrors())
+                    prev_logger_errors = logger.countErrors()
                     for i, arg in enumerate(light_args):
                         if not validate_parameterization_arg(i, arg):
                             logger.error(
@@ -887,7 +887,7 @@ def parse_lights_file():
                             )
                             continue
 
-                    return not (len(logger.findErrors()) - prev_logger_errors)
+                    return not (logger.countErrors() - prev_logger_errors)
 
                 if not validate_arguments():
                     continue
@@ -938,5 +938,5 @@ def parse_lights_file():
 
     if not _parsed_lights_txt_content:
         logger.error("lights.txt had no valid light records in it")
-    if len(logger.findErrors()) - num_logger_problems:
+    if logger.countErrors() - num_logger_problems:
         raise LightsTxtFileParsingError
@@ -0,0 +1,293 @@
+"""
+Records how much memory an export uses and what it is used by,
+for finding out why one runs out of memory.
+
+While started, a tracemalloc snapshot is taken as each of the profiler's
+phases ends (see xplane_profiler), so memory is attributed to the same
+phases that are timed. The exporter's own structures are measured with
+
+    memory_profiler.measure_xplane_file(xplane_file, out)
+
+When finished, the report (peak RSS, memory after each phase, the top allocating
+call sites, and the structures) can be written as JSON and summarized as a table.
+
+tracemalloc slows Python down a lot, never leave this on for real exports.
+"""
+
+import array
+import gc
+import json
+import sys
+import tracemalloc
+from typing import Any, Dict, Iterator, List, Optional
+
+from io_xplane2blender.xplane_utils import xplane_profiler
+from io_xplane2blender.xplane_utils.xplane_profiler import profiler
+
+# Phases run once per object, a snapshot each would take longer than the export
+_NO_SNAPSHOT_PHASES = {"collect_mesh", "estimate_gloss"}
+
+# How many call sites to report, in total and for each phase
+_TOP_SITES = 15
+_TOP_PHASE_SITES = 3
+
+
+def get_peak_rss() -> Optional[int]:
+    """The most memory this process has had resident, in bytes, or None if unknown"""
+    try:
+        import resource
+    except ImportError:
+        # Windows
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes everywhere else
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def deep_sizeof(obj: Any) -> int:
+    """
+    Approximately how many bytes obj and everything it holds use.
+    Objects held more than once are only counted once
+    """
+    seen = set()
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, (str, bytes, int, float, bool, array.array)) or obj is None:
+            continue
+        elif isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif hasattr(obj, "__dict__"):
+            stack.append(obj.__dict__)
+    return size
+
+
+def _take_snapshot() -> tracemalloc.Snapshot:
+    """A snapshot without what tracing and profiling allocated themselves"""
+    return tracemalloc.take_snapshot().filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, xplane_profiler.__file__),
+        ]
+    )
+
+
+def _site(stat: tracemalloc.Statistic) -> Dict[str, Any]:
+    frame = stat.traceback[0]
+    return {
+        "site": f"{frame.filename}:{frame.lineno}",
+        "size": stat.size,
+        "count": stat.count,
+    }
+
+
+def _site_diff(stat: tracemalloc.StatisticDiff) -> Dict[str, Any]:
+    frame = stat.traceback[0]
+    return {
+        "site": f"{frame.filename}:{frame.lineno}",
+        "size_diff": stat.size_diff,
+        "count_diff": stat.count_diff,
+    }
+
+
+def _mb(size: Optional[int]) -> str:
+    return "unknown" if size is None else f"{size / 2 ** 20:.1f} MB"
+
+
+class ExportMemoryProfiler:
+    def __init__(self) -> None:
+        self.enabled = False
+        self.phases = []  # type: List[Dict[str, Any]]
+        self.structures = []  # type: List[Dict[str, Any]]
+        self.top_sites = []  # type: List[Dict[str, Any]]
+        self._last_snapshot = None  # type: Optional[tracemalloc.Snapshot]
+        self._largest_snapshot = None  # type: Optional[tracemalloc.Snapshot]
+        self._largest_traced = 0
+
+    def start(self) -> None:
+        """
+        Forgets any previous report and starts tracing,
+        starting the profiler too so there are phases to snapshot
+        """
+        self.phases.clear()
+        self.structures.clear()
+        self.top_sites.clear()
+        self._largest_traced = 0
+        if not profiler.enabled:
+            profiler.start()
+        if self._on_phase_end not in profiler.phase_end_listeners:
+            profiler.phase_end_listeners.append(self._on_phase_end)
+        gc.collect()
+        tracemalloc.start()
+        self._last_snapshot = self._largest_snapshot = _take_snapshot()
+        self.enabled = True
+
+    def stop(self) -> None:
+        """Stops tracing and works out the top allocating call sites"""
+        if not self.enabled:
+            return
+        self.enabled = False
+        if self._on_phase_end in profiler.phase_end_listeners:
+            profiler.phase_end_listeners.remove(self._on_phase_end)
+        tracemalloc.stop()
+        self.top_sites = [
+            _site(stat)
+            for stat in self._largest_snapshot.statistics("lineno")[:_TOP_SITES]
+        ]
+        self._last_snapshot = self._largest_snapshot = None
+
+    def _on_phase_end(self, name: str, args: Dict[str, Any]) -> None:
+        if name in _NO_SNAPSHOT_PHASES:
+            return
+        traced, peak = tracemalloc.get_traced_memory()
+        snapshot = _take_snapshot()
+        self.phases.append(
+            {
+                "phase": name,
+                "args": args,
+                "traced": traced,
+                "peak_traced": peak,
+                "top_growth": [
+                    _site_diff(stat)
+                    for stat in snapshot.compare_to(self._last_snapshot, "lineno")[
+                        :_TOP_PHASE_SITES
+                    ]
+                    if stat.size_diff > 0
+                ],
+            }
+        )
+        self._last_snapshot = snapshot
+        if traced >= self._largest_traced:
+            self._largest_traced = traced
+            self._largest_snapshot = snapshot
+
+    def measure(self, name: str, obj: Any, **counts: int) -> None:
+        """Records the size of one of the exporter's structures, and any counts of it"""
+        if not self.enabled:
+            return
+        self.structures.append({"name": name, "size": deep_sizeof(obj), **counts})
+
+    def measure_xplane_file(self, xplane_file: "XPlaneFile", out: str) -> None:
+        """
+        Records the size of a written XPlaneFile's mesh and output, its bone count,
+        and how many XPlaneAttributes and (deep copied) ParsedLights are alive
+        """
+        if not self.enabled:
+            return
+        # Only imported when profiling, xplane_types imports this module
+        from io_xplane2blender.xplane_types.xplane_attribute import XPlaneAttribute
+        from io_xplane2blender.xplane_utils.xplane_lights_txt_parser import ParsedLight
+
+        def walk_bones(bone) -> Iterator[Any]:
+            yield bone
+            for child in bone.children:
+                yield from walk_bones(child)
+
+        root = xplane_file.filename
+        self.measure(
+            f"{root} XPlaneMesh.vertices",
+            xplane_file.mesh.vertices,
+            vertices=len(xplane_file.mesh.vertices),
+        )
+        self.measure(
+            f"{root} XPlaneMesh.indices",
+            xplane_file.mesh.indices,
+            indices=len(xplane_file.mesh.indices),
+        )
+        self.measure(f"{root} output", out, chars=len(out))
+        bones = list(walk_bones(xplane_file.rootBone)) if xplane_file.rootBone else []
+        # Bones reach everything else, only they themselves are counted
+        self.structures.append(
+            {
+                "name": f"{root} XPlaneBones",
+                "size": sum(
+                    sys.getsizeof(bone) + sys.getsizeof(bone.__dict__) for bone in bones
+                ),
+                "bones": len(bones),
+            }
+        )
+
+        alive = {XPlaneAttribute: [], ParsedLight: []}  # type: Dict[type, List[Any]]
+        for obj in gc.get_objects():
+            if isinstance(obj, XPlaneAttribute):
+                alive[XPlaneAttribute].append(obj)
+            elif isinstance(obj, ParsedLight):
+                alive[ParsedLight].append(obj)
+        for cls, instances in alive.items():
+            self.measure(
+                f"{root} {cls.__name__} instances", instances, instances=len(instances)
+            )
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "peak_rss": get_peak_rss(),
+            "peak_traced": max(
+                (phase["peak_traced"] for phase in self.phases), default=0
+            ),
+            "phases": self.phases,
+            "top_sites": self.top_sites,
+            "structures": self.structures,
+        }
+
+    def write_json(self, filepath: str) -> None:
+        """Raises OSError if the report can't be written"""
+        with open(filepath, "w") as report_file:
+            json.dump(self.report(), report_file, indent=1, default=str)
+
+    def summary(self) -> List[str]:
+        """
+        Returns the peak memory, the phases that grew traced memory the most,
+        the top allocating call sites, and the largest structures
+        """
+        report = self.report()
+        lines = [
+            f"Peak RSS: {_mb(report['peak_rss'])},"
+            f" peak traced by tracemalloc: {_mb(report['peak_traced'])}"
+        ]
+
+        growths = []
+        traced_before = 0
+        for phase in self.phases:
+            growths.append((phase["traced"] - traced_before, phase))
+            traced_before = phase["traced"]
+        if growths:
+            lines.append("Phases that grew memory the most:")
+            for growth, phase in sorted(growths, key=lambda g: -g[0])[:10]:
+                if growth <= 0:
+                    break
+                root = phase["args"].get("root", "")
+                lines.append(
+                    f"  {phase['phase']} {root}: +{_mb(growth)}, {_mb(phase['traced'])} after"
+                )
+
+        if self.top_sites:
+            lines.append("Top allocating call sites, at the most memory traced:")
+            for site in self.top_sites:
+                lines.append(
+                    f"  {_mb(site['size']):>10} in {site['count']:>8} blocks  {site['site']}"
+                )
+
+        if self.structures:
+            lines.append("Exporter structures, largest first:")
+            for structure in sorted(self.structures, key=lambda s: -s["size"]):
+                counts = ", ".join(
+                    f"{key}={value}"
+                    for key, value in structure.items()
+                    if key not in {"name", "size"}
+                )
+                lines.append(
+                    f"  {_mb(structure['size']):>10}  {structure['name']}  {counts}"
+                )
+        return lines
+
+
+memory_profiler = ExportMemoryProfiler()
@@ -0,0 +1,251 @@
+"""
+Estimates what an OBJ8 costs X-Plane to draw, from the OBJ the exporter wrote
+(see xplane_obj_reader) or from an XPlaneFile it just wrote, without Blender.
+
+Per LOD bucket (the whole OBJ is one bucket if it has no ATTR_LOD)
+- batches: TRIS and LINES, each is a draw call
+- triangles
+- state_changes: ATTR_s between batches, each may change X-Plane's render state
+- anim_blocks and anim_depth: ANIM_begin blocks and how deeply they nest
+- vertex_reuse: indices drawn / different vertices they use, 1.0 means none are shared
+- lights: LIGHTS vertices and LIGHT_* lines
+
+For the whole OBJ, the ranges between its nearest and furthest LOD no bucket covers.
+Batches are traced back to Blender objects by their TRIS offset and count, if
+names are given, so the worst offenders can be listed by name.
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy
+
+from io_xplane2blender.xplane_utils.xplane_obj_reader import ObjFile, read_obj
+
+# (TRIS offset, TRIS count): Blender object name
+ObjectNames = Dict[Tuple[int, int], str]
+
+
+class BucketCost(NamedTuple):
+    lod: Optional[Tuple[float, float]]  # None if the OBJ has no ATTR_LOD
+    batches: int
+    triangles: int
+    state_changes: int
+    anim_blocks: int
+    anim_depth: int
+    vertex_reuse: Optional[float]  # None if nothing is drawn
+    lights: int
+
+    @property
+    def label(self) -> str:
+        return f"LOD {self.lod[0]:g}-{self.lod[1]:g}" if self.lod else "No LODs"
+
+
+class ObjectCost(NamedTuple):
+    name: str
+    batches: int
+    triangles: int
+    state_changes: int  # The ATTR_s written just before its batches
+    anim_depth: int
+
+    @property
+    def score(self) -> Tuple[int, int, int]:
+        """Higher is worse, draw calls and state changes first"""
+        return (self.batches + self.state_changes, self.anim_depth, self.triangles)
+
+
+class Thresholds(NamedTuple):
+    """Limits a bucket must be in, None means no limit"""
+
+    max_batches: Optional[int] = None
+    max_state_changes: Optional[int] = None
+    max_anim_depth: Optional[int] = None
+    max_lights: Optional[int] = None
+    min_vertex_reuse: Optional[float] = None
+
+
+class RenderCost(NamedTuple):
+    buckets: List[BucketCost]
+    objects: List[ObjectCost]  # Worst first
+    lod_gaps: List[Tuple[float, float]]
+
+    def check(self, thresholds: Thresholds) -> List[str]:
+        """Every threshold a bucket is over, as a message, empty if none are"""
+        failures = []
+        for bucket in self.buckets:
+            for value, limit, name in (
+                (bucket.batches, thresholds.max_batches, "batches"),
+                (bucket.state_changes, thresholds.max_state_changes, "state changes"),
+                (bucket.anim_depth, thresholds.max_anim_depth, "ANIM depth"),
+                (bucket.lights, thresholds.max_lights, "lights"),
+            ):
+                if limit is not None and value > limit:
+                    failures.append(
+                        f"{bucket.label}: {value} {name}, more than {limit}"
+                    )
+            if (
+                thresholds.min_vertex_reuse is not None
+                and bucket.vertex_reuse is not None
+                and bucket.vertex_reuse < thresholds.min_vertex_reuse
+            ):
+                failures.append(
+                    f"{bucket.label}: vertex reuse {bucket.vertex_reuse:.2f},"
+                    f" less than {thresholds.min_vertex_reuse:g}"
+                )
+        return failures
+
+    def report(self, num_objects: int = 10) -> List[str]:
+        """The buckets, LOD gaps, and the num_objects worst objects as lines of text"""
+        lines = []
+        for bucket in self.buckets:
+            reuse = "-" if bucket.vertex_reuse is None else f"{bucket.vertex_reuse:.2f}"
+            lines.append(
+                f"{bucket.label}: {bucket.batches} batches, {bucket.triangles} triangles,"
+                f" {bucket.state_changes} state changes, {bucket.anim_blocks} ANIMs"
+                f" {bucket.anim_depth} deep, vertex reuse {reuse}, {bucket.lights} lights"
+            )
+        for near, far in self.lod_gaps:
+            lines.append(f"No LOD covers {near:g}-{far:g}")
+        if self.objects[:num_objects]:
+            lines.append("Worst objects:")
+        for obj in self.objects[:num_objects]:
+            lines.append(
+                f"  {obj.name}: {obj.batches} batches, {obj.triangles} triangles,"
+                f" {obj.state_changes} state changes, ANIM depth {obj.anim_depth}"
+            )
+        return lines
+
+    def to_dict(self) -> dict:
+        return {
+            "buckets": [
+                dict(bucket._asdict(), label=bucket.label) for bucket in self.buckets
+            ],
+            "objects": [obj._asdict() for obj in self.objects],
+            "lod_gaps": self.lod_gaps,
+        }
+
+
+def _lod_gaps(lods: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    """Where between 0 and the furthest far no LOD range covers"""
+    gaps = []
+    covered = 0.0
+    for near, far in sorted(lods):
+        if near > covered:
+            gaps.append((covered, near))
+        covered = max(covered, far)
+    return gaps
+
+
+def analyze(obj: ObjFile, object_names: Optional[ObjectNames] = None) -> RenderCost:
+    """
+    Analyzes obj. object_names names its batches, batches not in it are named
+    by their line, see object_names_from_xplane_file
+    """
+    object_names = object_names or {}
+    buckets = []  # type: List[BucketCost]
+    # Name: [batches, triangles, state changes, ANIM depth]
+    objects = {}  # type: Dict[str, List[int]]
+
+    def new_bucket(lod):
+        return {
+            "lod": lod,
+            "batches": 0,
+            "triangles": 0,
+            "state_changes": 0,
+            "anim_blocks": 0,
+            "anim_depth": 0,
+            "lights": 0,
+            "drawn": [],
+        }
+
+    def end_bucket(bucket):
+        if bucket["lod"] is None and not (
+            bucket["batches"] or bucket["lights"] or bucket["state_changes"]
+        ):
+            # Nothing before the first ATTR_LOD
+            return
+        drawn = bucket.pop("drawn")
+        if drawn:
+            indices = numpy.concatenate(drawn)
+            bucket["vertex_reuse"] = len(indices) / len(numpy.unique(indices))
+        else:
+            bucket["vertex_reuse"] = None
+        buckets.append(BucketCost(**bucket))
+
+    bucket = new_bucket(None)
+    depth = 0
+    attrs_since_batch = 0
+    for command in obj.commands:
+        directive = command.directive
+        kind = command.kind
+        if kind == "LOD":
+            end_bucket(bucket)
+            near_far = command.numbers()
+            bucket = new_bucket(
+                (near_far[0], near_far[1]) if len(near_far) >= 2 else None
+            )
+            attrs_since_batch = 0
+        elif directive == "ANIM_begin":
+            depth += 1
+            bucket["anim_blocks"] += 1
+            bucket["anim_depth"] = max(bucket["anim_depth"], depth)
+        elif directive == "ANIM_end":
+            depth = max(depth - 1, 0)
+        elif kind == "ATTR":
+            bucket["state_changes"] += 1
+            attrs_since_batch += 1
+        elif kind == "TRIS":
+            try:
+                offset, count = map(int, command.args[:2])
+            except ValueError:
+                continue
+            bucket["batches"] += 1
+            triangles = count // 3 if directive == "TRIS" else 0
+            bucket["triangles"] += triangles
+            bucket["drawn"].append(obj.indices[offset : offset + count])
+            name = object_names.get(
+                (offset, count), f"{directive} on line {command.line_number}"
+            )
+            cost = objects.setdefault(name, [0, 0, 0, 0])
+            cost[0] += 1
+            cost[1] += triangles
+            cost[2] += attrs_since_batch
+            cost[3] = max(cost[3], depth)
+            attrs_since_batch = 0
+        elif directive == "LIGHTS":
+            numbers = command.numbers()
+            bucket["lights"] += int(numbers[1]) if len(numbers) >= 2 else 0
+        elif kind == "LIGHT":
+            bucket["lights"] += 1
+    end_bucket(bucket)
+
+    return RenderCost(
+        buckets=buckets,
+        objects=sorted(
+            (ObjectCost(name, *cost) for name, cost in objects.items()),
+            key=lambda obj_cost: obj_cost.score,
+            reverse=True,
+        ),
+        lod_gaps=_lod_gaps([bucket.lod for bucket in buckets if bucket.lod]),
+    )
+
+
+def analyze_file(filepath: str) -> RenderCost:
+    """Reads and analyzes the OBJ at filepath, see read_obj for what it raises"""
+    return analyze(read_obj(filepath))
+
+
+def object_names_from_xplane_file(xplane_file) -> ObjectNames:
+    """
+    The TRIS of every mesh in xplane_file, an XPlaneFile, after it has been written
+    """
+    names = {}  # type: ObjectNames
+    for bone in xplane_file._bl_obj_name_to_bone.values():
+        xplane_object = bone.xplaneObject
+        if (
+            xplane_object
+            and xplane_object.type == "MESH"
+            and xplane_object.indices[1] > xplane_object.indices[0]
+        ):
+            start, end = xplane_object.indices
+            names[(start, end - start)] = xplane_object.name
+    return names
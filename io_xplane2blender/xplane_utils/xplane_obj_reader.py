@@ -0,0 +1,311 @@
+"""
+Reads the OBJ8 files the exporter writes, without Blender, for round trip checks,
+size analysis, and comparing exports.
+
+An OBJ8 file is
+- "I" or "A", "800", "OBJ"
+- The header's directives (TEXTURE, GLOBAL_*, POINT_COUNTS, ...)
+- The VT, VLINE, VLIGHT, and IDX10/IDX tables
+- The commands (ANIM_*, ATTR_*, TRIS, LINES, LIGHTS, LIGHT_*, ATTR_LOD, ...)
+
+The file is memory-mapped and read front to back once. The tables, which are
+nearly all of a big OBJ, are parsed a chunk of lines at a time straight into
+NumPy arrays, so memory is the arrays plus a few MB however big the file is.
+Comments are skipped.
+"""
+
+import mmap
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy
+
+# Bytes of table lines parsed at a time
+_CHUNK_SIZE = 1 << 22
+
+_COMMENT_RE = re.compile(rb"#[^\n]*")
+
+# Table directive: (what every line starts with, columns per line or None for indices)
+_TABLES = {
+    b"VT": (b"VT", 8),
+    b"VLINE": (b"VLINE", 6),
+    b"VLIGHT": (b"VLIGHT", 6),
+    b"IDX10": (b"IDX", None),
+    b"IDX": (b"IDX", None),
+}
+
+# ATTR_s that are part of the header, not commands
+_HEADER_ATTRS = {"ATTR_layer_group", "ATTR_layer_group_draped", "ATTR_LOD_draped"}
+
+
+class ObjCommand(NamedTuple):
+    """One directive line, from the header or the commands"""
+
+    line_number: int  # 1 based
+    directive: str
+    args: Tuple[str, ...]
+
+    @property
+    def kind(self) -> str:
+        """
+        "ANIM", "ATTR", "TRIS" (TRIS or LINES), "LIGHT" (LIGHTS and LIGHT_*),
+        "LOD" (ATTR_LOD), or "OTHER"
+        """
+        directive = self.directive
+        if directive.startswith("ANIM_"):
+            return "ANIM"
+        elif directive == "ATTR_LOD":
+            return "LOD"
+        elif directive.startswith("ATTR_"):
+            return "ATTR"
+        elif directive in {"TRIS", "LINES"}:
+            return "TRIS"
+        elif directive.startswith("LIGHT"):
+            return "LIGHT"
+        else:
+            return "OTHER"
+
+    def numbers(self) -> List[float]:
+        """args as numbers, skipping any that aren't, like a dataref"""
+        numbers = []
+        for arg in self.args:
+            try:
+                numbers.append(float(arg))
+            except ValueError:
+                pass
+        return numbers
+
+
+class ObjFile(NamedTuple):
+    line_ending: str  # "I" or "A"
+    version: int
+    header: List[ObjCommand]
+    vertices: numpy.ndarray  # VT, (n, 8) float64: x y z nx ny nz u v
+    line_vertices: numpy.ndarray  # VLINE, (n, 6) float64: x y z r g b
+    light_vertices: numpy.ndarray  # VLIGHT, (n, 6) float64: x y z r g b
+    indices: numpy.ndarray  # IDX10 and IDX, (n,) int32
+    commands: List[ObjCommand]
+
+    def commands_of_kind(self, kind: str) -> List[ObjCommand]:
+        return [command for command in self.commands if command.kind == kind]
+
+
+def _is_command(directive: str) -> bool:
+    return directive not in _HEADER_ATTRS and (
+        directive.startswith(("ANIM_", "ATTR_", "LIGHT"))
+        or directive in {"TRIS", "LINES"}
+    )
+
+
+def _read_table(
+    data: mmap.mmap,
+    pos: int,
+    prefix: bytes,
+    columns: Optional[int],
+    line_number: int,
+    expected_rows: int,
+) -> Tuple[numpy.ndarray, int, int]:
+    """
+    Parses the table whose first line starts at pos, a chunk at a time.
+    If expected_rows (from POINT_COUNTS) is right, the chunks are parsed
+    into the table directly instead of joined at the end.
+    Returns it, and the position and line number after it
+    """
+    dtype = numpy.int32 if columns is None else numpy.float64
+    table = (
+        numpy.empty((expected_rows, columns) if columns else expected_rows, dtype=dtype)
+        if expected_rows
+        else None
+    )  # type: Optional[numpy.ndarray]
+    filled = 0
+    chunks = []  # type: List[numpy.ndarray]
+    end = len(data)
+    while pos < end:
+        chunk_end = min(pos + _CHUNK_SIZE, end)
+        if chunk_end < end:
+            last_newline = data.rfind(b"\n", pos, chunk_end)
+            if last_newline == -1:
+                # A line longer than a chunk
+                last_newline = data.find(b"\n", chunk_end)
+                last_newline = end - 1 if last_newline == -1 else last_newline
+            chunk_end = last_newline + 1
+        chunk = data[pos:chunk_end]
+
+        num_lines = chunk.count(b"\n") + (not chunk.endswith(b"\n"))
+        # Quick check every line is in the table, without looking at each
+        if chunk.count(b"\n" + prefix) + chunk.startswith(prefix) != num_lines:
+            # The table ends in this chunk (or is indented), find where
+            table_end = 0
+            for line in chunk.split(b"\n"):
+                if not line.lstrip().startswith(prefix):
+                    break
+                table_end += len(line) + 1
+                table_end = min(table_end, len(chunk))
+            chunk = chunk[:table_end]
+            num_lines = chunk.count(b"\n") + (not chunk.endswith(b"\n"))
+        if not chunk:
+            break
+
+        text = _COMMENT_RE.sub(b"", chunk) if b"#" in chunk else chunk
+        if columns is None:
+            text = text.replace(b"IDX10", b"").replace(b"IDX", b"")
+        else:
+            text = text.replace(prefix, b"")
+        try:
+            values = numpy.array(text.split(), dtype=dtype)
+        except ValueError as e:
+            raise ValueError(
+                f"Line {line_number}-{line_number + num_lines - 1}:"
+                f" {prefix.decode()} table has something that isn't a number: {e}"
+            ) from None
+        if columns is not None:
+            if len(values) != num_lines * columns:
+                raise ValueError(
+                    f"Line {line_number}-{line_number + num_lines - 1}:"
+                    f" {prefix.decode()} lines must each have {columns} numbers"
+                )
+            values = values.reshape(num_lines, columns)
+
+        if table is not None and filled + len(values) <= len(table):
+            table[filled : filled + len(values)] = values
+            filled += len(values)
+        else:
+            # POINT_COUNTS was wrong, join them at the end instead
+            if table is not None:
+                chunks.append(table[:filled])
+                table = None
+            chunks.append(values)
+        pos += len(chunk)
+        line_number += num_lines
+
+    if table is not None:
+        chunks.append(table if filled == len(table) else table[:filled].copy())
+    # A table's first line always parses, there's at least one chunk
+    return (
+        chunks[0] if len(chunks) == 1 else numpy.concatenate(chunks),
+        pos,
+        line_number,
+    )
+
+
+def read_obj(filepath: str) -> ObjFile:
+    """
+    Reads an OBJ8 file. Raises OSError if it can't be read,
+    ValueError if it isn't an OBJ8 file or has a malformed table
+    """
+    with open(filepath, "rb") as obj_file:
+        try:
+            data = mmap.mmap(obj_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # An empty file can't be mapped
+            raise ValueError(f"{filepath} is empty") from None
+        if hasattr(data, "madvise"):
+            # Python 3.8+, pages already read can be dropped sooner
+            data.madvise(mmap.MADV_SEQUENTIAL)
+        try:
+            return _read(data, filepath)
+        finally:
+            data.close()
+
+
+def read_obj_string(content: str) -> ObjFile:
+    """Reads an OBJ8 file's content, like XPlaneFile.write returns"""
+    return _read(content.encode("utf-8"), "OBJ content")
+
+
+def _read(data: mmap.mmap, filepath: str) -> ObjFile:
+    preamble = []  # type: List[str]
+    header = []  # type: List[ObjCommand]
+    commands = []  # type: List[ObjCommand]
+    # Directive: The parts of that table, in order
+    tables = {
+        b"VT": [],
+        b"VLINE": [],
+        b"VLIGHT": [],
+        b"IDX": [],
+    }  # type: Dict[bytes, List[numpy.ndarray]]
+    # Table: Rows POINT_COUNTS says it has
+    point_counts = {}  # type: Dict[bytes, int]
+    in_header = True
+
+    pos = 0
+    line_number = 1
+    end = len(data)
+    while pos < end:
+        line_end = data.find(b"\n", pos)
+        line_end = end if line_end == -1 else line_end
+        line = data[pos:line_end]
+        if b"#" in line:
+            line = line[: line.index(b"#")]
+        parts = line.split()
+
+        if not parts:
+            pos = line_end + 1
+            line_number += 1
+            continue
+
+        if parts[0] in _TABLES:
+            prefix, columns = _TABLES[parts[0]]
+            table, pos, line_number = _read_table(
+                data,
+                pos,
+                prefix,
+                columns,
+                line_number,
+                max(
+                    0,
+                    point_counts.get(prefix, 0)
+                    - sum(len(part) for part in tables[prefix]),
+                ),
+            )
+            tables[prefix].append(table)
+            in_header = False
+            continue
+
+        if len(preamble) < 3:
+            preamble.append(line.strip().decode("utf-8", "replace"))
+        else:
+            directive, *args = line.decode("utf-8", "replace").split()
+            command = ObjCommand(line_number, directive, tuple(args))
+            if in_header and _is_command(directive):
+                in_header = False
+            if directive == "POINT_COUNTS":
+                try:
+                    point_counts = dict(
+                        zip((b"VT", b"VLINE", b"VLIGHT", b"IDX"), map(int, args))
+                    )
+                except ValueError:
+                    pass
+            (header if in_header else commands).append(command)
+
+        pos = line_end + 1
+        line_number += 1
+
+    if len(preamble) < 3 or preamble[0] not in {"I", "A"} or preamble[2] != "OBJ":
+        raise ValueError(
+            f"{filepath} is not an OBJ file, it must start with I or A, 800, OBJ"
+        )
+    try:
+        version = int(preamble[1])
+    except ValueError:
+        raise ValueError(
+            f"{filepath} has an unknown version, '{preamble[1]}'"
+        ) from None
+
+    def table(prefix: bytes, empty: numpy.ndarray) -> numpy.ndarray:
+        """A table split by blank lines or comments is joined back together"""
+        parts = tables[prefix]
+        if len(parts) > 1:
+            return numpy.concatenate(parts)
+        return parts[0] if parts else empty
+
+    return ObjFile(
+        line_ending=preamble[0],
+        version=version,
+        header=header,
+        vertices=table(b"VT", numpy.empty((0, 8))),
+        line_vertices=table(b"VLINE", numpy.empty((0, 6))),
+        light_vertices=table(b"VLIGHT", numpy.empty((0, 6))),
+        indices=table(b"IDX", numpy.empty(0, dtype=numpy.int32)),
+        commands=commands,
+    )
@@ -0,0 +1,131 @@
+"""
+A prefix tree over '/' seperated paths, like those in DataRefs.txt and Commands.txt.
+
+Nodes are made lazily: a node only learns its children the first time
+something asks for them. Since every node knows the range of the sorted paths
+beneath it, expanding a node only looks at those paths, and its count is free.
+
+Completing a prefix walks one node per path segment, so it costs O(depth)
+once the nodes along the way have been expanded.
+"""
+
+import bisect
+import itertools
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class PathTrieNode:
+    """
+    A node in the PathTrie. path is the full path to this node without a trailing '/',
+    name is the last segment of it. If a path in the trie ends here, item is the object it came from
+    """
+
+    def __init__(self, trie: "PathTrie", path: str, depth: int, lo: int, hi: int):
+        self.trie = trie
+        self.path = path
+        self.name = path[path.rfind("/") + 1 :]
+        self.depth = depth
+        # The range of trie._keys beneath this node
+        self._lo = lo
+        self._hi = hi
+        self._children = None  # type: Optional[Dict[str, "PathTrieNode"]]
+        self._children_names = None  # type: Optional[List[str]]
+
+        self.item = None  # type: Optional[object]
+        if depth and len(trie._keys[lo][0]) == depth:
+            # Because keys are sorted, a path ending here is always first
+            self.item = trie.items[trie._keys[lo][1]]
+
+    def __repr__(self) -> str:
+        return f"PathTrieNode(path='{self.path}', count={self.count})"
+
+    @property
+    def count(self) -> int:
+        """How many paths are at or beneath this node"""
+        return self._hi - self._lo
+
+    @property
+    def is_leaf(self) -> bool:
+        return not self.children
+
+    def _expand(self) -> None:
+        keys = self.trie._keys
+        lo = self._lo
+        # Paths ending here sort first, there's more than one if a path is repeated
+        while lo < self._hi and len(keys[lo][0]) == self.depth:
+            lo += 1
+        self._children = {}
+        for name, group in itertools.groupby(
+            range(lo, self._hi), key=lambda i: keys[i][0][self.depth]
+        ):
+            group = list(group)
+            child_path = f"{self.path}/{name}" if self.depth else name
+            self._children[name] = PathTrieNode(
+                self.trie, child_path, self.depth + 1, group[0], group[-1] + 1
+            )
+        self._children_names = list(self._children)
+
+    @property
+    def children(self) -> List["PathTrieNode"]:
+        """This node's children, sorted by name. Computed the first time it's asked for"""
+        if self._children is None:
+            self._expand()
+        return list(self._children.values())
+
+    def child(self, name: str) -> Optional["PathTrieNode"]:
+        if self._children is None:
+            self._expand()
+        return self._children.get(name)
+
+    def children_starting_with(self, prefix: str) -> List["PathTrieNode"]:
+        if self._children is None:
+            self._expand()
+        names = self._children_names
+        start = bisect.bisect_left(names, prefix)
+        end = bisect.bisect_left(names, prefix + "\uffff", lo=start)
+        return [self._children[name] for name in names[start:end]]
+
+    def walk(self) -> List[object]:
+        """Every item at or beneath this node, in path order"""
+        keys = self.trie._keys
+        return [self.trie.items[keys[i][1]] for i in range(self._lo, self._hi)]
+
+
+class PathTrie:
+    """
+    A lazily expanded prefix tree over the paths of items.
+    path turns an item into its '/' seperated path
+    """
+
+    def __init__(self, items: Sequence[object], path: Callable[[object], str]):
+        self.items = items
+        # Each key is (path segments, index into items), sorted by segments
+        self._keys = sorted(
+            (tuple(path(item).split("/")), i) for i, item in enumerate(items)
+        )  # type: List[Tuple[Tuple[str, ...], int]]
+        self.root = PathTrieNode(self, "", 0, 0, len(self._keys))
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def node(self, path: str) -> Optional[PathTrieNode]:
+        """Returns the node for a complete path or path prefix, like 'sim/cockpit2', or None"""
+        node = self.root
+        for segment in path.strip("/").split("/") if path.strip("/") else ():
+            node = node.child(segment)
+            if node is None:
+                return None
+        return node
+
+    def complete(self, prefix: str) -> List[PathTrieNode]:
+        """
+        Returns the nodes that could come next after prefix, sorted by name.
+
+        'sim/cockpit2/sw' completes to nodes like 'sim/cockpit2/switches',
+        'sim/cockpit2/' completes to all children of 'sim/cockpit2'
+        """
+        parent_path, _, partial = prefix.rpartition("/")
+        parent = self.node(parent_path)
+        if parent is None:
+            return []
+        return parent.children_starting_with(partial)
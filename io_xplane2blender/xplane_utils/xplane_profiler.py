@@ -0,0 +1,155 @@
+"""
+Records how long each phase of an export takes, for finding out why one is slow.
+
+Phases are timed with
+
+    with profiler.phase("collectXPlaneObjects", root=filename) as phase:
+        ...
+        phase.set(objects=len(objects))
+
+and nest. While the profiler isn't started phase returns a do-nothing phase,
+so leaving them in hot code costs only a function call.
+
+When finished, the phases can be written as a Chrome trace (open in
+chrome://tracing or https://ui.perfetto.dev) and summarized as a table.
+"""
+
+import collections
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+# Called with a phase's name and args as it ends
+PhaseEndListener = Callable[[str, Dict[str, Any]], None]
+
+
+class _NullPhase:
+    def __enter__(self) -> "_NullPhase":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def set(self, **args: Any) -> None:
+        pass
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    def __init__(self, profiler: "ExportProfiler", name: str, args: Dict[str, Any]):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self) -> "_Phase":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.profiler._record(self, time.perf_counter())
+
+    def set(self, **args: Any) -> None:
+        """Adds to this phase's arguments, such as how many objects it went through"""
+        self.args.update(args)
+
+
+class ExportProfiler:
+    def __init__(self) -> None:
+        self.enabled = False
+        self.origin = 0.0
+        # Chrome trace "complete" events
+        self.events = []  # type: List[Dict[str, Any]]
+        # Called with each phase's name and args as it ends, see xplane_memory_profiler
+        self.phase_end_listeners = []  # type: List[PhaseEndListener]
+
+    def start(self) -> None:
+        """Forgets any previous phases and starts recording"""
+        self.enabled = True
+        self.origin = time.perf_counter()
+        self.events.clear()
+
+    def stop(self) -> None:
+        self.enabled = False
+
+    def phase(self, name: str, **args: Any):
+        """
+        A context manager timing the phase name. args (JSON serializable)
+        are shown with the phase in the trace, ints are totalled in the summary
+        """
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name, args)
+
+    def _record(self, phase: _Phase, end: float) -> None:
+        self.events.append(
+            {
+                "name": phase.name,
+                "cat": "export",
+                "ph": "X",
+                "ts": round((phase.start - self.origin) * 1e6, 3),
+                "dur": round((end - phase.start) * 1e6, 3),
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": phase.args,
+            }
+        )
+        for listener in self.phase_end_listeners:
+            listener(phase.name, phase.args)
+
+    def write_chrome_trace(self, filepath: str) -> None:
+        """Raises OSError if the trace can't be written"""
+        with open(filepath, "w") as trace_file:
+            json.dump(
+                {"traceEvents": self.events, "displayTimeUnit": "ms"},
+                trace_file,
+                default=str,
+            )
+
+    def summary(self) -> List[str]:
+        """
+        Returns a table of every phase's calls, total and mean time, share of the
+        whole time recorded, and totals of its int arguments, slowest phase first
+        """
+        if not self.events:
+            return []
+
+        Totals = collections.namedtuple("Totals", ["calls", "dur", "counts"])
+        totals = {}  # type: Dict[str, Totals]
+        for event in self.events:
+            calls, dur, counts = totals.get(
+                event["name"], Totals(0, 0.0, collections.Counter())
+            )
+            counts.update(
+                {
+                    arg: value
+                    for arg, value in event["args"].items()
+                    if isinstance(value, int) and not isinstance(value, bool)
+                }
+            )
+            totals[event["name"]] = Totals(calls + 1, dur + event["dur"], counts)
+
+        whole = (
+            max(event["ts"] + event["dur"] for event in self.events)
+            - min(event["ts"] for event in self.events)
+        ) or 1
+        name_width = max(len("Phase"), *map(len, totals))
+        lines = [
+            f"{'Phase':<{name_width}} {'Calls':>7} {'Total ms':>10} {'Mean ms':>9} {'%':>6}  Counts",
+        ]
+        for name, (calls, dur, counts) in sorted(
+            totals.items(), key=lambda item: -item[1].dur
+        ):
+            lines.append(
+                f"{name:<{name_width}} {calls:>7} {dur / 1000:>10.2f}"
+                f" {dur / 1000 / calls:>9.3f} {100 * dur / whole:>6.1f}  "
+                + ", ".join(f"{arg}={count}" for arg, count in sorted(counts.items()))
+            )
+        return lines
+
+
+profiler = ExportProfiler()
@@ -0,0 +1,390 @@
+"""
+A small, Blender independent search engine for the contents of DataRefs.txt and Commands.txt.
+
+Build a SearchIndex once from the parsed DatarefInfoStructs or CommandInfoStructs,
+then ask it for ranked top-k matches as the user types.
+
+Query syntax is the same as the old UIList filter:
+one or more searches seperated by '|', each made of one or more search terms seperated by ' '.
+An entry matches a search if every term matches, and matches the query if it matches any search.
+
+A term matches an entry if it is
+    - a substring of the path (ranked by whole path token > path token prefix > anywhere in the path)
+    - a prefix of a word in the units or description
+
+If nothing matches, we fall back to fuzzy matching the path by shared trigrams,
+so small typos like "autopliot" still find something.
+
+Performance notes
+-----------------
+Ranking is done almost entirely with set operations so that even a
+query that matches all ~5,000 datarefs (say, "sim") costs well under a millisecond:
+entries are bucketed into groups by score with intersections
+and only the top-k of the best groups are ever sorted.
+"""
+
+import bisect
+import collections
+import heapq
+import itertools
+import re
+from typing import Callable, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+
+from io_xplane2blender.xplane_utils.xplane_path_trie import PathTrie
+
+# Scores for how well a single search term matches an entry
+SCORE_PATH_TOKEN = 8
+SCORE_PATH_TOKEN_PREFIX = 6
+SCORE_PATH_SUBSTRING = 4
+SCORE_TEXT_TOKEN_PREFIX = 2
+
+# Fraction of a query's trigrams a path must share to be a fuzzy match
+FUZZY_MIN_SIMILARITY = 0.4
+
+_TOKEN_SPLIT_REGEX = re.compile(r"[^a-z0-9]+")
+
+# How many results the search windows show at once
+RESULTS_PAGE_SIZE = 10
+
+# Caches are cleared, not evicted one by one, when they grow this large
+_MAX_CACHED_QUERIES = 256
+
+
+def _tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN_SPLIT_REGEX.split(text.lower()) if token]
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def _ngrams(text: str) -> Set[str]:
+    """All 1, 2, and 3 character substrings of text"""
+    return {text[i : i + n] for n in (1, 2, 3) for i in range(len(text) - n + 1)}
+
+
+def parse_query(query: str) -> List[Tuple[str, ...]]:
+    """
+    Splits a query into a list of searches, each a tuple of unique,
+    lowercase search terms, in the order they appeared
+    """
+    searches = []
+    for search in query.lower().split("|"):
+        terms = tuple(dict.fromkeys(term for term in search.split() if term))
+        if terms and terms not in searches:
+            searches.append(terms)
+    return searches
+
+
+class SearchIndex:
+    """
+    A token and n-gram index over (path, units, description) entries.
+
+    Results are indices into the entries the index was created from,
+    which are also kept in SearchIndex.items for convenience.
+    """
+
+    def __init__(
+        self,
+        items: Sequence[object],
+        fields: Callable[[object], Tuple[str, str, str]],
+    ):
+        """
+        items is any sequence of objects and
+        fields turns one into its (path, units, description) strings
+        """
+        self.items = items
+        self._fields = fields
+        self._path_trie = None  # type: Optional[PathTrie]
+        self._paths = []  # type: List[str]
+
+        path_tokens = collections.defaultdict(set)  # type: Dict[str, Set[int]]
+        text_tokens = collections.defaultdict(set)  # type: Dict[str, Set[int]]
+        ngrams = collections.defaultdict(set)  # type: Dict[str, Set[int]]
+
+        for i, item in enumerate(items):
+            path, units, description = fields(item)
+            path = path.lower()
+            self._paths.append(path)
+            for token in _tokenize(path):
+                path_tokens[token].add(i)
+            for token in _tokenize(units or ""):
+                text_tokens[token].add(i)
+            for token in _tokenize(description or ""):
+                text_tokens[token].add(i)
+            for ngram in _ngrams(path):
+                ngrams[ngram].add(i)
+
+        # Tie breaker for equal scores: shorter paths first, then file order
+        self._by_rank = sorted(
+            range(len(self._paths)), key=lambda i: (len(self._paths[i]), i)
+        )  # type: List[int]
+        self._tiebreak = [0] * len(self._paths)  # type: List[int]
+        for rank, i in enumerate(self._by_rank):
+            self._tiebreak[i] = rank
+
+        self._path_tokens = {
+            token: frozenset(ids) for token, ids in path_tokens.items()
+        }  # type: Dict[str, FrozenSet[int]]
+        self._path_tokens_sorted = sorted(self._path_tokens)
+        self._text_tokens = {
+            token: frozenset(ids) for token, ids in text_tokens.items()
+        }  # type: Dict[str, FrozenSet[int]]
+        self._text_tokens_sorted = sorted(self._text_tokens)
+        self._ngrams = {
+            ngram: frozenset(ids) for ngram, ids in ngrams.items()
+        }  # type: Dict[str, FrozenSet[int]]
+        self._all = frozenset(range(len(self._paths)))
+
+        self._term_cache = {}  # type: Dict[str, Tuple[FrozenSet[int], ...]]
+        self._groups_cache = {}  # type: Dict[str, Dict[int, FrozenSet[int]]]
+        self._query_cache = {}  # type: Dict[Tuple[str, int], List[int]]
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    @property
+    def path_trie(self) -> PathTrie:
+        """A prefix tree over the same entries, made on first use"""
+        if self._path_trie is None:
+            self._path_trie = PathTrie(self.items, lambda item: self._fields(item)[0])
+        return self._path_trie
+
+    @classmethod
+    def from_datarefs(cls, dref_infos: Sequence[object]) -> "SearchIndex":
+        """Creates an index from a list of DatarefInfoStructs"""
+        return cls(dref_infos, lambda d: (d.path, d.units, d.description))
+
+    @classmethod
+    def from_commands(cls, command_infos: Sequence[object]) -> "SearchIndex":
+        """Creates an index from a list of CommandInfoStructs"""
+        return cls(command_infos, lambda c: (c.command, "", c.description))
+
+    @staticmethod
+    def _prefixed(
+        sorted_tokens: List[str], postings: Dict[str, FrozenSet[int]], prefix: str
+    ) -> FrozenSet[int]:
+        """Union of the postings of every token starting with prefix"""
+        start = bisect.bisect_left(sorted_tokens, prefix)
+        end = bisect.bisect_left(sorted_tokens, prefix + "\uffff", lo=start)
+        if end - start == 1:
+            return postings[sorted_tokens[start]]
+        return frozenset().union(
+            *(postings[token] for token in sorted_tokens[start:end])
+        )
+
+    def _path_substring(self, term: str) -> FrozenSet[int]:
+        if len(term) <= 3:
+            # Every 1, 2, and 3 character substring is indexed
+            return self._ngrams.get(term, frozenset())
+
+        postings = []
+        for trigram in _trigrams(term):
+            try:
+                postings.append(self._ngrams[trigram])
+            except KeyError:
+                return frozenset()
+        postings.sort(key=len)
+        paths = self._paths
+        return frozenset(
+            i for i in postings[0].intersection(*postings[1:]) if term in paths[i]
+        )
+
+    def _term_tiers(self, term: str) -> Tuple[FrozenSet[int], ...]:
+        """
+        Returns (all matches, path token, path token prefix, path substring) for a term.
+        Each tier is a subset of the next and anything in all matches but
+        not in path substring only matched the units or description
+        """
+        try:
+            return self._term_cache[term]
+        except KeyError:
+            pass
+
+        exact = self._path_tokens.get(term, frozenset())
+        prefix = self._prefixed(self._path_tokens_sorted, self._path_tokens, term)
+        substring = self._path_substring(term)
+        text = self._prefixed(self._text_tokens_sorted, self._text_tokens, term)
+
+        if len(self._term_cache) > _MAX_CACHED_QUERIES:
+            self._term_cache.clear()
+        tiers = (substring | text, exact, prefix, substring)
+        self._term_cache[term] = tiers
+        return tiers
+
+    def _score_groups(self, terms: Tuple[str, ...]) -> Dict[int, FrozenSet[int]]:
+        """
+        Scores every entry matching all terms,
+        returned as a dictionary of score to the entries with that score
+        """
+        all_tiers = [self._term_tiers(term) for term in terms]
+        candidates = frozenset.intersection(*(tiers[0] for tiers in all_tiers))
+        if not candidates:
+            return {}
+
+        groups = {0: candidates}  # type: Dict[int, FrozenSet[int]]
+        for _, exact, prefix, substring in all_tiers:
+            next_groups = {}  # type: Dict[int, FrozenSet[int]]
+
+            def add(score: int, ids: FrozenSet[int]) -> None:
+                if score in next_groups:
+                    next_groups[score] = next_groups[score] | ids
+                else:
+                    next_groups[score] = ids
+
+            for score, remaining in groups.items():
+                for weight, tier in (
+                    (SCORE_PATH_TOKEN, exact),
+                    (SCORE_PATH_TOKEN_PREFIX, prefix),
+                    (SCORE_PATH_SUBSTRING, substring),
+                ):
+                    hits = remaining & tier
+                    if hits:
+                        add(score + weight, hits)
+                        remaining = remaining - hits
+                    if not remaining:
+                        break
+                else:
+                    add(score + SCORE_TEXT_TOKEN_PREFIX, remaining)
+            groups = next_groups
+        return groups
+
+    def _fuzzy_groups(self, terms: Tuple[str, ...]) -> Dict[int, FrozenSet[int]]:
+        """
+        Scores entries by the fraction of the query's trigrams their path shares,
+        used when nothing matches exactly
+        """
+        query_trigrams = set()
+        for term in terms:
+            query_trigrams |= _trigrams(term)
+        if not query_trigrams:
+            return {}
+
+        # Trigrams like "sim" are in nearly every path. Counting them for
+        # every entry is most of the cost, so they're only counted
+        # for entries that already share a rarer trigram
+        postings = [
+            self._ngrams[trigram]
+            for trigram in query_trigrams
+            if trigram in self._ngrams
+        ]
+        rare = [ids for ids in postings if len(ids) <= len(self._paths) // 8]
+        common = [ids for ids in postings if len(ids) > len(self._paths) // 8]
+        if not rare:
+            rare, common = common, []
+
+        shared = collections.Counter()
+        for ids in rare:
+            shared.update(ids)
+        for ids in common:
+            for i in shared:
+                if i in ids:
+                    shared[i] += 1
+
+        min_shared = max(1, int(len(query_trigrams) * FUZZY_MIN_SIMILARITY + 0.5))
+        groups = collections.defaultdict(set)
+        for i, count in shared.items():
+            if count >= min_shared:
+                groups[count].add(i)
+        return {score: frozenset(ids) for score, ids in groups.items()}
+
+    def _top_k(self, groups: Dict[int, FrozenSet[int]], k: int) -> List[int]:
+        results = []
+        for score in sorted(groups, reverse=True):
+            group = groups[score]
+            needed = k - len(results)
+            if len(group) * 16 > len(self._paths):
+                # Big groups are dense enough that walking the
+                # tie breaking order finds needed members quickly
+                results.extend(
+                    itertools.islice((i for i in self._by_rank if i in group), needed)
+                )
+            else:
+                results.extend(
+                    heapq.nsmallest(needed, group, key=self._tiebreak.__getitem__)
+                )
+            if len(results) >= k:
+                break
+        return results
+
+    def _groups(self, query: str) -> Dict[int, FrozenSet[int]]:
+        try:
+            return self._groups_cache[query]
+        except KeyError:
+            pass
+
+        searches = parse_query(query)
+        if not searches:
+            groups = {0: self._all}
+        else:
+            groups = self._merge_groups(
+                [self._score_groups(terms) for terms in searches]
+            )
+            if not groups:
+                groups = self._merge_groups(
+                    [self._fuzzy_groups(terms) for terms in searches]
+                )
+
+        if len(self._groups_cache) > _MAX_CACHED_QUERIES:
+            self._groups_cache.clear()
+        self._groups_cache[query] = groups
+        return groups
+
+    def count(self, query: str) -> int:
+        """Returns how many entries match the query"""
+        return sum(map(len, self._groups(query).values()))
+
+    def search(self, query: str, k: int = RESULTS_PAGE_SIZE) -> List[int]:
+        """
+        Returns the indices of the best k entries for the query, best first.
+        An empty query matches everything in file order
+        """
+        key = (query, k)
+        try:
+            return self._query_cache[key]
+        except KeyError:
+            pass
+
+        if not parse_query(query):
+            results = list(range(min(k, len(self._paths))))
+        else:
+            results = self._top_k(self._groups(query), k)
+
+        if len(self._query_cache) > _MAX_CACHED_QUERIES:
+            self._query_cache.clear()
+        self._query_cache[key] = results
+        return results
+
+    def search_page(self, query: str, page: int) -> List[int]:
+        """
+        Returns the indices of page (starting at 0) of the results,
+        RESULTS_PAGE_SIZE entries long
+        """
+        return self.search(query, (page + 1) * RESULTS_PAGE_SIZE)[
+            page * RESULTS_PAGE_SIZE :
+        ]
+
+    def search_items(self, query: str, k: int = RESULTS_PAGE_SIZE) -> List[object]:
+        """Like search, but returns the entries themselves"""
+        return [self.items[i] for i in self.search(query, k)]
+
+    @staticmethod
+    def _merge_groups(
+        all_groups: List[Dict[int, FrozenSet[int]]],
+    ) -> Dict[int, FrozenSet[int]]:
+        """Merges the groups of each '|' search, keeping each entry's best score"""
+        all_groups = [groups for groups in all_groups if groups]
+        if len(all_groups) <= 1:
+            return all_groups[0] if all_groups else {}
+
+        best_scores = {}  # type: Dict[int, int]
+        for groups in all_groups:
+            for score, ids in groups.items():
+                for i in ids:
+                    if best_scores.get(i, -1) < score:
+                        best_scores[i] = score
+
+        merged = collections.defaultdict(set)
+        for i, score in best_scores.items():
+            merged[score].add(i)
+        return {score: frozenset(ids) for score, ids in merged.items()}
@@ -1,10 +1,13 @@
-import array
+import json
+import os
+import subprocess
 import sys
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple, Union
+from typing import IO, Callable, Dict, List, NamedTuple, Optional, Set, Tuple, Union
 
 import bpy
+import numpy
 
 from io_xplane2blender.tests.test_creation_helpers import (
     create_datablock_image_from_disk,
@@ -12,25 +15,65 @@ from io_xplane2blender.tests.test_creation_helpers import (
 
 import time
 
-_Pixel = List[float]
 
+def new_wiper_gradient(master_width: int, master_height: int) -> numpy.ndarray:
+    """Returns an empty (height, width, RGBA) wiper gradient to add frames to"""
+    return numpy.zeros((master_height, master_width, 4), dtype=numpy.float32)
 
-def _get_pixel(
-    pixels: bpy.types.Image, x: int, y: int, width: int, height: int
-) -> _Pixel:
-    num_pixels = width * height
-    i = 4 * (y * width + x)
-    return list(pixels[i : i + 4])
 
+def read_image_pixels(img: bpy.types.Image) -> numpy.ndarray:
+    """Returns img's pixels as a (height, width, channels) float32 array"""
+    width, height = img.size
+    pixels = numpy.empty(width * height * img.channels, dtype=numpy.float32)
+    img.pixels.foreach_get(pixels)
+    return pixels.reshape(height, width, img.channels)
 
-def _put_pixel(
-    pixels: bpy.types.Image, x: int, y: int, width: int, height: int, pixel: _Pixel
+
+def read_image_file_pixels(filepath: Path) -> numpy.ndarray:
+    """Like read_image_pixels, for an image on disk. No Image datablock is left behind"""
+    img = create_datablock_image_from_disk(filepath)
+    try:
+        return read_image_pixels(img)
+    finally:
+        bpy.data.images.remove(img)
+
+
+def add_wiper_frame(
+    master: numpy.ndarray, pixels: numpy.ndarray, slot: int, step: int
 ) -> None:
-    i = 4 * (y * width + x)
-    pixels[i] = pixel[0]
-    pixels[i + 1] = pixel[1]
-    pixels[i + 2] = pixel[2]
-    pixels[i + 3] = pixel[3]
+    """
+    Folds one baked frame into the master wiper gradient: wherever the frame's
+    alpha is > 0, the slot's channel becomes step/255.
+
+    slot is 1-4, step is 1-255, and pixels must be the same size as master
+    """
+    assert 1 <= slot <= 4, f"slot {slot} must be 1-4"
+    assert master.shape[:2] == pixels.shape[:2], (
+        f"Frame size {pixels.shape[1::-1]} does not match"
+        f" master size {master.shape[1::-1]}"
+    )
+    master[pixels[:, :, 3] > 0, slot - 1] = step / 255
+
+
+def save_wiper_gradient(master: numpy.ndarray, master_filepath: Path) -> None:
+    """Saves the master wiper gradient. Raises OSError if saving has an issue"""
+    master_height, master_width = master.shape[:2]
+    try:
+        bpy.data.images.remove(bpy.data.images[master_filepath.stem])
+    except KeyError:
+        pass
+
+    master_img = bpy.data.images.new(
+        master_filepath.stem, master_width, master_height, alpha=True
+    )
+    try:
+        master_img.filepath = str(master_filepath)
+        print("Saving", master_img.filepath)
+        master_img.pixels.foreach_set(master.ravel())
+        master_img.save()
+        print("Saved")
+    finally:
+        bpy.data.images.remove(master_img)
 
 
 def make_wiper_images(
@@ -49,51 +92,241 @@ def make_wiper_images(
     'wiper_gradient_texture.png'
 
     These are passed by hand so we can do less work with image data blocks in here.
+    Only one frame is loaded at a time.
     """
     assert (
         len(img_paths) and len(img_paths) % 255 == 0
     ), f"{len(img_paths)} is not a multiple of 255"
     assert len(img_paths) <= (255 * 4), f"{len(img_paths)} is > {255*4}"
 
-    try:
-        bpy.data.images.remove(bpy.data.images[master_filepath.stem])
-    except KeyError:
-        pass
-    finally:
-        master_array = array.array(
-            "f", (0.0 for _ in range(master_width * master_height * 4))
-        )
+    master = new_wiper_gradient(master_width, master_height)
 
     for i, path in enumerate(img_paths):
         step = (i % 255) + 1
         slot = int(path.name[path.name.rfind("slot") + 4])
-        frame = int(path.name[path.name.rfind("_") + 1 : path.name.rfind("_") + 4])
 
-        img = create_datablock_image_from_disk(path)
-        pixels = array.array("f", img.pixels)
+        add_wiper_frame(master, read_image_file_pixels(path), slot, step)
 
-        for y in range(master_height - 1, -1, -1):
-            for x in range(0, master_width):
-                img_pixel = _get_pixel(pixels, x, y, master_width, master_height)
-                if img_pixel[3] > 0:
-                    m_pixel = _get_pixel(
-                        master_array, x, y, master_width, master_height
-                    )
-                    m_pixel[slot - 1] = step / 255
+    save_wiper_gradient(master, master_filepath)
+    return master_filepath
 
-                    _put_pixel(master_array, x, y, master_width, master_height, m_pixel)
 
-        bpy.data.images.remove(img)
+# --- Baking ------------------------------------------------------------------
+# The bake can be split across background Blenders ("workers"), each opening a
+# copy of the .blend and baking its share of the frames to the temp folder.
+# Frames already in the temp folder are never baked again, so a bake that was
+# interrupted picks up where it left off.
+
+_BAKE_COPY_FILENAME = "_wiper_bake.blend"
+_BAKE_MANIFEST_FILENAME = "_wiper_bake_manifest.json"
+
+
+class WiperFrame(NamedTuple):
+    slot: int  # 1-4
+    wiper_object_name: str
+    cfra: int
+
+
+def wiper_frame_filepath(
+    bake_temp_folder: Path, img_filepath: Path, slot: int, cfra: int
+) -> Path:
+    """The temporary file a baked frame is saved to"""
+    return bake_temp_folder / Path(f"{img_filepath.stem}_slot{slot}_{cfra:03}.png")
+
+
+def select_for_bake(
+    view_layer: bpy.types.ViewLayer,
+    wiper_object: bpy.types.Object,
+    windshield: bpy.types.Object,
+) -> None:
+    """Select Wiper Object then Windshield, as the active object"""
+    for obj in view_layer.objects:
+        if obj.select_get(view_layer=view_layer):
+            obj.select_set(False, view_layer=view_layer)
+    wiper_object.select_set(True, view_layer=view_layer)
+    windshield.select_set(True, view_layer=view_layer)
+    view_layer.objects.active = windshield
+
+
+def bake_frame(scene: bpy.types.Scene, cfra: int) -> Set[str]:
+    """Bakes the selected wiper object onto the active windshield at a frame"""
+    scene.frame_set(cfra)
+    if scene.render.engine == "CYCLES":
+        return bpy.ops.object.bake(type=scene.cycles.bake_type)
+    else:
+        return bpy.ops.object.bake_image()
+
+
+def save_baked_frame(img: bpy.types.Image, filepath: Path) -> None:
+    """
+    Saves the bake image to filepath, without changing where img normally saves to.
+    The file only appears once it is complete, so a half written frame can't be reused
+    """
+    part_filepath = filepath.with_name(filepath.stem + "_part.png")
+    # Currently the api has no img.save_as()
+    orig = img.filepath_raw
+    # !!! IMPORTANT! You must use filepath_raw! !!!
+    img.filepath_raw = str(part_filepath)
+    try:
+        img.save()
+    finally:
+        img.filepath_raw = orig
+    os.replace(part_filepath, filepath)
+
+
+def prepare_bake_temp_folder(bake_temp_folder: Path, fingerprint: Dict) -> None:
+    """
+    Makes the temp folder, clearing out frames from a different bake.
+    fingerprint is anything that would make old frames wrong, like the
+    image size or wiper objects
+    """
+    bake_temp_folder.mkdir(parents=True, exist_ok=True)
+    manifest_filepath = bake_temp_folder / _BAKE_MANIFEST_FILENAME
     try:
-        master = bpy.data.images.new(
-            master_filepath.stem, master_width, master_height, alpha=True
+        with open(manifest_filepath) as manifest_file:
+            same_bake = json.load(manifest_file) == fingerprint
+    except (OSError, ValueError):
+        same_bake = False
+
+    if not same_bake:
+        for old_frame in bake_temp_folder.glob("*.png"):
+            old_frame.unlink()
+        with open(manifest_filepath, "w") as manifest_file:
+            json.dump(fingerprint, manifest_file)
+
+
+def bake_in_workers(
+    frames: List[WiperFrame],
+    windshield: bpy.types.Object,
+    img: bpy.types.Image,
+    bake_temp_folder: Path,
+    num_workers: int,
+    report_progress: Callable[[int, int], None],
+) -> Optional[str]:
+    """
+    Bakes frames not already in bake_temp_folder using num_workers background Blenders,
+    calling report_progress(num_baked, num_frames) as they finish.
+
+    The current file, as it is now (selection and bake settings included), is what
+    is baked. Returns None on success or an error message.
+    """
+    img_filepath = Path(bpy.path.abspath(img.filepath, library=img.library))
+    todo = [
+        frame
+        for frame in frames
+        if not wiper_frame_filepath(
+            bake_temp_folder, img_filepath, frame.slot, frame.cfra
+        ).exists()
+    ]
+    report_progress(len(frames) - len(todo), len(frames))
+    if not todo:
+        return None
+
+    blend_copy = bake_temp_folder / _BAKE_COPY_FILENAME
+    bpy.ops.wm.save_as_mainfile(filepath=str(blend_copy), copy=True)
+
+    addon_name = __name__.split(".")[0]
+    workers = []  # type: List[Tuple[subprocess.Popen, IO[str]]]
+    for i in range(min(num_workers, len(todo))):
+        job_filepath = bake_temp_folder / f"_wiper_bake_job_{i}.json"
+        with open(job_filepath, "w") as job_file:
+            json.dump(
+                {
+                    "scene": bpy.context.scene.name,
+                    "windshield": windshield.name,
+                    "image": img.name,
+                    "bake_temp_folder": str(bake_temp_folder),
+                    "img_filepath": str(img_filepath),
+                    # Every nth frame, so the workers finish at about the same time
+                    "frames": todo[i::num_workers],
+                },
+                job_file,
+            )
+        log_file = open(bake_temp_folder / f"_wiper_bake_job_{i}.log", "w")
+        workers.append(
+            (
+                subprocess.Popen(
+                    [
+                        bpy.app.binary_path,
+                        "-b",
+                        "-noaudio",
+                        "--addons",
+                        addon_name,
+                        str(blend_copy),
+                        "--python-exit-code",
+                        "1",
+                        "--python-expr",
+                        f"import sys; from {__name__} import bake_worker_main;"
+                        " bake_worker_main(sys.argv[sys.argv.index('--') + 1])",
+                        "--",
+                        str(job_filepath),
+                    ],
+                    stdout=log_file,
+                    stderr=subprocess.STDOUT,
+                ),
+                log_file,
+            )
         )
-        master.filepath = str(master_filepath)
-        print("Saving", master.filepath)
-        master.pixels[:] = master_array
-        master.save()
-        print("Saved")
-    except OSError:
+
+    try:
+        num_baked = len(frames) - len(todo)
+        while any(worker.poll() is None for worker, _ in workers):
+            time.sleep(0.5)
+            now_baked = len(frames) - sum(
+                not wiper_frame_filepath(
+                    bake_temp_folder, img_filepath, frame.slot, frame.cfra
+                ).exists()
+                for frame in todo
+            )
+            if now_baked != num_baked:
+                num_baked = now_baked
+                report_progress(num_baked, len(frames))
+    except KeyboardInterrupt:
+        # Whatever was baked is kept for next time
+        for worker, _ in workers:
+            worker.terminate()
         raise
-    else:
-        bpy.data.images.remove(master)
+    finally:
+        for worker, log_file in workers:
+            worker.wait()
+            log_file.close()
+
+    failed = [i for i, (worker, _) in enumerate(workers) if worker.returncode]
+    if failed:
+        return (
+            f"{len(failed)} of {len(workers)} bake workers failed, see"
+            f" {bake_temp_folder / f'_wiper_bake_job_{failed[0]}.log'}."
+            " Baking again will reuse the frames that finished"
+        )
+    report_progress(len(frames), len(frames))
+    return None
+
+
+def bake_worker_main(job_filepath: str) -> None:
+    """
+    The entry point of a background Blender started by bake_in_workers,
+    bakes and saves the frames listed in the job file
+    """
+    with open(job_filepath) as job_file:
+        job = json.load(job_file)
+
+    scene = bpy.data.scenes[job["scene"]]
+    view_layer = bpy.context.view_layer
+    windshield = bpy.data.objects[job["windshield"]]
+    img = bpy.data.images[job["image"]]
+    bake_temp_folder = Path(job["bake_temp_folder"])
+    img_filepath = Path(job["img_filepath"])
+
+    for slot, wiper_object_name, cfra in job["frames"]:
+        select_for_bake(view_layer, bpy.data.objects[wiper_object_name], windshield)
+        bake_start = time.perf_counter()
+        if "CANCELLED" in bake_frame(scene, cfra):
+            print(f"Could not bake slot {slot} frame {cfra}")
+            sys.exit(1)
+        save_baked_frame(
+            img, wiper_frame_filepath(bake_temp_folder, img_filepath, slot, cfra)
+        )
+        print(
+            f"Baked slot {slot} frame {cfra} in {time.perf_counter() - bake_start:.2f}s"
+        )
+    sys.exit(0)
@@ -0,0 +1,365 @@
+# Microbenchmarks for the exporter's pure Python hot paths (floatToStr, the VT and
+# IDX writers, XPlaneCommands.writeAttribute, the keyframe writers, and the lights.txt
+# parser) that run without Blender, in seconds, on any Python 3.7+.
+#
+# python3 microbenchmarks.py
+#
+# The exporter is imported against the stand-in bpy and mathutils in
+# tests/microbenchmarks/blender_stand_in.py, and fed data recorded from the test
+# fixtures' OBJs. Each benchmark is timed in --samples samples, reported as ops/sec
+# with a 95% confidence interval. Save results with --json and compare a change
+# against them with --compare.
+#
+# These don't replace benchmarks.py or the test suite, which run the real exporter!
+
+import argparse
+import array
+import json
+import math
+import os
+import re
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), "tests", "microbenchmarks"
+    ),
+)
+
+import blender_stand_in
+import recorded_data
+
+blender_stand_in.install()
+
+from mathutils import Euler, Matrix, Vector
+
+from io_xplane2blender import xplane_props
+from io_xplane2blender.xplane_helpers import floatToStr
+from io_xplane2blender.xplane_types.xplane_attribute import XPlaneAttribute
+from io_xplane2blender.xplane_types.xplane_bone import XPlaneBone
+from io_xplane2blender.xplane_types.xplane_commands import XPlaneCommands
+from io_xplane2blender.xplane_types.xplane_keyframe_collection import (
+    XPlaneKeyframeCollection,
+)
+from io_xplane2blender.xplane_types.xplane_mesh import XPlaneMesh
+from io_xplane2blender.xplane_utils import xplane_lights_txt_parser
+
+# Two-sided 95% critical values of Student's t, by degrees of freedom
+# fmt: off
+_T_95 = {
+    1: 12.71, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306,
+    9: 2.262, 10: 2.228, 12: 2.179, 15: 2.131, 20: 2.086, 25: 2.060, 30: 2.042,
+}
+# fmt: on
+
+
+def _make_argparse():
+    parser = argparse.ArgumentParser(
+        description="Runs the XPlane2Blender microbenchmarks, without Blender"
+    )
+    parser.add_argument(
+        "-f", "--filter", help="Filter benchmarks with a regular expression", type=str
+    )  # [regex]
+    parser.add_argument(
+        "-s",
+        "--samples",
+        default=10,
+        type=int,
+        help="How many timed samples each benchmark gets",
+    )
+    parser.add_argument(
+        "--min-time",
+        default=0.2,
+        type=float,
+        help="Seconds each sample runs for, at least",
+    )
+    parser.add_argument(
+        "--json",
+        type=str,
+        help="Write the results as JSON here",
+    )
+    parser.add_argument(
+        "--compare",
+        type=str,
+        help="Compare to results written before with --json",
+    )
+    return parser
+
+
+def t_95(degrees_of_freedom: int) -> float:
+    """The critical value for the closest tabled degrees of freedom at or below"""
+    if degrees_of_freedom > 30:
+        return 1.96
+    return _T_95[max(df for df in _T_95 if df <= max(degrees_of_freedom, 1))]
+
+
+class Result(NamedTuple):
+    mean: float
+    ci: float  # +/- ops/sec of the 95% confidence interval
+    samples: List[float]
+
+
+def measure(run: Callable[[], int], samples: int, min_time: float) -> Result:
+    """
+    Calls run, which returns how many operations it did, enough times for a sample
+    to take at least min_time. Returns the ops/sec of samples samples
+    """
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops = max(loops * 2, int(loops * min_time / max(elapsed, 1e-9)))
+
+    ops_per_sec = []
+    for _ in range(samples):
+        ops = 0
+        start = time.perf_counter()
+        for _ in range(loops):
+            ops += run()
+        ops_per_sec.append(ops / (time.perf_counter() - start))
+
+    mean = statistics.mean(ops_per_sec)
+    ci = (
+        t_95(len(ops_per_sec) - 1)
+        * statistics.stdev(ops_per_sec)
+        / math.sqrt(len(ops_per_sec))
+        if len(ops_per_sec) > 1
+        else 0.0
+    )
+    return Result(mean, ci, ops_per_sec)
+
+
+# --- The Benchmarks -----------------------------------------------------------
+# Each makes its state from the recorded data once and returns a function
+# doing one batch of work, which returns how many operations that was
+
+
+class _Keyframe:
+    """The parts of an XPlaneKeyframe the writers read, XPlaneKeyframe needs Blender"""
+
+    def __init__(self, dataref: str, value: float, location, rotation) -> None:
+        self.dataref = dataref
+        self.dataref_value = value
+        self.location = Vector(location)
+        self.rotation = Euler(rotation, "XYZ")
+        self.rotationMode = "XYZ"
+
+
+def _make_bone(depth: int) -> XPlaneBone:
+    """A bare XPlaneBone, depth bones deep, whose pre-animation matrix is identity"""
+    parent = None
+    for _ in range(depth + 1):
+        bone = XPlaneBone.__new__(XPlaneBone)
+        bone.parent = parent
+        bone.datarefs = {}
+        bone.animations = {}
+        bone.getPreAnimationMatrix = lambda: Matrix.Identity(4)
+        parent = bone
+    return bone
+
+
+def bench_float_to_str(data: recorded_data.RecordedData) -> Callable[[], int]:
+    floats = [component for vertex in data.vertices[:20000] for component in vertex]
+
+    def run() -> int:
+        for f in floats:
+            floatToStr(f)
+        return len(floats)
+
+    return run
+
+
+def bench_write_vertices(data: recorded_data.RecordedData) -> Callable[[], int]:
+    mesh = XPlaneMesh()
+    mesh.vertices = data.vertices
+
+    def run() -> int:
+        mesh.writeVertices()
+        return len(mesh.vertices)
+
+    return run
+
+
+def bench_write_indices(data: recorded_data.RecordedData) -> Callable[[], int]:
+    mesh = XPlaneMesh()
+    mesh.indices = array.array("i", data.indices)
+
+    def run() -> int:
+        mesh.writeIndices()
+        return len(mesh.indices)
+
+    return run
+
+
+def bench_write_attribute(data: recorded_data.RecordedData) -> Callable[[], int]:
+    attributes = [XPlaneAttribute(attr.name, attr.value) for attr in data.attributes]
+
+    class _XPlaneObject:
+        xplaneBone = _make_bone(depth=2)
+
+    xplane_object = _XPlaneObject()
+
+    def run() -> int:
+        # The state of what is written matters, every batch starts from the start
+        commands = XPlaneCommands(None)
+        for attr in attributes:
+            commands.writeAttribute(attr, xplane_object)
+        return len(attributes)
+
+    return run
+
+
+def _make_animated_bones(
+    data: recorded_data.RecordedData, rotation: bool
+) -> List[XPlaneBone]:
+    bones = []
+    for i, recorded in enumerate(data.keyframes):
+        if (recorded.axis is not None) != rotation:
+            continue
+        keyframes = []
+        for value, key in recorded.keys:
+            if rotation:
+                euler = [0.0, 0.0, 0.0]
+                euler["XYZ".index(recorded.axis)] = math.radians(key)
+                keyframes.append(_Keyframe(recorded.dataref, value, (0, 0, 0), euler))
+            else:
+                keyframes.append(_Keyframe(recorded.dataref, value, key, (0, 0, 0)))
+        bone = _make_bone(depth=i % 4)
+        bone.animations[recorded.dataref] = XPlaneKeyframeCollection(keyframes)
+        bones.append(bone)
+    return bones
+
+
+def bench_write_translation_keyframes(
+    data: recorded_data.RecordedData,
+) -> Callable[[], int]:
+    bones = _make_animated_bones(data, rotation=False)
+
+    def run() -> int:
+        for bone in bones:
+            for dataref in bone.animations:
+                bone._writeTranslationKeyframes(dataref)
+        return len(bones)
+
+    return run
+
+
+def bench_write_rotation_keyframes(
+    data: recorded_data.RecordedData,
+) -> Callable[[], int]:
+    bones = _make_animated_bones(data, rotation=True)
+
+    def run() -> int:
+        for bone in bones:
+            for dataref in bone.animations:
+                bone._writeRotationKeyframes(dataref)
+        return len(bones)
+
+    return run
+
+
+def bench_parse_lights_file(data: recorded_data.RecordedData) -> Callable[[], int]:
+    def run() -> int:
+        xplane_lights_txt_parser._parsed_lights_txt_content = {}
+        xplane_lights_txt_parser.parse_lights_file()
+        return 1
+
+    return run
+
+
+def bench_get_parsed_light(data: recorded_data.RecordedData) -> Callable[[], int]:
+    xplane_lights_txt_parser.parse_lights_file()
+    light_names = list(xplane_lights_txt_parser._parsed_lights_txt_content)
+
+    def run() -> int:
+        for light_name in light_names:
+            xplane_lights_txt_parser.get_parsed_light(light_name)
+        return len(light_names)
+
+    return run
+
+
+class Benchmark(NamedTuple):
+    setup: Callable[[recorded_data.RecordedData], Callable[[], int]]
+    unit: str
+
+
+BENCHMARKS = {
+    "floatToStr": Benchmark(bench_float_to_str, "floats"),
+    "XPlaneMesh.writeVertices": Benchmark(bench_write_vertices, "VT"),
+    "XPlaneMesh.writeIndices": Benchmark(bench_write_indices, "indices"),
+    "XPlaneCommands.writeAttribute": Benchmark(bench_write_attribute, "ATTR"),
+    "XPlaneBone._writeTranslationKeyframes": Benchmark(
+        bench_write_translation_keyframes, "tables"
+    ),
+    "XPlaneBone._writeRotationKeyframes": Benchmark(
+        bench_write_rotation_keyframes, "tables"
+    ),
+    "parse_lights_file": Benchmark(bench_parse_lights_file, "files"),
+    "get_parsed_light": Benchmark(bench_get_parsed_light, "lights"),
+}  # type: Dict[str, Benchmark]
+
+
+def main(argv=None) -> int:
+    """
+    Return is exit code, 0 for good, anything else is an error
+    """
+    if argv is None:
+        argv = _make_argparse().parse_args(sys.argv[1:])
+
+    timer_start = time.perf_counter()
+    data = recorded_data.record()
+    print(
+        f"Recorded {len(data.vertices)} VT, {len(data.indices)} indices,"
+        f" {len(data.attributes)} ATTR, {len(data.keyframes)} keyframe tables"
+        f" from {data.num_files} fixture OBJs"
+    )
+
+    previous = {}  # type: Dict[str, Any]
+    if argv.compare:
+        with open(argv.compare) as previous_file:
+            previous = json.load(previous_file)["benchmarks"]
+
+    results = {}  # type: Dict[str, Dict[str, Any]]
+    for name, benchmark in BENCHMARKS.items():
+        if argv.filter and not re.search(argv.filter, name):
+            continue
+        result = measure(benchmark.setup(data), argv.samples, argv.min_time)
+        results[name] = {
+            "unit": benchmark.unit,
+            "mean": result.mean,
+            "ci": result.ci,
+            "samples": result.samples,
+        }
+        line = (
+            f"{name:<40} {result.mean:>14,.0f} {benchmark.unit}/sec"
+            f" ±{100 * result.ci / result.mean:.1f}%"
+        )
+        if name in previous:
+            before = previous[name]
+            change = 100 * (result.mean - before["mean"]) / before["mean"]
+            # Only a difference if the confidence intervals don't overlap
+            significant = abs(result.mean - before["mean"]) > result.ci + before["ci"]
+            line += f"  {change:+.1f}% {'' if significant else '(not significant)'}"
+        print(line)
+
+    if argv.json:
+        with open(argv.json, "w") as json_file:
+            json.dump(
+                {"python": sys.version, "benchmarks": results}, json_file, indent=1
+            )
+
+    print(f"Finished in {time.perf_counter() - timer_start:.4f} seconds")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
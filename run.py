@@ -10,6 +10,8 @@ import os
 import subprocess
 import sys
 
+import blender_env
+
 def _make_argparse():
     parser = argparse.ArgumentParser(description="Runs the XPlane2Blender test suite")
     blender_options = parser.add_argument_group("Blender Options")
@@ -61,14 +63,9 @@ def main(argv=None) -> int:
     # to be able to easily re-run it manually to get better error output
     print(" ".join(blender_args))
 
-    # Environment variables - in order for --addons to work, we need to have OUR folder
-    # exist, and we need to have "addons/modules" simlink BACK to us to create the illusion
-    # of the directory structure Blender expects.
-    enviro={"BLENDER_USER_SCRIPTS": os.path.dirname(os.path.realpath(__file__))}
-
     # Run Blender, normalize output line endings because Windows is dumb
     out = subprocess.run(
-        blender_args, universal_newlines=True, env=enviro
+        blender_args, universal_newlines=True, env=blender_env.make_blender_env()
     )  # type: str
 
 
@@ -1,11 +1,28 @@
 import argparse
+import concurrent.futures
+import functools
 import glob
+import hashlib
+import json
 import os
+import queue
 import re
 import shutil
 import subprocess
 import sys
 import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import blender_env
+
+# Must be kept in sync with io_xplane2blender/tests/test_worker.py
+WORKER_RESULT_MARKER = "XPLANE2BLENDER_WORKER_RESULT: "
+
+PROJECT_FOLDER = os.path.dirname(os.path.realpath(__file__))
+CACHE_FILEPATH = os.path.join(PROJECT_FOLDER, "xplane2blender_test_cache.json")
+
+# Bump when the cache file's contents change, old ones will be ignored
+_CACHE_VERSION = 1
 
 
 def clean_tmp_folder():
@@ -22,6 +39,136 @@ def clean_tmp_folder():
             shutil.rmtree(file_object_path)
 
 
+def walk_files(folder: str, *skip_folders: str) -> List[str]:
+    """
+    Every file in folder and its subfolders, sorted,
+    skipping __pycache__ and skip_folders
+    """
+    filepaths = []
+    for root, dirs, files in os.walk(folder):
+        dirs[:] = [
+            d
+            for d in dirs
+            if d != "__pycache__" and os.path.join(root, d) not in skip_folders
+        ]
+        filepaths.extend(os.path.join(root, file) for file in files)
+    return sorted(filepaths)
+
+
+def hash_files(filepaths: Iterable[str], *extra: str) -> str:
+    """A hash of each file's path and contents (missing ones count too), and extra"""
+    hasher = hashlib.sha1("\0".join(extra).encode("utf-8"))
+    for filepath in filepaths:
+        hasher.update(os.path.relpath(filepath, PROJECT_FOLDER).encode("utf-8"))
+        try:
+            with open(filepath, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    hasher.update(chunk)
+        except OSError:
+            hasher.update(b"\0missing")
+    return hasher.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def hash_tests_folder() -> str:
+    """
+    Every file in tests but tests/tmp, hashed once. Test files read fixtures,
+    .blends, and helpers from other folders too, any of them changing counts
+    """
+    tests_folder = os.path.join(PROJECT_FOLDER, "tests")
+    return hash_files(walk_files(tests_folder, os.path.join(tests_folder, "tmp")))
+
+
+def test_file_key(pyFile: str, addon_hash: str) -> str:
+    """
+    What a test file's result depends on: itself, its .blend, and (conservatively)
+    everything else in tests and all of io_xplane2blender, hashed as addon_hash
+    """
+    return hash_files(
+        [pyFile, pyFile.replace(".py", ".blend")],
+        hash_tests_folder(),
+        addon_hash,
+    )
+
+
+def load_cache() -> Dict[str, Dict[str, Any]]:
+    """The last result of each test file, by path"""
+    try:
+        with open(CACHE_FILEPATH) as cache_file:
+            cache = json.load(cache_file)
+        if cache.get("version") == _CACHE_VERSION:
+            return cache["test_files"]
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+    return {}
+
+
+def save_cache(test_files: Dict[str, Dict[str, Any]]) -> None:
+    tmp_filepath = CACHE_FILEPATH + ".tmp"
+    with open(tmp_filepath, "w") as cache_file:
+        json.dump(
+            {"version": _CACHE_VERSION, "test_files": test_files},
+            cache_file,
+            indent=1,
+            sort_keys=True,
+        )
+    os.replace(tmp_filepath, CACHE_FILEPATH)
+
+
+class BlenderWorker:
+    """
+    A background Blender running io_xplane2blender/tests/test_worker.py,
+    which runs the test files sent to it one after another (see --persistent)
+    """
+
+    def __init__(self, blender_args: List[str], env: Dict[str, str]) -> None:
+        self.blender_args = blender_args
+        self.env = env
+        self.process = None  # type: Optional[subprocess.Popen]
+
+    def run(self, pyFile: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Runs pyFile, returns its output and results. Results are None
+        if Blender quit or crashed, it's started again for the next test file
+        """
+        if self.process is None:
+            self.process = subprocess.Popen(
+                self.blender_args,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                universal_newlines=True,
+                env=self.env,
+            )
+
+        lines = []  # type: List[str]
+        try:
+            self.process.stdin.write(pyFile + "\n")
+            self.process.stdin.flush()
+            for line in self.process.stdout:
+                if line.startswith(WORKER_RESULT_MARKER):
+                    return (
+                        "".join(lines),
+                        json.loads(line[len(WORKER_RESULT_MARKER) :]),
+                    )
+                lines.append(line)
+        except (OSError, ValueError):
+            pass
+        self.stop()
+        return "".join(lines), None
+
+    def stop(self) -> None:
+        if self.process is None:
+            return
+        try:
+            # An empty line tells it to quit
+            self.process.communicate("\n", timeout=30)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+
+
 def _make_argparse():
     parser = argparse.ArgumentParser(description="Runs the XPlane2Blender test suite")
     test_selection = parser.add_argument_group("Test Selection And Control")
@@ -45,6 +192,26 @@ def _make_argparse():
         action="store_true",
         dest="keep_going",
     )
+    test_selection.add_argument(
+        "--no-cache",
+        default=False,
+        help="Run every test file, even ones that passed before and haven't changed since",
+        action="store_true",
+    )
+    test_selection.add_argument(
+        "-j",
+        "--jobs",
+        default=1,
+        type=int,
+        help="How many test files to run at once, each in its own Blender and tests/tmp/worker_N folder",
+    )
+    test_selection.add_argument(
+        "--persistent",
+        default=False,
+        help="Run test files in long-lived Blenders (one per --jobs) instead of starting Blender for each."
+        " Much faster, but a test file that changes Blender's state beyond its .blend can affect the next",
+        action="store_true",
+    )
 
     output_control = parser.add_argument_group("Output Control")
     output_control.add_argument(
@@ -167,142 +334,316 @@ def main(argv=None) -> int:
 
         return passes
 
-    exit_code = 0
-    for root, dirs, files in os.walk("./tests"):
-        filtered_files = list(
-            filter(
-                lambda file: file.endswith(".test.py")
-                and inFilter(os.path.join(root, file)),
-                files,
+    def make_blender_args(
+        blendFile: Optional[str], script_args: List[str]
+    ) -> List[str]:
+        """
+        The command to run Blender with, opening blendFile if it exists,
+        and running the script script_args say to
+        """
+        blender_args = [
+            argv.blender,
+            "--addons",
+            "io_xplane2blender",
+            "--factory-startup",
+            "-noaudio",
+            "-b",
+        ]
+
+        if argv.no_factory_startup:
+            blender_args.remove("--factory-startup")
+
+        if blendFile and os.path.exists(blendFile):
+            blender_args.append(blendFile)
+
+        blender_args.extend(script_args)
+
+        if argv.force_blender_debug:
+            blender_args.append("--debug")
+
+        # Small Hack!
+        # Blender stops parsing after '--', so we can append the test runner
+        # args and bridge the gap without anything fancy!
+        blender_args.extend(["--"] + sys.argv[1:])
+
+        if not argv.quiet and (argv.force_blender_debug or argv.force_xplane_debug):
+            # print the command used to execute the script
+            # to be able to easily re-run it manually to get better error output
+            print(" ".join(blender_args))
+        return blender_args
+
+    def make_blender_env(tmp_folder: str) -> Dict[str, str]:
+        """tmp_folder is where the tests' get_tmp_folder() writes to"""
+        return blender_env.make_blender_env(
+            XPLANE2BLENDER_TMP_FOLDER=os.path.realpath(tmp_folder)
+        )
+
+    def filter_junk(out: str) -> str:
+        if not argv.force_blender_debug:
+            # Ignore the junk!
+            pattern = "^(%s)" % "|".join(
+                (
+                    "DAG zero",
+                    "found bundled python",
+                    "Read new prefs",
+                    "ID user decrement error",
+                    "Smart Projection time",
+                    "WARNING.*has no UV-Map.",
+                    "ERROR.*wrong user count in old ID",
+                )
+            )
+
+            out = "\n".join(
+                filter(lambda line: not re.match(pattern, line), out.splitlines())
             )
+        return out
+
+    def run_test_file(pyFile: str, tmp_folder: str) -> str:
+        """
+        Runs pyFile in a background Blender and returns its (junk filtered) output
+        """
+        blender_args = make_blender_args(
+            pyFile.replace(".py", ".blend"), ["--python", pyFile]
         )
-        if exit_code != 0:
-            break
 
-        for pyFile in filtered_files:
-            if exit_code != 0:
-                break
+        # Run Blender, normalize output line endings because Windows is dumb
+        out = subprocess.check_output(
+            blender_args,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True,
+            env=make_blender_env(tmp_folder),
+        )  # type: str
+        return filter_junk(out)
 
-            pyFile = os.path.join(root, pyFile)
-            blendFile = pyFile.replace(".py", ".blend")
+    def parse_results(out: str) -> Tuple[int, int, int, int]:
+        """
+        Returns the tests run, errors, failures, and skipped a test file's output reported,
+        an unreported result is an error
+        """
+        try:
+            results = re.search(TEST_RESULTS_REGEX, out)
+            if not results:
+                raise Exception
+        except:
+            # Oh goodie, more string matching!
+            # I'm sure this won't ever come back to bite us!
+            # If we're ever using assertRaises,
+            # hopefully we'll figure out something better! -Ted, 8/14/18
+            if results is not None or "Traceback" in out:
+                print(
+                    "Test runner must print correct results string at end or have suffered an unrecoverable error"
+                )
+            return 0, 1, 0, 0
+        else:
+            return (
+                int(results.group("testsRun")),
+                int(results.group("errors")),
+                int(results.group("failures")),
+                int(results.group("skipped")),
+            )
 
-            if not (argv.quiet or argv.print_fails):
-                printTestBeginning("Running file " + pyFile)
+    # Collected before running anything and sorted, so --start-at and the results
+    # see them in the same order no matter how many are run at once or on what machine
+    test_files = sorted(
+        os.path.join(root, file)
+        for root, dirs, files in os.walk("./tests")
+        for file in files
+        if file.endswith(".test.py") and inFilter(os.path.join(root, file))
+    )
 
-            blender_args = [
-                argv.blender,
-                "--addons",
-                "io_xplane2blender",
-                "--factory-startup",
-                "-noaudio",
-                "-b",
-            ]
+    # pyFile: "passed", "FAILED", "cached", or missing if it was never run
+    file_results = {}  # type: Dict[str, str]
+
+    # Test files that passed before, and nothing they depend on has changed since, are skipped.
+    # Anything that changes Blender or the test runner's behavior is part of the key too
+    cache = load_cache()
+    blender_path = shutil.which(argv.blender) or argv.blender
+    try:
+        blender_stat = os.stat(blender_path)
+        blender_version = f"{blender_stat.st_size}:{blender_stat.st_mtime_ns}"
+    except OSError:
+        blender_version = ""
+    addon_hash = hash_files(
+        walk_files(os.path.join(PROJECT_FOLDER, "io_xplane2blender")),
+        blender_path,
+        blender_version,
+        str(argv.no_factory_startup),
+        str(argv.force_xplane_debug),
+    )
+    test_file_keys = {
+        pyFile: test_file_key(pyFile, addon_hash) for pyFile in test_files
+    }
+    if not argv.no_cache:
+        cached_files = [
+            pyFile
+            for pyFile in test_files
+            if cache.get(pyFile, {}).get("key") == test_file_keys[pyFile]
+            and cache[pyFile]["passed"]
+        ]
+        for pyFile in cached_files:
+            file_results[pyFile] = "cached"
+            if not argv.quiet:
+                print("%s passed before and is unchanged, skipped" % pyFile)
+        if cached_files:
+            print(
+                "Skipped %d unchanged test files that passed before, --no-cache runs them"
+                % len(cached_files)
+            )
+        test_files = [pyFile for pyFile in test_files if pyFile not in file_results]
 
-            if argv.no_factory_startup:
-                blender_args.remove("--factory-startup")
+    # pyFile: Seconds it took to run
+    durations = {}  # type: Dict[str, float]
 
-            if os.path.exists(blendFile):
-                blender_args.append(blendFile)
+    def report_test_file(
+        pyFile: str,
+        out: str,
+        streamed: bool,
+        results: Optional[Tuple[int, int, int, int]] = None,
+    ) -> bool:
+        """
+        Prints and totals a finished test file's results, returns True if it failed.
+        streamed is if its beginning and output were already printed,
+        results are from a --persistent worker, otherwise they're parsed from out
+        """
+        nonlocal total_testsCompleted, total_errors, total_failures, total_skipped
+        if not (argv.quiet or argv.print_fails or streamed):
+            printTestBeginning("Running file " + pyFile)
+            if not os.path.exists(pyFile.replace(".py", ".blend")):
+                print("WARNING: Blender file " + pyFile.replace(".py", ".blend") + " does not exist")
+            print(out)
+
+        testsRun, errors, failures, skipped = results or parse_results(out)
+        total_testsCompleted += testsRun
+        total_errors += errors
+        total_failures += failures
+        total_skipped += skipped
+
+        cache[pyFile] = {
+            "key": test_file_keys[pyFile],
+            "passed": not (errors or failures),
+            "seconds": round(durations.get(pyFile, 0.0), 3),
+        }
+
+        if errors or failures:
+            file_results[pyFile] = "FAILED"
+            if argv.print_fails:
+                printTestBeginning("Running file %s - FAILED" % (pyFile))
+                print(out)
+                printTestEnd()
             else:
-                if not (argv.quiet or argv.print_fails):
+                print("%s FAILED" % pyFile)
+        else:
+            file_results[pyFile] = "passed"
+            if argv.quiet or argv.print_fails:
+                print("%s passed" % pyFile)
+
+        # THIS IS THE LAST THING TO PRINT BEFORE A TEST ENDS
+        # Its a little easier to see the boundaries between test suites,
+        # given that there is a mess of print statements from Python, unittest, the XPlane2Blender logger,
+        # Blender, and more in there sometimes
+        if not (argv.quiet or argv.print_fails):
+            printTestEnd()
+        return bool(errors or failures)
+
+    exit_code = 0
+    if argv.jobs <= 1 and not argv.persistent:
+        for pyFile in test_files:
+            blendFile = pyFile.replace(".py", ".blend")
+            if not (argv.quiet or argv.print_fails):
+                printTestBeginning("Running file " + pyFile)
+                if not os.path.exists(blendFile):
                     print("WARNING: Blender file " + blendFile + " does not exist")
                     printTestEnd()
 
-            blender_args.extend(["--python", pyFile])
-
-            if argv.force_blender_debug:
-                blender_args.append("--debug")
-
-            # Small Hack!
-            # Blender stops parsing after '--', so we can append the test runner
-            # args and bridge the gap without anything fancy!
-            blender_args.extend(["--"] + sys.argv[1:])
-
-            if not argv.quiet and (argv.force_blender_debug or argv.force_xplane_debug):
-                # print the command used to execute the script
-                # to be able to easily re-run it manually to get better error output
-                print(" ".join(blender_args))
-
-            # Environment variables - in order for --addons to work, we need to have OUR folder
-            # exist, and we need to have "addons/modules" simlink BACK to us to create the illusion
-            # of the directory structure Blender expects.
-            enviro={"BLENDER_USER_SCRIPTS": os.path.dirname(os.path.realpath(__file__))}
-
-            # Run Blender, normalize output line endings because Windows is dumb
-            out = subprocess.check_output(
-                blender_args, stderr=subprocess.STDOUT, universal_newlines=True, env=enviro
-            )  # type: str
-            if not argv.force_blender_debug:
-                # Ignore the junk!
-                pattern = "^(%s)" % "|".join(
-                    (
-                        "DAG zero",
-                        "found bundled python",
-                        "Read new prefs",
-                        "ID user decrement error",
-                        "Smart Projection time",
-                        "WARNING.*has no UV-Map.",
-                        "ERROR.*wrong user count in old ID",
-                    )
-                )
-
-                out = "\n".join(
-                    filter(lambda line: not re.match(pattern, line), out.splitlines())
-                )
+            start = time.perf_counter()
+            out = run_test_file(pyFile, "./tests/tmp")
+            durations[pyFile] = time.perf_counter() - start
             if not (argv.quiet or argv.print_fails):
                 print(out)
 
-            # TestResults from the current test
-            testsRun, errors, failures, skipped = (0,) * 4
+            if report_test_file(pyFile, out, streamed=True) and not argv.keep_going:
+                exit_code = 1
+                break
+    else:
+        # Each worker gets its own tmp folder, so tests writing the same
+        # file names can't collide. A free one is taken for each test file
+        jobs = max(1, argv.jobs)
+        free_tmp_folders = queue.Queue()  # type: queue.Queue
+        for worker in range(jobs):
+            tmp_folder = os.path.join("./tests/tmp", f"worker_{worker}")
+            os.makedirs(tmp_folder, exist_ok=True)
+            free_tmp_folders.put(tmp_folder)
+        # tmp_folder: The BlenderWorker using it, for --persistent
+        blender_workers = {}  # type: Dict[str, BlenderWorker]
+
+        def run_in_worker(
+            pyFile: str,
+        ) -> Tuple[str, Optional[Tuple[int, int, int, int]]]:
+            tmp_folder = free_tmp_folders.get()
+            start = time.perf_counter()
             try:
-                results = re.search(TEST_RESULTS_REGEX, out)
-                if not results:
-                    raise Exception
-            except:
-                # Oh goodie, more string matching!
-                # I'm sure this won't ever come back to bite us!
-                # If we're ever using assertRaises,
-                # hopefully we'll figure out something better! -Ted, 8/14/18
-                if results is not None or "Traceback" in out:
-                    print(
-                        "Test runner must print correct results string at end or have suffered an unrecoverable error"
+                if not argv.persistent:
+                    return run_test_file(pyFile, tmp_folder), None
+
+                if tmp_folder not in blender_workers:
+                    blender_workers[tmp_folder] = BlenderWorker(
+                        make_blender_args(
+                            None,
+                            [
+                                "--python-expr",
+                                "from io_xplane2blender.tests import test_worker;"
+                                " test_worker.main()",
+                            ],
+                        ),
+                        make_blender_env(tmp_folder),
                     )
-                total_errors += 1
-                errors = 1
-            else:
-                testsRun, errors, failures, skipped = (
-                    int(results.group("testsRun")),
-                    int(results.group("errors")),
-                    int(results.group("failures")),
-                    int(results.group("skipped")),
+                out, results = blender_workers[tmp_folder].run(pyFile)
+                if results is None:
+                    return filter_junk(out), None
+                return (
+                    filter_junk(out),
+                    (
+                        results["testsRun"],
+                        results["errors"],
+                        results["failures"],
+                        results["skipped"],
+                    ),
                 )
-
-                total_testsCompleted += testsRun
-                total_errors += errors
-                total_failures += failures
-                total_skipped += skipped
             finally:
-                if errors or failures:
-                    if argv.print_fails:
-                        printTestBeginning("Running file %s - FAILED" % (pyFile))
-                        print(out)
-                        printTestEnd()
-                    else:
-                        print("%s FAILED" % pyFile)
-
-                    if not argv.keep_going:
+                durations[pyFile] = time.perf_counter() - start
+                free_tmp_folders.put(tmp_folder)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as pool:
+            # The slowest last time start first, so one doesn't start last and hold everything up.
+            # Never run ones are assumed to be slow
+            futures = {
+                pool.submit(run_in_worker, pyFile): pyFile
+                for pyFile in sorted(
+                    test_files,
+                    key=lambda pyFile: -cache.get(pyFile, {}).get("seconds", 1e9),
+                )
+            }
+            # Printed as they finish, in whatever order that is
+            for future in concurrent.futures.as_completed(futures):
+                if future.cancelled():
+                    continue
+                out, results = future.result()
+                if report_test_file(futures[future], out, False, results):
+                    if not argv.keep_going and not exit_code:
                         exit_code = 1
-                    else:
-                        exit_code = 0
-                elif argv.quiet or argv.print_fails:
-                    print("%s passed" % pyFile)
-
-                # THIS IS THE LAST THING TO PRINT BEFORE A TEST ENDS
-                # Its a little easier to see the boundaries between test suites,
-                # given that there is a mess of print statements from Python, unittest, the XPlane2Blender logger,
-                # Blender, and more in there sometimes
-                if not (argv.quiet or argv.print_fails):
-                    printTestEnd()
+                        # Ones already running finish, the rest never start
+                        for not_started in futures:
+                            not_started.cancel()
+
+        for blender_worker in blender_workers.values():
+            blender_worker.stop()
+
+        # The same order as running them one at a time, so runs can be compared
+        print("Results in file order:")
+        for pyFile in test_file_keys:
+            print("    %s %s" % (pyFile, file_results.get(pyFile, "not run")))
+
+    save_cache(cache)
 
     # Final Result String Benifits
     # - --continue concisely tells how many tests failed
@@ -8,7 +8,7 @@ __dirname__ = os.path.dirname(__file__)
 
 class TestCase1(XPlaneAnimationTestCase):
     def test_TestCase1(self):
-        self.exportAnimationTestCase('TestCase1', os.path.join(__dirname__, '../tmp'))
+        self.exportAnimationTestCase('TestCase1', get_tmp_folder())
         self.runAnimationTestCase('TestCase1', __dirname__)
 
 
@@ -8,7 +8,7 @@ __dirname__ = os.path.dirname(__file__)
 
 class TestCase3(XPlaneAnimationTestCase):
     def test_TestCase3(self):
-        self.exportAnimationTestCase('TestCase3', os.path.join(__dirname__, '../tmp'))
+        self.exportAnimationTestCase('TestCase3', get_tmp_folder())
         self.runAnimationTestCase('TestCase3', __dirname__)
 
 
@@ -8,7 +8,7 @@ __dirname__ = os.path.dirname(__file__)
 
 class TestCase4(XPlaneAnimationTestCase):
     def test_TestCase4(self):
-        self.exportAnimationTestCase('TestCase4', os.path.join(__dirname__, '../tmp'))
+        self.exportAnimationTestCase('TestCase4', get_tmp_folder())
         self.runAnimationTestCase('TestCase4', __dirname__)
 
 
@@ -8,7 +8,7 @@ __dirname__ = os.path.dirname(__file__)
 
 class TestCase5_nested_sets(XPlaneAnimationTestCase):
     def test_TestCase5_nested_sets(self):
-        self.exportAnimationTestCase('TestCase5_nested_sets', os.path.join(__dirname__, '../tmp'))
+        self.exportAnimationTestCase('TestCase5_nested_sets', get_tmp_folder())
         self.runAnimationTestCase('TestCase5_nested_sets', __dirname__)
 
 runTestCases([TestCase5_nested_sets])
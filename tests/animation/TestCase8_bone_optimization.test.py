@@ -8,7 +8,7 @@ __dirname__ = os.path.dirname(__file__)
 
 class TestCase8_bone_optimization(XPlaneAnimationTestCase):
     def test_TestCase8_bone_optimization(self):
-        self.exportAnimationTestCase('TestCase8_bone_optimization', os.path.join(__dirname__, '../tmp'))
+        self.exportAnimationTestCase('TestCase8_bone_optimization', get_tmp_folder())
         self.runAnimationTestCase('TestCase8_bone_optimization', __dirname__)
 
 runTestCases([TestCase8_bone_optimization])
@@ -0,0 +1,242 @@
+# Builds synthetic scenes and times exporting them, phase by phase.
+# Run by benchmarks.py inside a background Blender, see it for how to use this.
+#
+# Every benchmark starts from an empty scene, is built once with test_creation_helpers,
+# and is exported --repeat times. Each repetition collects and writes every root
+# (nothing is saved to disk), timed with the export profiler.
+
+import argparse
+import collections
+import json
+import math
+import platform
+import re
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, NamedTuple
+
+import bpy
+
+from io_xplane2blender import xplane_constants
+from io_xplane2blender.tests import test_creation_helpers
+from io_xplane2blender.tests.test_creation_helpers import (
+    DatablockInfo,
+    KeyframeInfo,
+    ParentInfo,
+)
+from io_xplane2blender.xplane_helpers import logger
+from io_xplane2blender.xplane_types import xplane_file
+from io_xplane2blender.xplane_utils.xplane_profiler import profiler
+from mathutils import Vector
+
+
+def _make_triangle_mesh(name: str, num_triangles: int) -> bpy.types.Mesh:
+    """A flat, UV mapped grid of (at least) num_triangles triangles"""
+    width = max(1, math.ceil(math.sqrt(num_triangles / 2)))
+    height = max(1, math.ceil(num_triangles / 2 / width))
+    vertices = [(x, y, 0) for y in range(height + 1) for x in range(width + 1)]
+    faces = []
+    for y in range(height):
+        for x in range(width):
+            i = y * (width + 1) + x
+            faces.append((i, i + 1, i + width + 2))
+            faces.append((i, i + width + 2, i + width + 1))
+    mesh = bpy.data.meshes.new(name)
+    mesh.from_pydata(vertices, [], faces[:num_triangles])
+    mesh.uv_layers.new()
+    mesh.materials.append(test_creation_helpers.get_material_default())
+    mesh.update()
+    return mesh
+
+
+def _add_mesh_objects(
+    collection: bpy.types.Collection, name: str, mesh: bpy.types.Mesh, count: int
+) -> List[bpy.types.Object]:
+    """count objects all using mesh, spread out in a row"""
+    objects = []
+    for i in range(count):
+        ob = bpy.data.objects.new(f"{name}_{i}", mesh)
+        ob.location = (i * 2, 0, 0)
+        test_creation_helpers.set_collection(ob, collection)
+        objects.append(ob)
+    return objects
+
+
+def _make_root(name: str) -> bpy.types.Collection:
+    collection = test_creation_helpers.create_datablock_collection(name)
+    test_creation_helpers.make_root_exportable(collection)
+    return collection
+
+
+def build_meshes(num_meshes: int, num_triangles: int) -> None:
+    """num_meshes objects of num_triangles triangles each"""
+    root = _make_root("meshes")
+    _add_mesh_objects(
+        root, "mesh", _make_triangle_mesh("triangles", num_triangles), num_meshes
+    )
+
+
+def build_armature(num_bones: int, num_keyframes: int) -> None:
+    """A chain of num_bones bones, each animated and with a cube parented to it"""
+    root = _make_root("armature")
+    armature = test_creation_helpers.create_datablock_armature(
+        DatablockInfo("ARMATURE", name="armature", collection=root),
+        extra_bones=num_bones,
+        bone_direction=Vector((0, 0, 1)),
+    )
+    # armature_add links it to the active collection
+    for collection in armature.users_collection:
+        collection.objects.unlink(armature)
+    test_creation_helpers.set_collection(armature, root)
+    mesh = _make_triangle_mesh("bone_cube", 12)
+    for i, bone in enumerate(armature.pose.bones):
+        test_creation_helpers.set_animation_data(
+            bone,
+            [
+                KeyframeInfo(
+                    idx=frame + 1,
+                    dataref_path=f"sim/benchmark/bone_{i}",
+                    dataref_value=frame / max(1, num_keyframes - 1),
+                    rotation=(0, 0, 90 * frame / max(1, num_keyframes - 1)),
+                )
+                for frame in range(num_keyframes)
+            ],
+            parent_armature=armature,
+        )
+        ob = _add_mesh_objects(root, f"on_{bone.name}", mesh, 1)[0]
+        test_creation_helpers.set_parent(
+            ob, ParentInfo(armature, "BONE", bone.name)
+        )
+
+
+def build_lights(num_lights: int) -> None:
+    """num_lights automatic named lights, and a mesh so the OBJ isn't only lights"""
+    root = _make_root("lights")
+    _add_mesh_objects(root, "mesh", _make_triangle_mesh("triangles", 2), 1)
+    for i in range(num_lights):
+        ob = test_creation_helpers.create_datablock_light(
+            DatablockInfo(
+                "LIGHT", name=f"light_{i}", collection=root, location=(i, 0, 0)
+            ),
+            "SPOT",
+        )
+        ob.data.xplane.type = xplane_constants.LIGHT_AUTOMATIC
+        ob.data.xplane.name = "taillight"
+
+
+def build_lods(num_meshes: int, num_triangles: int) -> None:
+    """
+    A root with 4 LOD buckets, num_meshes objects of num_triangles triangles
+    each spread over them
+    """
+    root = _make_root("lods")
+    layer = root.xplane.layer
+    layer.export_type = xplane_constants.EXPORT_TYPE_SCENERY
+    layer.lods = "4"
+    for i, lod in enumerate(layer.lod):
+        lod.near = i * 1000
+        lod.far = (i + 1) * 1000
+    mesh = _make_triangle_mesh("triangles", num_triangles)
+    for i, ob in enumerate(_add_mesh_objects(root, "mesh", mesh, num_meshes)):
+        ob.xplane.lod[i % 4] = True
+
+
+class Benchmark(NamedTuple):
+    build: Callable[..., None]
+    params: Dict[str, Any]
+
+
+BENCHMARKS = {
+    "meshes_100x200": Benchmark(build_meshes, {"num_meshes": 100, "num_triangles": 200}),
+    "meshes_10x20000": Benchmark(
+        build_meshes, {"num_meshes": 10, "num_triangles": 20000}
+    ),
+    "meshes_2000x12": Benchmark(build_meshes, {"num_meshes": 2000, "num_triangles": 12}),
+    "armature_50_bones": Benchmark(build_armature, {"num_bones": 50, "num_keyframes": 4}),
+    "lights_2000": Benchmark(build_lights, {"num_lights": 2000}),
+    "lods_4x100": Benchmark(build_lods, {"num_meshes": 100, "num_triangles": 200}),
+}  # type: Dict[str, Benchmark]
+
+
+def run_benchmark(benchmark: Benchmark, repeat: int) -> Dict[str, Any]:
+    """
+    Builds the benchmark's scene and exports it repeat times.
+    Returns each phase's total milliseconds in each repetition
+    """
+    test_creation_helpers.create_initial_test_setup()
+    build_start = time.perf_counter()
+    benchmark.build(**benchmark.params)
+    build_seconds = time.perf_counter() - build_start
+
+    # Printing thousands of messages would be the slowest thing of all
+    logger.clear()
+    phases = collections.defaultdict(list)  # type: Dict[str, List[float]]
+    errors = []  # type: List[str]
+    for repetition in range(repeat):
+        logger.clearMessages()
+        profiler.start()
+        export_start = time.perf_counter()
+        xplane_files = xplane_file.createFilesFromBlenderRootObjects(
+            bpy.context.scene, bpy.context.view_layer
+        )
+        for xp_file in xplane_files:
+            with profiler.phase("XPlaneFile.write"):
+                xp_file.write()
+        export_ms = (time.perf_counter() - export_start) * 1000
+        profiler.stop()
+
+        errors.extend(str(message["message"]) for message in logger.findErrors())
+        totals = collections.Counter()  # type: Dict[str, float]
+        for event in profiler.events:
+            totals[event["name"]] += event["dur"] / 1000
+        totals["export"] = export_ms
+        # Every phase must have a time in every repetition, even if it didn't happen
+        for name in set(phases) | set(totals):
+            phases[name].extend([0.0] * (repetition - len(phases[name])))
+            phases[name].append(round(totals.get(name, 0.0), 3))
+
+    return {
+        "params": benchmark.params,
+        "build_seconds": round(build_seconds, 3),
+        "phases": dict(phases),
+        "errors": errors[:10],
+    }
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filter", type=str)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--results", type=str, required=True)
+    argv = parser.parse_args(argv)
+
+    results = {}
+    for name, benchmark in BENCHMARKS.items():
+        if argv.filter and not re.search(argv.filter, name):
+            continue
+        print(f"Running {name} {benchmark.params}")
+        results[name] = run_benchmark(benchmark, argv.repeat)
+        print(
+            f"{name}: median export"
+            f" {statistics.median(results[name]['phases']['export']):.2f} ms"
+        )
+
+    with open(argv.results, "w") as results_file:
+        json.dump(
+            {
+                "machine": {
+                    "platform": platform.platform(),
+                    "processor": platform.processor(),
+                    "python": platform.python_version(),
+                    "blender": bpy.app.version_string,
+                },
+                "repeat": argv.repeat,
+                "benchmarks": results,
+            },
+            results_file,
+            indent=1,
+        )
+
+
+main(sys.argv[sys.argv.index("--") + 1 :] if "--" in sys.argv else [])
@@ -11,7 +11,7 @@ def filterLines(line):
 
 class TestExportPathCustomScene_2(XPlaneTestCase):
     def test_find_default_scenery(self):
-        tmp_path = os.path.abspath(os.path.join(__dirname__,'../../../../../tmp'))
+        tmp_path = get_tmp_folder()
         filename = 'honda_2'
         bpy.ops.scene.export_to_relative_dir(initial_dir=tmp_path)
         self.assertFileTmpEqualsFixture(
@@ -0,0 +1,137 @@
+import os
+import sys
+from pathlib import Path
+
+import bpy
+
+from io_xplane2blender.tests import *
+from io_xplane2blender.tests.test_creation_helpers import *
+from io_xplane2blender.xplane_utils.xplane_export_manifest import (
+    EXPORT_MANIFEST_FILENAME,
+    fingerprint_root,
+)
+
+__dirname__ = Path(__file__).parent
+
+
+class TestIncrementalExport(XPlaneTestCase):
+    def setUp(self):
+        super().setUp()
+        create_initial_test_setup()
+        for name in ["Layer 1", "Layer 2"]:
+            coll = create_datablock_collection(name)
+            coll.xplane.is_exportable_collection = True
+            coll.xplane.layer.name = f"incremental_{name[-1]}"
+            create_datablock_mesh(
+                DatablockInfo("MESH", name=f"cube_{name[-1]}", collection=name)
+            )
+
+        self.folder = Path(get_tmp_folder(), "incremental_export")
+        self.folder.mkdir(parents=True, exist_ok=True)
+        for old_file in self.folder.iterdir():
+            old_file.unlink()
+        bpy.ops.wm.save_as_mainfile(filepath=str(self.folder / "incremental.blend"))
+
+    def export(self):
+        bpy.ops.export.xplane_obj(
+            filepath=str(self.folder), export_is_relative=True, incremental=True
+        )
+
+    def mtimes(self):
+        return {
+            name: os.stat(self.folder / f"{name}.obj").st_mtime_ns
+            for name in ["incremental_1", "incremental_2"]
+        }
+
+    def test_unchanged_roots_skipped(self):
+        self.export()
+        self.assertTrue((self.folder / EXPORT_MANIFEST_FILENAME).exists())
+        first = self.mtimes()
+
+        self.export()
+        self.assertEqual(self.mtimes(), first)
+
+        bpy.data.objects["cube_2"].data.vertices[0].co.x += 1
+        self.export()
+        second = self.mtimes()
+        self.assertEqual(second["incremental_1"], first["incremental_1"])
+        self.assertNotEqual(second["incremental_2"], first["incremental_2"])
+
+    def fingerprint(self):
+        coll = bpy.data.collections["Layer 1"]
+        return fingerprint_root(coll, coll.all_objects, bpy.context.view_layer)
+
+    def assertFingerprintChanges(self, change):
+        before = self.fingerprint()
+        self.assertEqual(self.fingerprint(), before)
+        change()
+        self.assertNotEqual(self.fingerprint(), before)
+
+    def create_target(self):
+        target = bpy.data.objects.new("target", None)
+        bpy.context.scene.collection.objects.link(target)
+        return target
+
+    def test_shape_keys_fingerprinted(self):
+        cube = bpy.data.objects["cube_1"]
+        cube.shape_key_add(name="Basis")
+        key_block = cube.shape_key_add(name="Key 1")
+        self.assertFingerprintChanges(lambda: setattr(key_block, "value", 0.5))
+        self.assertFingerprintChanges(
+            lambda: setattr(key_block.data[0].co, "x", key_block.data[0].co.x + 1)
+        )
+
+    def test_vertex_weights_fingerprinted(self):
+        group = bpy.data.objects["cube_1"].vertex_groups.new(name="group")
+        group.add([0], 1.0, "REPLACE")
+        self.assertFingerprintChanges(lambda: group.add([0], 0.5, "REPLACE"))
+
+    def test_modifier_target_followed(self):
+        target = self.create_target()
+        modifier = bpy.data.objects["cube_1"].modifiers.new("Array", "ARRAY")
+        modifier.use_object_offset = True
+        modifier.offset_object = target
+        self.assertFingerprintChanges(lambda: setattr(target.location, "x", 1))
+
+    def test_constraint_target_followed(self):
+        target = self.create_target()
+        constraint = bpy.data.objects["cube_1"].constraints.new("COPY_LOCATION")
+        constraint.target = target
+        self.assertFingerprintChanges(lambda: setattr(target.location, "x", 1))
+
+    def test_drivers_fingerprinted(self):
+        target = self.create_target()
+        driver = bpy.data.objects["cube_1"].driver_add("location", 0).driver
+        driver.type = "SCRIPTED"
+        driver.expression = "var"
+        variable = driver.variables.new()
+        variable.name = "var"
+        variable.targets[0].id = target
+        variable.targets[0].data_path = "location.x"
+        self.assertFingerprintChanges(lambda: setattr(driver, "expression", "var * 2"))
+        self.assertFingerprintChanges(lambda: setattr(target.location, "x", 1))
+
+    def test_normal_decal_contents_fingerprinted(self):
+        decal = self.folder / "decal.png"
+        decal.write_bytes(b"1")
+        bpy.data.collections["Layer 1"].xplane.layer.file_normal_decal1 = "//decal.png"
+        self.assertFingerprintChanges(lambda: decal.write_bytes(b"22"))
+
+    def test_geometry_nodes_always_exported(self):
+        bpy.data.objects["cube_1"].modifiers.new("GeometryNodes", "NODES")
+        self.assertIsNone(self.fingerprint())
+        self.export()
+        first = self.mtimes()
+        self.export()
+        second = self.mtimes()
+        self.assertEqual(second["incremental_2"], first["incremental_2"])
+        self.assertNotEqual(second["incremental_1"], first["incremental_1"])
+
+    def test_deleted_obj_exported_again(self):
+        self.export()
+        (self.folder / "incremental_1.obj").unlink()
+        self.export()
+        self.assertTrue((self.folder / "incremental_1.obj").exists())
+
+
+runTestCases([TestIncrementalExport])
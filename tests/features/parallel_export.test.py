@@ -0,0 +1,56 @@
+import os
+import sys
+from pathlib import Path
+
+import bpy
+
+from io_xplane2blender.tests import *
+from io_xplane2blender.tests.test_creation_helpers import *
+
+__dirname__ = Path(__file__).parent
+
+
+class TestParallelExport(XPlaneTestCase):
+    def setUp(self):
+        super().setUp()
+        create_initial_test_setup()
+        for i in range(1, 4):
+            coll = create_datablock_collection(f"Layer {i}")
+            coll.xplane.is_exportable_collection = True
+            coll.xplane.layer.name = f"parallel_{i}"
+            create_datablock_mesh(
+                DatablockInfo("MESH", name=f"cube_{i}", collection=coll.name)
+            )
+
+        self.folder = Path(get_tmp_folder(), "parallel_export")
+        self.folder.mkdir(parents=True, exist_ok=True)
+        bpy.ops.wm.save_as_mainfile(filepath=str(self.folder / "parallel.blend"))
+
+    def test_matches_serial_export(self):
+        bpy.ops.export.xplane_obj(
+            filepath=str(self.folder / "serial"), export_is_relative=True
+        )
+        bpy.ops.export.xplane_obj(
+            filepath=str(self.folder / "parallel"), export_is_relative=True, jobs=2
+        )
+        self.assertFalse(logger.hasErrors())
+        for i in range(1, 4):
+            with self.subTest(root=i):
+                self.assertEqual(
+                    (self.folder / "parallel" / f"parallel_{i}.obj").read_text(),
+                    (self.folder / "serial" / f"parallel_{i}.obj").read_text(),
+                )
+
+    def test_only_roots(self):
+        bpy.ops.export.xplane_obj(
+            filepath=str(self.folder / "only_roots"),
+            export_is_relative=True,
+            only_roots='["Collection:Layer 2"]',
+        )
+        self.assertEqual(
+            sorted(p.name for p in (self.folder / "only_roots").iterdir()),
+            ["parallel_2.obj"],
+        )
+
+
+runTestCases([TestParallelExport])
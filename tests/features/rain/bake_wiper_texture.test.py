@@ -34,7 +34,7 @@ class TestBakeWiperTexture(XPlaneTestCase):
             ignore_errors=True,
         )
 
-    def _test_bake_op(self, slot: str) -> None:
+    def _test_bake_op(self, slot: str, workers: int = 1) -> None:
         """Runs and asserts the core of running the operator, slot must be 'four' or 'two'"""
         assert slot in {"four", "two"}
         textures_folder = __dirname__ / Path(f"{slot}_slot_textures")
@@ -82,7 +82,9 @@ class TestBakeWiperTexture(XPlaneTestCase):
             start = 6
 
         bpy.ops.xplane.bake_wiper_gradient_texture(
-            start=start, debug_master_filepath=str(output_wiper_gradient_path)
+            start=start,
+            debug_master_filepath=str(output_wiper_gradient_path),
+            workers=workers,
         )
 
         self.assertEqual(
@@ -110,5 +112,8 @@ class TestBakeWiperTexture(XPlaneTestCase):
             with self.subTest(slot=slot):
                 self._test_bake_op(slot)
 
+    def test_bake_in_workers(self) -> None:
+        self._test_bake_op("two", workers=2)
+
 
 runTestCases([TestBakeWiperTexture])
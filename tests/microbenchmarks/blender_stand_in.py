@@ -0,0 +1,189 @@
+# Just enough of bpy and mathutils to import the exporter outside of Blender,
+# so its pure Python hot paths can be benchmarked in seconds. See microbenchmarks.py.
+#
+# Nothing here behaves like Blender! bpy is a stand-in where every attribute, call,
+# and item is another stand-in that is False, empty, and does nothing. Anything
+# that really needs Blender data will not work. mathutils is the real one if it
+# is installed (pip install mathutils), otherwise the little of it the writers use.
+
+import math
+import os
+import sys
+import types
+from typing import Dict
+
+ADDON_FOLDER = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), "..", "..", "io_xplane2blender"
+)
+
+
+class StandIn:
+    """Every attribute, call, and item is another StandIn"""
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+
+    def __repr__(self) -> str:
+        return f"<StandIn {self._name}>"
+
+    def __getattr__(self, name: str) -> "StandIn":
+        if name.startswith("__"):
+            raise AttributeError(name)
+        value = StandIn(f"{self._name}.{name}")
+        setattr(self, name, value)
+        return value
+
+    def __call__(self, *args, **kwargs) -> "StandIn":
+        return StandIn(f"{self._name}()")
+
+    def __getitem__(self, key) -> "StandIn":
+        return StandIn(f"{self._name}[{key!r}]")
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self) -> int:
+        return 0
+
+    def __bool__(self) -> bool:
+        return False
+
+
+class _StandInType(type):
+    def __getattr__(cls, name: str) -> StandIn:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return StandIn(f"{cls.__name__}.{name}")
+
+
+class _TypesModule(types.ModuleType):
+    """bpy.types, every type is a real (empty) class, so it can be subclassed and isinstance'd"""
+
+    def __getattr__(self, name: str) -> type:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        cls = _StandInType(name, (), {})
+        setattr(self, name, cls)
+        return cls
+
+
+class _StandInModule(types.ModuleType):
+    def __getattr__(self, name: str) -> StandIn:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        value = StandIn(f"{self.__name__}.{name}")
+        setattr(self, name, value)
+        return value
+
+
+def _make_bpy() -> Dict[str, types.ModuleType]:
+    bpy = _StandInModule("bpy")
+    bpy.types = _TypesModule("bpy.types")
+    bpy.props = _StandInModule("bpy.props")
+    bpy.utils = _StandInModule("bpy.utils")
+    bpy.path = _StandInModule("bpy.path")
+    bpy.app = _StandInModule("bpy.app")
+    bpy.app.version = (2, 80, 75)
+    bpy.app.version_string = "2.80 (stand in)"
+    bpy.app.handlers = _StandInModule("bpy.app.handlers")
+    bpy.app.handlers.persistent = lambda function: function
+    return {
+        module.__name__: module
+        for module in (bpy, bpy.types, bpy.props, bpy.utils, bpy.path, bpy.app, bpy.app.handlers)
+    }
+
+
+class Vector(list):
+    def __init__(self, components=(0.0, 0.0, 0.0)) -> None:
+        super().__init__(float(c) for c in components)
+
+    x = property(lambda self: self[0], lambda self, v: self.__setitem__(0, v))
+    y = property(lambda self: self[1], lambda self, v: self.__setitem__(1, v))
+    z = property(lambda self: self[2], lambda self, v: self.__setitem__(2, v))
+
+    def __add__(self, other) -> "Vector":
+        return Vector(a + b for a, b in zip(self, other))
+
+    def __sub__(self, other) -> "Vector":
+        return Vector(a - b for a, b in zip(self, other))
+
+    def __mul__(self, scalar: float) -> "Vector":
+        return Vector(a * scalar for a in self)
+
+    __rmul__ = __mul__
+
+    def __neg__(self) -> "Vector":
+        return self * -1
+
+    @property
+    def length(self) -> float:
+        return math.sqrt(sum(a * a for a in self))
+
+    def copy(self) -> "Vector":
+        return Vector(self)
+
+    def to_tuple(self, precision: int = -1) -> tuple:
+        return tuple(self) if precision == -1 else tuple(round(a, precision) for a in self)
+
+
+class Euler(Vector):
+    def __init__(self, angles=(0.0, 0.0, 0.0), order: str = "XYZ") -> None:
+        super().__init__(angles)
+        self.order = order
+
+
+class Quaternion(Vector):
+    def __init__(self, components=(1.0, 0.0, 0.0, 0.0)) -> None:
+        super().__init__(components)
+
+
+class Matrix(list):
+    def __init__(self, rows=()) -> None:
+        super().__init__(Vector(row) for row in rows)
+
+    @classmethod
+    def Identity(cls, size: int) -> "Matrix":
+        return cls([[float(i == j) for j in range(size)] for i in range(size)])
+
+    def decompose(self):
+        """Only right for matrices without rotation"""
+        return (
+            Vector(row[3] for row in self[:3]),
+            Quaternion(),
+            Vector(self[i][i] for i in range(3)),
+        )
+
+
+def _make_mathutils() -> types.ModuleType:
+    mathutils = types.ModuleType("mathutils")
+    mathutils.Vector = Vector
+    mathutils.Euler = Euler
+    mathutils.Quaternion = Quaternion
+    mathutils.Matrix = Matrix
+    return mathutils
+
+
+def install() -> None:
+    """
+    Puts the stand-ins in sys.modules and makes io_xplane2blender importable
+    without running its __init__, which registers everything with Blender
+    """
+    if "io_xplane2blender" in sys.modules:
+        return
+    sys.modules.update(_make_bpy())
+    try:
+        import mathutils
+    except ImportError:
+        sys.modules["mathutils"] = _make_mathutils()
+
+    addon = types.ModuleType("io_xplane2blender")
+    addon.__path__ = [os.path.normpath(ADDON_FOLDER)]
+    with open(os.path.join(ADDON_FOLDER, "__init__.py")) as init_file:
+        # bl_info is the only thing needed from it, and can be read without bpy
+        source = init_file.read()
+    start = source.index("bl_info = {")
+    exec(source[start : source.index("}", start) + 1], addon.__dict__)
+    sys.modules["io_xplane2blender"] = addon
+    # xplane_types.xplane_file and tests import each other,
+    # this is the order that works
+    import io_xplane2blender.tests
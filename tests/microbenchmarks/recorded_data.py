@@ -0,0 +1,103 @@
+# Real-world data for the microbenchmarks, recorded from the OBJs in the test
+# fixtures: their VT tables, IDX tables, ATTR_ streams, and animation keyframe tables.
+# These are what the exporter wrote, so turned back into what it writes from,
+# they're what the hot paths see in real exports.
+
+import glob
+import os
+from typing import Dict, List, NamedTuple, Tuple, Union
+
+TESTS_FOLDER = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..")
+
+AttributeValue = Union[bool, int, float, str, List[Union[int, float, str]]]
+
+
+class RecordedAttribute(NamedTuple):
+    name: str
+    value: AttributeValue
+
+
+class RecordedKeyframes(NamedTuple):
+    """One ANIM_trans or single axis ANIM_rotate block, in Blender's axes"""
+
+    dataref: str
+    # For rotation, the unit axis ("X", "Y", "Z") rotated around, otherwise None
+    axis: Union[str, None]
+    # (dataref value, location (x, y, z) or degrees)
+    keys: List[Tuple[float, Union[Tuple[float, float, float], float]]]
+
+
+class RecordedData(NamedTuple):
+    num_files: int
+    vertices: List[Tuple[float, ...]]
+    indices: List[int]
+    attributes: List[RecordedAttribute]
+    keyframes: List[RecordedKeyframes]
+
+
+def _number(token: str) -> Union[int, float, str]:
+    try:
+        return int(token)
+    except ValueError:
+        try:
+            return float(token)
+        except ValueError:
+            return token
+
+
+# X-Plane's unit axes back to Blender's, see vec_x_to_b
+_X_TO_B_AXES = {
+    (1.0, 0.0, 0.0): "X",
+    (0.0, 0.0, -1.0): "Y",
+    (0.0, 1.0, 0.0): "Z",
+}
+
+
+def record(pattern: str = "**/fixtures/**/*.obj") -> RecordedData:
+    """Reads every fixture OBJ matching pattern (relative to tests)"""
+    obj_filepaths = sorted(
+        glob.glob(os.path.join(TESTS_FOLDER, pattern), recursive=True)
+    )
+    vertices = []  # type: List[Tuple[float, ...]]
+    indices = []  # type: List[int]
+    attributes = []  # type: List[RecordedAttribute]
+    keyframes = []  # type: List[RecordedKeyframes]
+    for obj_filepath in obj_filepaths:
+        with open(obj_filepath) as obj_file:
+            lines = [line.split("#")[0].split() for line in obj_file]
+
+        block = None  # type: Union[RecordedKeyframes, None]
+        for tokens in filter(None, lines):
+            directive, args = tokens[0], tokens[1:]
+            if directive == "VT" and len(args) == 8:
+                vertices.append(tuple(map(float, args)))
+            elif directive in {"IDX", "IDX10"}:
+                indices.extend(map(int, args))
+            elif directive.startswith("ATTR_"):
+                values = [_number(arg) for arg in args]
+                attributes.append(
+                    RecordedAttribute(
+                        directive,
+                        True
+                        if not values
+                        else values[0]
+                        if len(values) == 1
+                        else values,
+                    )
+                )
+            elif directive == "ANIM_trans_begin" and args:
+                block = RecordedKeyframes(args[0], None, [])
+            elif directive == "ANIM_rotate_begin" and len(args) == 4:
+                axis = _X_TO_B_AXES.get(tuple(float(a) for a in args[:3]))
+                block = RecordedKeyframes(args[3], axis, []) if axis else None
+            elif directive == "ANIM_trans_key" and block and len(args) == 4:
+                value, x, y, z = map(float, args)
+                block.keys.append((value, (x, -z, y)))
+            elif directive == "ANIM_rotate_key" and block and len(args) == 2:
+                block.keys.append((float(args[0]), float(args[1])))
+            elif directive in {"ANIM_trans_end", "ANIM_rotate_end"}:
+                if block and len(block.keys) >= 2:
+                    keyframes.append(block)
+                block = None
+
+    return RecordedData(len(obj_filepaths), vertices, indices, attributes, keyframes)
@@ -0,0 +1,159 @@
+import os
+import re
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+import bpy
+
+from io_xplane2blender import xplane_constants, xplane_helpers, xplane_updater
+from io_xplane2blender.tests import *
+from io_xplane2blender.tests import test_creation_helpers
+
+__dirname__ = Path(__file__).parent
+
+V_OLD = xplane_helpers.VerStruct.parse_version("3.5.0-beta.1+31.20180720000000")
+V_FUTURE = xplane_helpers.VerStruct.parse_version("9999.0.0-rc.1+9999.99991231000000")
+
+
+class TestLoadHandlerMigrations(XPlaneTestCase):
+    def setUp(self):
+        super().setUp()
+        test_creation_helpers.create_initial_test_setup()
+        self.blend_filepath = Path(get_tmp_folder(), "load_handler_migrations.blend")
+        self.blend_filepath.parent.mkdir(parents=True, exist_ok=True)
+
+        # Layers missing their LODs and cockpit regions, like files from versions
+        # before they were padded
+        coll = test_creation_helpers.create_datablock_collection("Layer 1")
+        obj = test_creation_helpers.create_datablock_empty(
+            test_creation_helpers.DatablockInfo("EMPTY", name="Empty", collection=coll)
+        )
+        for has_layer in (coll, obj):
+            has_layer.xplane.layer.lod.clear()
+            has_layer.xplane.layer.cockpit_region.clear()
+
+    def save_as(self, version: xplane_helpers.VerStruct) -> None:
+        """Saves the file as if version saved it last, like save_handler would"""
+        for scene in bpy.data.scenes:
+            scene["xplane2blender_version"] = xplane_constants.DEPRECATED_XP2B_VER
+            scene.xplane.xplane2blender_ver_history.clear()
+            xplane_helpers.VerStruct.add_to_version_history(scene, version)
+        bpy.app.handlers.save_pre.remove(xplane_updater.save_handler)
+        try:
+            bpy.ops.wm.save_as_mainfile(filepath=str(self.blend_filepath))
+        finally:
+            bpy.app.handlers.save_pre.append(xplane_updater.save_handler)
+
+    def open(self) -> List[str]:
+        """Opens the saved file, returns the Updater Log's lines"""
+        bpy.ops.wm.open_mainfile(filepath=str(self.blend_filepath))
+        return bpy.data.texts["Updater Log"].as_string().splitlines()
+
+    def has_layers(self) -> Tuple[bpy.types.Collection, bpy.types.Object]:
+        # The Layers to collections update renames every collection
+        obj = bpy.data.objects["Empty"]
+        return obj.users_collection[0], obj
+
+    def assertPadded(self, is_padded: bool) -> None:
+        for has_layer in self.has_layers():
+            self.assertEqual(
+                len(has_layer.xplane.layer.lod),
+                xplane_constants.MAX_LODS - 1 if is_padded else 0,
+                msg=has_layer.name,
+            )
+            self.assertEqual(
+                len(has_layer.xplane.layer.cockpit_region),
+                xplane_constants.MAX_COCKPIT_REGIONS if is_padded else 0,
+                msg=has_layer.name,
+            )
+
+    def assertLogged(self, lines: List[str], pattern: str) -> None:
+        self.assertTrue(
+            any(re.search(pattern, line) for line in lines),
+            msg=f"No '{pattern}' in Updater Log:\n" + "\n".join(lines),
+        )
+
+    def test_current_version_not_updated(self) -> None:
+        self.save_as(xplane_helpers.VerStruct.current())
+        lines = self.open()
+        self.assertFalse(
+            [line for line in lines if "Updated " in line],
+            msg="No migration or padding should run for a file from this version",
+        )
+        self.assertPadded(False)
+        self.assertLogged(lines, r"Load handler finished in [\d.]+ ms")
+
+    def test_old_version_migrated(self) -> None:
+        light = test_creation_helpers.create_datablock_light(
+            test_creation_helpers.DatablockInfo("LIGHT", name="Light"), "POINT"
+        )
+        light.data.xplane["param_intensity"] = 5.0
+        material = bpy.data.materials.new("Material_Blend_Glass")
+        material.use_fake_user = True
+        # BLEND_SHADOW, and where BLEND_GLASS was in blend_v1100
+        material.xplane["blend_v1000"] = 2
+        material.xplane["blend_v1100"] = 3
+        coll = bpy.data.collections["Layer 1"]
+        coll.xplane.layer.autodetectTextures = True
+        coll.xplane.layer["index"] = 1
+        coll.xplane.layer["export"] = True
+        bpy.data.objects["Empty"].xplane["export_mesh"] = True
+        bpy.context.scene.xplane["exportMode"] = 1
+
+        # Every migration after V_OLD is applied in one update, what each one used
+        # to do in its own loop over bpy.data
+        self.save_as(V_OLD)
+        lines = self.open()
+
+        light = bpy.data.objects["Light"].data
+        self.assertEqual(light.xplane.param_intensity_new, 5.0)
+        self.assertIsNone(light.xplane.get("param_intensity"))
+        self.assertEqual(light.xplane.type, xplane_constants.LIGHT_DEFAULT)
+
+        material = bpy.data.materials["Material_Blend_Glass"]
+        self.assertEqual(material.xplane.blend_v1000, xplane_constants.BLEND_SHADOW)
+        self.assertIsNone(material.xplane.get("blend_v1100"))
+
+        for has_layer in self.has_layers():
+            self.assertFalse(has_layer.xplane.layer.autodetectTextures)
+            self.assertIsNone(has_layer.xplane.layer.get("index"))
+            self.assertIsNone(has_layer.xplane.layer.get("export"))
+        self.assertIsNone(bpy.data.objects["Empty"].xplane.get("export_mesh"))
+        self.assertIsNone(bpy.context.scene.xplane.get("exportMode"))
+        self.assertPadded(True)
+
+        self.assertLogged(
+            lines, r"Updated Light intensities \(\d+ datablocks\) in [\d.]+ ms"
+        )
+        self.assertLogged(lines, r"Updated Blend Glass rollback \(\d+ datablocks\)")
+        # Migrations between ones that run over the whole file share a traversal
+        self.assertLogged(
+            lines,
+            r"Updated Pre-4\.0\.0-alpha\.6 properties, Default light type"
+            r" \(\d+ datablocks\)",
+        )
+        self.assertLogged(
+            lines,
+            r"Updated Panel to Cockpit Feature, Regions change panel mode,"
+            r" Missing LODs and cockpit regions \(\d+ datablocks\) in [\d.]+ ms",
+        )
+        self.assertLogged(lines, r"Load handler finished in [\d.]+ ms")
+
+    def test_newer_version_padded(self) -> None:
+        self.save_as(V_FUTURE)
+        lines = self.open()
+        self.assertPadded(True)
+        self.assertLogged(
+            lines,
+            r"^(INFO: )?Updated Missing LODs and cockpit regions \(\d+ datablocks\)",
+        )
+
+    def test_new_file_from_old_startup_padded(self) -> None:
+        self.save_as(V_OLD)
+        bpy.ops.wm.read_homefile(filepath=str(self.blend_filepath))
+        self.assertEqual(bpy.data.filepath, "")
+        self.assertPadded(True)
+
+
+runTestCases([TestLoadHandlerMigrations])
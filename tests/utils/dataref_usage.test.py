@@ -0,0 +1,106 @@
+import os
+import sys
+from pathlib import Path
+
+import bpy
+
+from io_xplane2blender import xplane_helpers
+from io_xplane2blender.tests import *
+from io_xplane2blender.tests.test_creation_helpers import *
+from io_xplane2blender.xplane_constants import *
+from io_xplane2blender.xplane_helpers import logger
+from io_xplane2blender.xplane_utils.xplane_dataref_usage import (
+    dataref_usage_index,
+    split_array_index,
+)
+
+__dirname__ = Path(__file__).parent
+
+
+class TestDatarefUsage(XPlaneTestCase):
+    def setUp(self):
+        super().setUp()
+        create_initial_test_setup()
+        bpy.data.collections[0].xplane.is_exportable_collection = True
+        self.mesh = create_datablock_mesh(
+            DatablockInfo("MESH", name="knob", collection="Layer 1")
+        )
+        self.mesh.xplane.datarefs.add().path = (
+            "sim/cockpit2/switches/landing_lights_switch[2]"
+        )
+
+    def test_split_array_index(self):
+        self.assertEqual(split_array_index("sim/a[3]"), ("sim/a", 3))
+        self.assertEqual(split_array_index("sim/a"), ("sim/a", None))
+        self.assertEqual(split_array_index("sim/a[b]"), ("sim/a[b]", None))
+
+    def test_usages_found(self):
+        usages = dataref_usage_index.usages("sim/cockpit2/switches/landing_lights_switch")
+        self.assertEqual(len(usages), 1)
+        self.assertEqual(usages[0].id_name, "knob")
+        self.assertEqual(usages[0].array_index, 2)
+        self.assertEqual(usages[0].prop, "xplane.datarefs[0].path")
+        self.assertEqual(
+            dataref_usage_index.usages(
+                "sim/cockpit2/switches/landing_lights_switch[0]"
+            ),
+            usages,
+        )
+
+    def test_incremental_update(self):
+        dataref_usage_index.usages("")  # Build it
+        self.mesh.xplane.datarefs[0].path = "sim/cockpit2/controls/flap_ratio"
+        self.assertFalse(
+            dataref_usage_index.usages("sim/cockpit2/switches/landing_lights_switch")
+        )
+        self.assertEqual(
+            len(dataref_usage_index.usages("sim/cockpit2/controls/flap_ratio")), 1
+        )
+
+    def test_deleted_datablocks_forgotten(self):
+        dataref_usage_index.usages("")  # Build it
+        bpy.data.objects.remove(self.mesh)
+        self.assertEqual(dataref_usage_index.paths(), [])
+
+    def test_materials_and_manipulators(self):
+        self.mesh.material_slots[0].material.xplane.lightLevel = True
+        self.mesh.material_slots[0].material.xplane.lightLevel_dataref = (
+            "sim/cockpit2/controls/flap_ratio"
+        )
+        set_manipulator_settings(
+            self.mesh,
+            MANIP_TOGGLE,
+            manip_props={"dataref1": "sim/flightmodel/position/groundspeed"},
+        )
+        usages = dataref_usage_index.usages("sim/flightmodel/position/groundspeed")
+        self.assertEqual(len(usages), 1)
+        self.assertTrue(usages[0].is_written)
+        self.assertEqual(
+            dataref_usage_index.usages("sim/cockpit2/controls/flap_ratio")[0].id_type,
+            "MATERIAL",
+        )
+
+    def test_export_validation(self):
+        self.mesh.xplane.datarefs.add().path = (
+            "sim/cockpit2/switches/landing_lights_switch[16]"
+        )
+        self.mesh.xplane.datarefs.add().path = "sim/cockpit2/controls/flap_ratio[0]"
+        self.mesh.xplane.datarefs.add().path = "sim/my_plugin/not_in_datarefs_txt[99]"
+        set_manipulator_settings(
+            self.mesh,
+            MANIP_TOGGLE,
+            manip_props={"dataref1": "sim/flightmodel/position/groundspeed"},
+        )
+        self.exportExportableRoot(bpy.data.collections[0])
+        warnings = [
+            w["message"]
+            for w in logger.findWarnings()
+            if "xplane.datarefs" in w["message"] or "xplane.manip" in w["message"]
+        ]
+        self.assertEqual(len(warnings), 3, warnings)
+        self.assertIn("out of bounds", warnings[0])
+        self.assertIn("is not an array", warnings[1])
+        self.assertIn("read-only", warnings[2])
+
+
+runTestCases([TestDatarefUsage])
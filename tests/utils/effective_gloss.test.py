@@ -0,0 +1,71 @@
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import bpy
+
+from io_xplane2blender.tests import *
+from io_xplane2blender.xplane_utils import xplane_effective_gloss
+from io_xplane2blender.xplane_utils.xplane_effective_gloss import get_effective_gloss
+
+__dirname__ = Path(__file__).parent
+
+
+class TestEffectiveGloss(XPlaneTestCase):
+    def setUp(self):
+        super().setUp()
+        xplane_effective_gloss.clear_gloss_cache()
+        os.makedirs(get_tmp_folder(), exist_ok=True)
+        self.normal_map = Path(get_tmp_folder(), "effective_gloss_NML.png")
+        shutil.copy(
+            __dirname__ / "../materials/objects/texture_NML.png", self.normal_map
+        )
+
+    def test_images_are_freed(self):
+        num_images = len(bpy.data.images)
+        get_effective_gloss(str(self.normal_map))
+        self.assertEqual(len(bpy.data.images), num_images)
+
+    def test_estimate_is_cached(self):
+        gloss = get_effective_gloss(str(self.normal_map))
+        self.assertTrue(0 <= gloss <= 1)
+
+        calls = []
+        estimate_gloss = xplane_effective_gloss._estimate_gloss
+        xplane_effective_gloss._estimate_gloss = (
+            lambda path, max_error=None: calls.append(path) or 0.25
+        )
+        try:
+            self.assertEqual(get_effective_gloss(str(self.normal_map)), gloss)
+            self.assertEqual(calls, [])
+
+            # Changing the file means estimating again
+            stat = os.stat(self.normal_map)
+            os.utime(
+                self.normal_map, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9)
+            )
+            self.assertEqual(get_effective_gloss(str(self.normal_map)), 0.25)
+            self.assertEqual(len(calls), 1)
+        finally:
+            xplane_effective_gloss._estimate_gloss = estimate_gloss
+
+    def test_sampled_estimate_is_close(self):
+        xplane_effective_gloss.clear_gloss_cache()
+        sampled = xplane_effective_gloss._estimate_gloss(
+            str(self.normal_map), max_error=0.01
+        )
+        self.assertAlmostEqual(
+            sampled,
+            xplane_effective_gloss._estimate_gloss(str(self.normal_map)),
+            delta=0.05,
+        )
+
+    def test_missing_file_uses_default(self):
+        self.assertAlmostEqual(
+            get_effective_gloss(str(Path(get_tmp_folder(), "does_not_exist.png"))),
+            (1 - 0.5 ** 0.5) / 0.96875,
+        )
+
+
+runTestCases([TestEffectiveGloss])
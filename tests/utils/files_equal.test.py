@@ -0,0 +1,79 @@
+import os
+import sys
+from pathlib import Path
+
+import bpy
+
+from io_xplane2blender.tests import *
+
+__dirname__ = Path(__file__).parent
+
+OBJ = """I
+800
+OBJ
+
+TEXTURE tex.png
+POINT_COUNTS\t3 0 0 3
+
+VT\t0 0 0\t0 0 1\t0 0 # 0
+VT\t1 0 0\t0 0 1\t1 0
+VT\t0 1 0\t0 0 1\t0 1
+
+IDX\t0
+IDX\t1
+IDX\t2
+
+ANIM_begin
+ANIM_rotate_begin\t0 0 1\tsim/test
+ANIM_rotate_key\t0 -90
+ANIM_rotate_key\t1 90
+ANIM_rotate_end
+TRIS\t0 3
+ANIM_end
+"""
+
+
+def filterLines(line):
+    return isinstance(line[0], str) and line[0] != "TEXTURE"
+
+
+class TestFilesEqual(XPlaneTestCase):
+    def test_equal_within_tolerance(self):
+        self.assertFilesEqual(OBJ, OBJ.replace("VT\t1 0 0", "VT\t1.00001 0 0"), filterLines)
+
+    def test_vt_mismatch_reports_row(self):
+        with self.assertRaises(AssertionError) as cm:
+            self.assertFilesEqual(OBJ, OBJ.replace("VT\t1 0 0", "VT\t1 0.5 0"), filterLines)
+        self.assertIn("row 1 of the VT table", str(cm.exception))
+        self.assertIn("1> VT 1.0 0.5", str(cm.exception))
+
+    def test_idx_mismatch(self):
+        with self.assertRaises(AssertionError):
+            self.assertFilesEqual(OBJ, OBJ.replace("IDX\t2", "IDX\t3"), filterLines)
+
+    def test_table_length_mismatch(self):
+        with self.assertRaises(AssertionError) as cm:
+            self.assertFilesEqual(OBJ, OBJ.replace("IDX\t2\n", ""), filterLines)
+        self.assertIn("IDX tables unequal", str(cm.exception))
+
+    def test_filtered_out_table_ignored(self):
+        self.assertFilesEqual(
+            OBJ, OBJ.replace("VT\t1 0 0", "VT\t9 9 9"), ["ANIM", "TRIS"]
+        )
+
+    def test_rotate_keys_compared_by_abs(self):
+        self.assertFilesEqual(OBJ, OBJ.replace("0 -90", "0 90"), filterLines)
+
+    def test_directive_mismatch(self):
+        with self.assertRaises(AssertionError):
+            self.assertFilesEqual(OBJ, OBJ.replace("TRIS\t0 3", "TRIS\t0 6"), filterLines)
+
+    def test_ragged_table_falls_back(self):
+        with self.assertRaises(AssertionError) as cm:
+            self.assertFilesEqual(
+                OBJ, OBJ.replace("VT\t1 0 0\t0 0 1\t1 0", "VT\t1 0 0\t0 0 1\t1"), filterLines
+            )
+        self.assertIn("Number of line components unequal", str(cm.exception))
+
+
+runTestCases([TestFilesEqual])
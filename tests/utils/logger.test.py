@@ -0,0 +1,75 @@
+import io
+import os
+import sys
+from pathlib import Path
+
+import bpy
+
+from io_xplane2blender.tests import *
+from io_xplane2blender.xplane_helpers import LogMessage, XPlaneLogger
+
+__dirname__ = Path(__file__).parent
+
+
+class TestLogger(XPlaneTestCase):
+    def setUp(self):
+        super().setUp()
+        self.logger = XPlaneLogger()
+        self.logger.error("error 1")
+        self.logger.warn("warning 1")
+        self.logger.error("error 2", context="context")
+
+    def test_messages_indexed_by_type(self):
+        self.assertEqual(self.logger.countErrors(), 2)
+        self.assertEqual(self.logger.countWarnings(), 1)
+        self.assertTrue(self.logger.hasErrors())
+        self.assertFalse(self.logger.hasOfType("success"))
+        self.assertEqual(
+            [message.message for message in self.logger.findErrors()],
+            ["error 1", "error 2"],
+        )
+        self.assertEqual(
+            [message.type for message in self.logger.messages],
+            ["error", "warning", "error"],
+        )
+
+        self.logger.clearMessages()
+        self.assertEqual(self.logger.countErrors(), 0)
+        self.assertEqual(self.logger.findErrors(), [])
+        self.assertFalse(self.logger.hasWarnings())
+
+    def test_message_reads_like_a_dict(self):
+        message = self.logger.findErrors()[1]
+        self.assertIsInstance(message, LogMessage)
+        self.assertEqual(
+            (message["type"], message["message"], message["context"]),
+            ("error", "error 2", "context"),
+        )
+        with self.assertRaises(KeyError):
+            message["line"]
+        with self.assertRaises(AttributeError):
+            message.line = 1
+
+    def test_file_transport_buffered(self):
+        log_file = io.StringIO()
+        self.logger.addTransport(XPlaneLogger.FileTransport(log_file), ["error"])
+        self.logger.error("error 3")
+        self.logger.warn("warning 2")
+        self.logger.error("error 4")
+        self.assertEqual(log_file.getvalue(), "")
+
+        self.logger.flush()
+        self.assertEqual(log_file.getvalue(), "ERROR: error 3\nERROR: error 4\n")
+        self.logger.flush()
+        self.assertEqual(log_file.getvalue(), "ERROR: error 3\nERROR: error 4\n")
+
+    def test_clear_transports_flushes(self):
+        log_file = io.StringIO()
+        self.logger.addTransport(XPlaneLogger.FileTransport(log_file))
+        self.logger.success("done")
+        self.logger.clear()
+        self.assertEqual(log_file.getvalue(), "SUCCESS: done\n")
+        self.assertEqual(self.logger.transports, [])
+
+
+runTestCases([TestLogger])
@@ -0,0 +1,78 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import bpy
+
+from io_xplane2blender.tests import *
+from io_xplane2blender.tests.test_creation_helpers import *
+from io_xplane2blender.xplane_types import xplane_file
+from io_xplane2blender.xplane_utils.xplane_memory_profiler import (
+    ExportMemoryProfiler,
+    deep_sizeof,
+    memory_profiler,
+)
+from io_xplane2blender.xplane_utils.xplane_profiler import profiler
+
+__dirname__ = Path(__file__).parent
+
+
+class TestMemoryProfiler(XPlaneTestCase):
+    def tearDown(self):
+        memory_profiler.stop()
+        profiler.stop()
+        super().tearDown()
+
+    def test_deep_sizeof_counts_shared_once(self):
+        vertex = tuple(float(i) for i in range(8))
+        self.assertEqual(
+            deep_sizeof([vertex, vertex]), sys.getsizeof([vertex, vertex]) + deep_sizeof(vertex)
+        )
+        self.assertGreater(deep_sizeof({"a": [vertex]}), deep_sizeof(vertex))
+
+    def test_phase_snapshots(self):
+        p = ExportMemoryProfiler()
+        p.start()
+        with profiler.phase("allocate"):
+            kept = [str(i) * 10 for i in range(10000)]
+        with profiler.phase("collect_mesh"):
+            pass
+        p.measure("kept", kept, strings=len(kept))
+        p.stop()
+
+        self.assertEqual([phase["phase"] for phase in p.phases], ["allocate"])
+        allocate = p.phases[0]
+        self.assertGreater(allocate["traced"], 10000 * 10)
+        self.assertTrue(allocate["top_growth"])
+        self.assertTrue(p.top_sites)
+        self.assertEqual(p.structures[0]["strings"], 10000)
+
+        report_filepath = Path(get_tmp_folder(), "memory_profiler_report.json")
+        p.write_json(str(report_filepath))
+        with open(report_filepath) as report_file:
+            report = json.load(report_file)
+        self.assertEqual(report["phases"][0]["phase"], "allocate")
+        self.assertIn("kept", "\n".join(p.summary()))
+
+    def test_export_structures_measured(self):
+        create_initial_test_setup()
+        bpy.data.collections["Layer 1"].xplane.is_exportable_collection = True
+        create_datablock_mesh(DatablockInfo("MESH", name="cube", collection="Layer 1"))
+        memory_profiler.start()
+        xp_file = self.createXPlaneFileFromPotentialRoot(
+            bpy.data.collections["Layer 1"], bpy.context.scene.view_layers[0]
+        )
+        out = xp_file.write()
+        memory_profiler.measure_xplane_file(xp_file, out)
+        memory_profiler.stop()
+
+        self.assertIn("XPlaneHeader.write", {p["phase"] for p in memory_profiler.phases})
+        structures = {s["name"]: s for s in memory_profiler.structures}
+        self.assertEqual(structures[f"{xp_file.filename} XPlaneMesh.vertices"]["vertices"], 24)
+        self.assertEqual(structures[f"{xp_file.filename} XPlaneBones"]["bones"], 2)
+        self.assertEqual(structures[f"{xp_file.filename} output"]["chars"], len(out))
+        self.assertGreater(structures[f"{xp_file.filename} XPlaneAttribute instances"]["instances"], 0)
+
+
+runTestCases([TestMemoryProfiler])
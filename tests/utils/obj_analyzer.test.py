@@ -0,0 +1,106 @@
+import os
+import sys
+from pathlib import Path
+
+import bpy
+
+from io_xplane2blender.tests import *
+from io_xplane2blender.xplane_utils import xplane_obj_analyzer, xplane_obj_reader
+
+__dirname__ = Path(__file__).parent
+
+OBJ = """I
+800
+OBJ
+
+TEXTURE tex.png
+POINT_COUNTS\t4 0 2 12
+
+VT\t0 0 0\t0 0 1\t0 0
+VT\t1 0 0\t0 0 1\t1 0
+VT\t0 1 0\t0 0 1\t0 1
+VT\t1 1 0\t0 0 1\t1 1
+
+VLIGHT\t0 0 1\t1 0.5 0
+VLIGHT\t0 0 2\t1 0.5 0
+
+IDX10\t0 1 2 1 3 2 0 1 2 0
+IDX\t1
+IDX\t2
+
+ATTR_LOD 0 100
+ATTR_no_blend 0.5
+TRIS\t0 6
+ANIM_begin
+\tANIM_trans\t0 0 0\t0 0 1\t0 1\tsim/test
+\tANIM_begin
+\t\tATTR_shiny_rat 0.5
+\t\tATTR_draw_disable
+\t\tTRIS\t6 6
+\tANIM_end
+ANIM_end
+LIGHTS\t0 2
+ATTR_LOD 200 300
+TRIS\t0 3
+LIGHT_NAMED\ttaillight\t0 0 0
+"""
+
+
+class TestObjAnalyzer(XPlaneTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cost = xplane_obj_analyzer.analyze(
+            xplane_obj_reader.read_obj_string(OBJ),
+            {(0, 6): "Cube", (0, 3): "Cube_LOD2"},
+        )
+
+    def test_buckets(self):
+        near, far = self.cost.buckets
+        self.assertEqual(near.lod, (0, 100))
+        self.assertEqual(
+            (near.batches, near.triangles, near.state_changes), (2, 4, 3)
+        )
+        self.assertEqual((near.anim_blocks, near.anim_depth, near.lights), (2, 2, 2))
+        # 12 indices of 4 vertices
+        self.assertAlmostEqual(near.vertex_reuse, 3.0)
+        self.assertEqual(
+            (far.batches, far.triangles, far.state_changes, far.lights), (1, 1, 0, 1)
+        )
+        self.assertAlmostEqual(far.vertex_reuse, 1.0)
+
+    def test_lod_gaps(self):
+        self.assertEqual(self.cost.lod_gaps, [(100, 200)])
+
+    def test_worst_objects(self):
+        self.assertEqual(
+            [obj.name for obj in self.cost.objects],
+            ["TRIS on line 28", "Cube", "Cube_LOD2"],
+        )
+        self.assertEqual(self.cost.objects[0].state_changes, 2)
+        self.assertEqual(self.cost.objects[0].anim_depth, 2)
+
+    def test_thresholds(self):
+        self.assertEqual(self.cost.check(xplane_obj_analyzer.Thresholds()), [])
+        self.assertEqual(
+            self.cost.check(
+                xplane_obj_analyzer.Thresholds(max_batches=1, min_vertex_reuse=2)
+            ),
+            [
+                "LOD 0-100: 2 batches, more than 1",
+                "LOD 200-300: vertex reuse 1.00, less than 2",
+            ],
+        )
+
+    def test_no_lods(self):
+        cost = xplane_obj_analyzer.analyze(
+            xplane_obj_reader.read_obj_string(
+                OBJ.replace("ATTR_LOD 0 100\n", "").replace("ATTR_LOD 200 300\n", "")
+            )
+        )
+        self.assertEqual(len(cost.buckets), 1)
+        self.assertEqual(cost.buckets[0].label, "No LODs")
+        self.assertEqual(cost.buckets[0].batches, 3)
+        self.assertEqual(cost.lod_gaps, [])
+
+
+runTestCases([TestObjAnalyzer])
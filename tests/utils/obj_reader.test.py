@@ -0,0 +1,112 @@
+import os
+import sys
+from pathlib import Path
+
+import bpy
+
+from io_xplane2blender.tests import *
+from io_xplane2blender.xplane_utils import xplane_obj_reader
+
+__dirname__ = Path(__file__).parent
+
+OBJ = """I
+800
+OBJ
+
+TEXTURE tex.png
+POINT_COUNTS\t3 0 1 12
+
+VT\t0 0 0\t0 0 1\t0 0 # 0
+VT\t1 0 0\t0 0 1\t1 0
+# A comment in the middle of a table
+VT\t0 1 0\t0 0 1\t0 1
+
+VLIGHT\t0 0 1\t1 0.5 0
+
+IDX10\t0 1 2 0 1 2 0 1 2 0
+IDX\t1
+IDX\t2
+
+ATTR_LOD 0 1000
+ANIM_begin
+\tANIM_trans_begin\tsim/test
+\t\tANIM_trans_key\t0 0 0 0
+\t\tANIM_trans_key\t1 0 0 1
+\tANIM_trans_end
+\tATTR_shiny_rat 0.5
+\tTRIS\t0 12
+ANIM_end
+LIGHTS\t0 1
+LIGHT_NAMED\ttaillight\t0 0 0
+"""
+
+
+class TestObjReader(XPlaneTestCase):
+    def read(self, content: str, name: str) -> xplane_obj_reader.ObjFile:
+        filepath = os.path.join(get_tmp_folder(), name)
+        with open(filepath, "w") as obj_file:
+            obj_file.write(content)
+        return xplane_obj_reader.read_obj(filepath)
+
+    def test_reads_tables(self):
+        obj = self.read(OBJ, "obj_reader_tables.obj")
+        self.assertEqual((obj.line_ending, obj.version), ("I", 800))
+        self.assertEqual(obj.vertices.shape, (3, 8))
+        self.assertFloatVectorsEqual(obj.vertices[1], (1, 0, 0, 0, 0, 1, 1, 0))
+        self.assertEqual(obj.light_vertices.shape, (1, 6))
+        self.assertEqual(obj.line_vertices.shape, (0, 6))
+        self.assertEqual(list(obj.indices), [0, 1, 2, 0, 1, 2, 0, 1, 2, 0, 1, 2])
+
+    def test_reads_header_and_commands(self):
+        obj = self.read(OBJ, "obj_reader_commands.obj")
+        self.assertEqual(
+            [command.directive for command in obj.header], ["TEXTURE", "POINT_COUNTS"]
+        )
+        self.assertEqual(
+            [command.kind for command in obj.commands],
+            ["LOD"] + ["ANIM"] * 5 + ["ATTR", "TRIS", "ANIM", "LIGHT", "LIGHT"],
+        )
+        tris = obj.commands_of_kind("TRIS")[0]
+        self.assertEqual(tris.numbers(), [0, 12])
+        self.assertEqual(tris.line_number, 26)
+        self.assertEqual(obj.commands[-1].args, ("taillight", "0", "0", "0"))
+
+    def test_wrong_point_counts(self):
+        obj = self.read(
+            OBJ.replace("POINT_COUNTS\t3 0 1 12", "POINT_COUNTS\t2 0 1 100"),
+            "obj_reader_wrong_counts.obj",
+        )
+        self.assertEqual(obj.vertices.shape, (3, 8))
+        self.assertEqual(len(obj.indices), 12)
+
+    def test_reads_fixture_like_exporter_wrote_it(self):
+        obj = xplane_obj_reader.read_obj(
+            get_tests_folder()
+            / Path(
+                "features",
+                "lod_overrides",
+                "fixtures",
+                "test_OverridesAppliedToAllChildren.obj",
+            )
+        )
+        self.assertEqual(obj.vertices.shape, (17280, 8))
+        self.assertEqual(len(obj.indices), 17280)
+        self.assertEqual(len(obj.commands_of_kind("LOD")), 2)
+
+    def test_malformed_table(self):
+        with self.assertRaises(ValueError):
+            self.read(
+                OBJ.replace("VT\t1 0 0\t0 0 1\t1 0", "VT\t1 0 0"),
+                "obj_reader_ragged.obj",
+            )
+        with self.assertRaises(ValueError):
+            self.read(OBJ.replace("IDX\t1", "IDX\tone"), "obj_reader_not_a_number.obj")
+
+    def test_not_an_obj(self):
+        with self.assertRaises(ValueError):
+            self.read("hello\n", "obj_reader_not_an_obj.obj")
+        with self.assertRaises(ValueError):
+            self.read("", "obj_reader_empty.obj")
+
+
+runTestCases([TestObjReader])
@@ -0,0 +1,83 @@
+import os
+import sys
+from pathlib import Path
+
+import bpy
+
+from io_xplane2blender import xplane_helpers
+from io_xplane2blender.tests import *
+from io_xplane2blender.xplane_utils import xplane_datarefs_txt_parser
+from io_xplane2blender.xplane_utils.xplane_path_trie import PathTrie
+
+__dirname__ = Path(__file__).parent
+
+
+class TestPathTrie(XPlaneTestCase):
+    def setUp(self):
+        super().setUp()
+        self.trie = PathTrie(
+            ["a/b", "a/b/c", "a/d", "a/dd/e", "f"], lambda path: path
+        )
+
+    def test_root_children_and_counts(self):
+        self.assertEqual(
+            [(node.path, node.count) for node in self.trie.root.children],
+            [("a", 4), ("f", 1)],
+        )
+        self.assertEqual(self.trie.root.count, 5)
+
+    def test_node_lookup(self):
+        self.assertEqual(self.trie.node("a/dd").count, 1)
+        self.assertEqual(self.trie.node("a/dd/").path, "a/dd")
+        self.assertIsNone(self.trie.node("a/x"))
+        self.assertIs(self.trie.node(""), self.trie.root)
+
+    def test_leaves_have_items(self):
+        self.assertTrue(self.trie.node("f").is_leaf)
+        self.assertEqual(self.trie.node("f").item, "f")
+        self.assertIsNone(self.trie.node("a").item)
+
+    def test_path_that_is_also_a_prefix(self):
+        node = self.trie.node("a/b")
+        self.assertEqual(node.item, "a/b")
+        self.assertFalse(node.is_leaf)
+        self.assertEqual([child.path for child in node.children], ["a/b/c"])
+        self.assertEqual(node.count, 2)
+
+    def test_complete(self):
+        self.assertEqual([n.path for n in self.trie.complete("a/d")], ["a/d", "a/dd"])
+        self.assertEqual(
+            [n.path for n in self.trie.complete("a/")], ["a/b", "a/d", "a/dd"]
+        )
+        self.assertEqual([n.path for n in self.trie.complete("")], ["a", "f"])
+        self.assertEqual(self.trie.complete("x/y"), [])
+
+    def test_duplicate_paths(self):
+        trie = PathTrie([("sim/a/b", 1), ("sim/a/b", 2)], lambda item: item[0])
+        node = trie.node("sim/a/b")
+        self.assertEqual(node.count, 2)
+        self.assertEqual(node.item, ("sim/a/b", 1))
+        self.assertTrue(node.is_leaf)
+        self.assertEqual(trie.complete("sim/a/b/"), [])
+        self.assertEqual(node.walk(), [("sim/a/b", 1), ("sim/a/b", 2)])
+
+    def test_walk(self):
+        self.assertEqual(self.trie.node("a").walk(), ["a/b", "a/b/c", "a/d", "a/dd/e"])
+
+    def test_datarefs_txt_trie(self):
+        search_index = xplane_datarefs_txt_parser.get_datarefs_txt_search_index(
+            Path(
+                xplane_helpers.get_plugin_resources_folder(), "DataRefs.txt"
+            ).as_posix()
+        )
+        trie = search_index.path_trie
+        self.assertIs(trie, search_index.path_trie)
+        self.assertEqual(trie.root.count, len(search_index))
+        switches = trie.node("sim/cockpit2/switches")
+        self.assertGreater(switches.count, 1)
+        self.assertIn(switches, trie.complete("sim/cockpit2/sw"))
+        for leaf in (child for child in switches.children if child.is_leaf):
+            self.assertEqual(leaf.item.path, leaf.path)
+
+
+runTestCases([TestPathTrie])
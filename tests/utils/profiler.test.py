@@ -0,0 +1,74 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import bpy
+
+from io_xplane2blender.tests import *
+from io_xplane2blender.tests.test_creation_helpers import *
+from io_xplane2blender.xplane_utils.xplane_profiler import ExportProfiler, profiler
+
+__dirname__ = Path(__file__).parent
+
+
+class TestProfiler(XPlaneTestCase):
+    def tearDown(self):
+        profiler.stop()
+        super().tearDown()
+
+    def test_phases_ignored_when_stopped(self):
+        p = ExportProfiler()
+        with p.phase("ignored") as phase:
+            phase.set(objects=1)
+        self.assertEqual(p.events, [])
+        self.assertEqual(p.summary(), [])
+
+    def test_phases_nest_and_summarize(self):
+        p = ExportProfiler()
+        p.start()
+        with p.phase("outer", root="a"):
+            for i in range(3):
+                with p.phase("inner") as phase:
+                    phase.set(objects=2)
+        p.stop()
+
+        self.assertEqual([e["name"] for e in p.events], ["inner"] * 3 + ["outer"])
+        outer = p.events[-1]
+        self.assertTrue(all(e["ts"] >= outer["ts"] for e in p.events))
+        summary = p.summary()
+        self.assertEqual(len(summary), 3)
+        inner_line = next(line for line in summary if line.startswith("inner"))
+        self.assertIn("objects=6", inner_line)
+        self.assertRegex(inner_line, r"inner\s+3\s")
+
+    def test_chrome_trace(self):
+        p = ExportProfiler()
+        p.start()
+        with p.phase("phase"):
+            pass
+        trace_filepath = Path(get_tmp_folder(), "profiler_trace.json")
+        p.write_chrome_trace(str(trace_filepath))
+        with open(trace_filepath) as trace_file:
+            trace = json.load(trace_file)
+        self.assertEqual(trace["traceEvents"][0]["ph"], "X")
+        self.assertEqual(trace["traceEvents"][0]["name"], "phase")
+
+    def test_export_phases_recorded(self):
+        create_initial_test_setup()
+        bpy.data.collections["Layer 1"].xplane.is_exportable_collection = True
+        create_datablock_mesh(DatablockInfo("MESH", name="cube", collection="Layer 1"))
+        profiler.start()
+        self.exportExportableRoot("Layer 1")
+        profiler.stop()
+        names = {e["name"] for e in profiler.events}
+        for name in [
+            "collectXPlaneObjects",
+            "collect_mesh",
+            "XPlaneHeader._init",
+            "XPlaneCommands.write",
+        ]:
+            self.assertIn(name, names)
+
+
+runTestCases([TestProfiler])
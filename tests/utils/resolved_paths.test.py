@@ -0,0 +1,49 @@
+import os
+import sys
+from pathlib import Path
+
+import bpy
+
+from io_xplane2blender import xplane_helpers
+from io_xplane2blender.tests import *
+from io_xplane2blender.xplane_helpers import get_absolute_path, get_relative_path
+
+__dirname__ = Path(__file__).parent
+
+
+class TestResolvedPaths(XPlaneTestCase):
+    def setUp(self):
+        super().setUp()
+        xplane_helpers.clear_resolved_paths()
+        self.base_dir = str(Path(get_tmp_folder(), "blend").resolve())
+        self.export_dir = str(Path(get_tmp_folder(), "objs", "cars").resolve())
+
+    def test_relative_to_export_dir(self):
+        self.assertEqual(
+            get_relative_path("textures/../car.png", self.base_dir, self.export_dir),
+            "../../blend/car.png",
+        )
+        self.assertEqual(
+            get_relative_path(
+                os.path.join(self.export_dir, "car.png"), self.base_dir, self.export_dir
+            ),
+            "car.png",
+        )
+
+    def test_cwd_untouched(self):
+        cwd = os.getcwd()
+        get_relative_path("car.png", self.base_dir, self.export_dir)
+        get_absolute_path("car.png", self.base_dir)
+        self.assertEqual(os.getcwd(), cwd)
+
+    def test_memoized(self):
+        get_relative_path("car.png", self.base_dir, self.export_dir)
+        self.assertIn(
+            ("rel", "car.png", self.base_dir, self.export_dir),
+            xplane_helpers._resolved_paths,
+        )
+        xplane_helpers.clear_resolved_paths()
+        self.assertFalse(xplane_helpers._resolved_paths)
+
+
+runTestCases([TestResolvedPaths])
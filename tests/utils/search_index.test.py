@@ -0,0 +1,113 @@
+import os
+import sys
+from pathlib import Path
+
+import bpy
+
+from io_xplane2blender import xplane_helpers
+from io_xplane2blender.tests import *
+from io_xplane2blender.xplane_utils import (
+    xplane_commands_txt_parser,
+    xplane_datarefs_txt_parser,
+    xplane_search_index,
+)
+from io_xplane2blender.xplane_utils.xplane_search_index import SearchIndex, parse_query
+
+__dirname__ = Path(__file__).parent
+
+
+class TestSearchIndex(XPlaneTestCase):
+    def setUp(self):
+        super().setUp()
+        resources = xplane_helpers.get_plugin_resources_folder()
+        self.dref_index = xplane_datarefs_txt_parser.get_datarefs_txt_search_index(
+            Path(resources, "DataRefs.txt").as_posix()
+        )
+        self.command_index = xplane_commands_txt_parser.get_commands_txt_search_index(
+            Path(resources, "Commands.txt").as_posix()
+        )
+
+    def _paths(self, query, k=10):
+        return [d.path for d in self.dref_index.search_items(query, k)]
+
+    def test_parse_query(self):
+        self.assertEqual(parse_query(""), [])
+        self.assertEqual(parse_query("  Flap  RATIO flap"), [("flap", "ratio")])
+        self.assertEqual(parse_query("gear|flap|gear"), [("gear",), ("flap",)])
+
+    def test_indexes_are_cached(self):
+        resources = xplane_helpers.get_plugin_resources_folder()
+        self.assertIs(
+            self.dref_index,
+            xplane_datarefs_txt_parser.get_datarefs_txt_search_index(
+                Path(resources, "DataRefs.txt").as_posix()
+            ),
+        )
+
+    def test_empty_query_is_file_order(self):
+        self.assertEqual(self.dref_index.search("", 5), list(range(5)))
+
+    def test_k_limits_results(self):
+        self.assertEqual(len(self.dref_index.search("sim", 7)), 7)
+
+    def test_count_and_pages(self):
+        self.assertEqual(self.dref_index.count(""), len(self.dref_index))
+        num_results = self.dref_index.count("flap")
+        self.assertEqual(len(self.dref_index.search("flap", 1000)), num_results)
+        page_size = xplane_search_index.RESULTS_PAGE_SIZE
+        self.assertEqual(
+            self.dref_index.search_page("flap", 1),
+            self.dref_index.search("flap", 2 * page_size)[page_size:],
+        )
+
+    def test_exact_path_ranked_first(self):
+        paths = self._paths("sim/cockpit2/controls/flap_ratio")
+        self.assertEqual(paths[0], "sim/cockpit2/controls/flap_ratio")
+
+    def test_all_terms_must_match(self):
+        paths = self._paths("flap ratio", 50)
+        self.assertTrue(paths)
+        for path in paths:
+            self.assertIn("flap", path.lower())
+            self.assertIn("ratio", path.lower())
+
+    def test_whole_token_beats_substring(self):
+        paths = self._paths("battery_on", 1)
+        self.assertTrue(paths[0].endswith("/battery_on"), paths[0])
+
+    def test_or_searches(self):
+        paths = self._paths("battery_on|flap_ratio", 100)
+        self.assertTrue(any("battery_on" in path for path in paths))
+        self.assertTrue(any("flap_ratio" in path for path in paths))
+
+    def test_units_and_description_searched(self):
+        for dref in self.dref_index.search_items("feet", 50):
+            self.assertTrue(
+                "feet" in dref.path.lower()
+                or "feet" in dref.units.lower()
+                or "feet" in dref.description.lower(),
+                dref,
+            )
+
+    def test_fuzzy_fallback_on_typo(self):
+        paths = self._paths("autopliot")
+        self.assertTrue(paths)
+        self.assertTrue(all("autopilot" in path for path in paths[:3]), paths)
+
+    def test_no_match(self):
+        self.assertEqual(self.dref_index.search("zzzzqqqq"), [])
+
+    def test_commands_searched(self):
+        commands = [c.command for c in self.command_index.search_items("quit", 5)]
+        self.assertIn("sim/operation/quit", commands)
+
+    def test_plain_objects_indexable(self):
+        index = SearchIndex(
+            ["a/b_c", "a/bb", "c/d"], lambda s: (s, "", "apple banana")
+        )
+        self.assertEqual(index.search("bb"), [1])
+        self.assertEqual(index.search("b", 5)[0], 0)
+        self.assertEqual(sorted(index.search("banana")), [0, 1, 2])
+
+
+runTestCases([TestSearchIndex])
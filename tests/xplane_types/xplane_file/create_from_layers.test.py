@@ -7,7 +7,7 @@ from io_xplane2blender import xplane_config
 
 class TestCreateFromLayers(XPlaneTestCase):
     def test_create_files_from_single_layer(self):
-        tmpDir = os.path.realpath(os.path.join(__file__, '../../tmp'))
+        tmpDir = get_tmp_folder()
 
         xplaneFile = self.createXPlaneFileFromPotentialRoot(bpy.data.collections["Layer 1"])
 
@@ -84,7 +84,11 @@ class TestFrameSetOptimization(XPlaneTestCase):
             f"edit_export_edit_export_{suffix}"
         )
         col.xplane.is_exportable_collection = True
-        col.xplane.layer.name = f"../../tmp/edit_export_edit_export_{suffix}.obj"
+        # Relative to the .blend, export_to_relative_dir is tested with it
+        col.xplane.layer.name = os.path.relpath(
+            os.path.join(get_tmp_folder(), f"edit_export_edit_export_{suffix}.obj"),
+            os.path.dirname(bpy.data.filepath),
+        )
 
         ob = test_creation_helpers.create_datablock_empty(
             info=test_creation_helpers.DatablockInfo(
@@ -25,7 +25,7 @@ class TestRootObjectOffsets(XPlaneTestCase):
             obj_list = one_obj_test[3]
             bone_tree = one_obj_test[4]
 
-            tmpDir = os.path.realpath(os.path.join(__dirname__, '../../tmp'))
+            tmpDir = get_tmp_folder()
 
             xplaneFile = self.createXPlaneFileFromPotentialRoot(bpy.data.objects[root_block])
 